@@ -1,4 +1,4 @@
-from typing import Set
+from typing import Dict, List, Set
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -16,6 +16,136 @@ class Settings(BaseSettings):
         "emprendedores"
     }
     
+    # Sitio objetivo
+    BLOG_BASE_URL: str = "https://xepelin.com"
+    USER_AGENT: str = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+    # Descubrimiento de artículos vía HTTP (sitemap/feeds) antes de usar el navegador
+    LISTING_DISCOVERY_ENABLED: bool = True
+    LISTING_DISCOVERY_TIMEOUT: int = 10
+    LISTING_SITEMAP_PATHS: List[str] = ["/sitemap.xml"]
+    LISTING_FEED_PATHS: List[str] = []
+
+    # Cache de listados por categoría (stale-while-revalidate)
+    LISTING_CACHE_TTL: int = 900
+    LISTING_CACHE_MAX_STALE: int = 86400
+    LISTING_REFRESH_WORKERS: int = 2
+    # Modo incremental: se deja de paginar tras N artículos conocidos seguidos (0 desactiva)
+    LISTING_INCREMENTAL_STOP_AFTER: int = 3
+
+    # Paginación del listado basada en eventos (segundos)
+    LISTING_MAX_CLICKS: int = 100
+    LISTING_BATCH_TIMEOUT: float = 10.0
+    LISTING_NETWORK_IDLE: float = 1.0
+    LISTING_POLL_INTERVAL: float = 0.1
+
+    # Lectura de artículos desde los datos de Next.js con respaldo al HTML
+    ARTICLE_DATA_ROUTES_ENABLED: bool = True
+
+    # Cache de artículos compartida entre jobs (LRU + TTL)
+    ARTICLE_CACHE_MAXSIZE: int = 5000
+    ARTICLE_CACHE_TTL: int = 3600
+
+    # Almacén persistente de artículos (SQLite) para revalidación condicional
+    ARTICLE_STORE_PATH: str = str(Path("data") / "articles.db")
+
+    # Fetchers asíncronos concurrentes del modelo ultra
+    ULTRA_FETCH_CONCURRENCY: int = 10
+
+    # Coalescencia de jobs: solicitudes iguales (categoría, modelo) comparten una ejecución.
+    # Ventana en segundos para reutilizar un job ya completado (0 solo coalesce jobs en curso)
+    JOB_COALESCING_ENABLED: bool = True
+    JOB_COALESCE_WINDOW: int = 0
+
+    # Scheduler de jobs: workers por modelo y control de admisión
+    QUEUE_WORKERS: Dict[str, int] = {"base": 1, "optimized": 2, "ultra": 2}
+    QUEUE_MAX_PENDING: int = 50
+    QUEUE_RETRY_AFTER: int = 30
+    QUEUE_DRAIN_TIMEOUT: int = 60
+    # Política de despacho: "sjf" (el job esperado más corto primero, con envejecimiento) o "fifo".
+    # El envejecimiento descuenta N segundos de duración esperada por cada segundo en cola
+    QUEUE_POLICY: str = "sjf"
+    QUEUE_AGING_FACTOR: float = 1.0
+    # Historial de duraciones por (modelo, categoría) para estimar duración y ETA
+    JOB_HISTORY_WINDOW: int = 20
+    JOB_HISTORY_SEED_GLOB: str = str(Path("outputs") / "benchmark_results_*.csv")
+    JOB_DEFAULT_DURATION: float = 60.0
+
+    # "todas las categorias" se divide en un job hijo por categoría
+    JOB_SPLIT_ALL_CATEGORIES: bool = True
+
+    # Ejecución de jobs: "inprocess" (en el proceso de la API) o "broker" (workers externos, worker.py).
+    # BROKER_URL: sqlite:///ruta.db para un host o redis://host:6379/0 para varias máquinas
+    EXECUTION_MODE: str = "inprocess"
+    BROKER_URL: str = "sqlite:///" + str(Path("data") / "broker.db")
+    # Plazos en segundos: ejecución desde que un worker reclama el job, espera en cola hasta
+    # que alguno lo reclame y vida de los resultados que la API no alcanzó a leer
+    BROKER_POLL_INTERVAL: float = 0.5
+    BROKER_CLAIM_TIMEOUT: int = 1200
+    BROKER_QUEUE_TIMEOUT: int = 3600
+    BROKER_RESULT_TTL: int = 86400
+
+    # Estado de los jobs leído por los endpoints de estado: sqlite:///ruta.db (persistente),
+    # redis://host:6379/0 para varias máquinas o memory:// (un solo proceso, sin persistencia)
+    JOB_STATE_URL: str = "sqlite:///" + str(Path("data") / "jobs.db")
+    # Retención de jobs terminados: antigüedad máxima (segundos), cantidad máxima y
+    # cada cuántos segundos se aplica
+    JOB_RETENTION_MAX_AGE: int = 7 * 24 * 3600
+    JOB_RETENTION_MAX_COUNT: int = 1000
+    JOB_RETENTION_INTERVAL: int = 300
+    # Latido de cada proceso en el backend de estado: los jobs pendientes o en curso de un
+    # proceso sin latido por STATE_OWNER_TIMEOUT segundos (caído o reiniciado) se cierran
+    STATE_HEARTBEAT_INTERVAL: int = 30
+    STATE_OWNER_TIMEOUT: int = 120
+
+    # Artículos de los jobs: en memoria hasta RESULTS_MEMORY_BUDGET bytes por proceso; lo que
+    # no cabe se baja a segmentos NDJSON comprimidos (gzip) en RESULTS_DIR
+    RESULTS_DIR: str = str(Path("data") / "results")
+    RESULTS_MEMORY_BUDGET: int = 32 * 1024 * 1024
+    RESULTS_SEGMENT_SIZE: int = 200
+    RESULTS_EXPORT_CHUNK: int = 500
+
+    # Post-proceso (exportación a Google Sheets y notificación) en workers propios,
+    # con reintentos y backoff exponencial (segundos). Los workers pasan casi todo el tiempo
+    # esperando el lote compartido de Sheets, por eso son más que las llamadas que permite la cuota
+    EXPORT_WORKERS: int = 10
+    EXPORT_MAX_ATTEMPTS: int = 3
+    EXPORT_RETRY_BACKOFF: float = 5.0
+
+    # Entrega de webhooks: workers concurrentes, timeout por defecto y por host (segundos),
+    # reintentos con backoff exponencial y archivo de dead letters (JSON por línea).
+    # WEBHOOK_BATCH_WINDOW > 0 agrupa las notificaciones a un mismo webhook en
+    # {"notifications": [...]} (el receptor debe aceptar ese formato)
+    WEBHOOK_CONCURRENCY: int = 10
+    WEBHOOK_PER_HOST_CONCURRENCY: int = 4
+    WEBHOOK_TIMEOUT: float = 10.0
+    WEBHOOK_TIMEOUTS: Dict[str, float] = {}
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_RETRY_BACKOFF: float = 2.0
+    WEBHOOK_BATCH_WINDOW: float = 0
+    WEBHOOK_BATCH_MAX: int = 50
+    WEBHOOK_DEAD_LETTER_PATH: str = str(Path("data") / "webhook_dead_letters.jsonl")
+
+    # API de Google (Sheets y Drive) usada por la exportación; GOOGLE_TOKEN_URL vacío usa
+    # el token_uri de las credenciales. Timeout por llamada en segundos
+    GOOGLE_SHEETS_API_URL: str = "https://sheets.googleapis.com/v4"
+    GOOGLE_DRIVE_API_URL: str = "https://www.googleapis.com/drive/v3"
+    GOOGLE_TOKEN_URL: str = ""
+    GOOGLE_API_TIMEOUT: float = 30.0
+    # Exportaciones agrupadas: los jobs que terminan dentro de la ventana (segundos) comparten
+    # batchUpdate de hasta SHEETS_BATCH_MAX_ROWS filas. Token bucket ajustado a la cuota de
+    # la API (llamadas por minuto, 0 desactiva) con ráfagas de hasta SHEETS_QUOTA_BURST
+    SHEETS_BATCH_WINDOW: float = 1.0
+    SHEETS_BATCH_MAX_ROWS: int = 5000
+    SHEETS_QUOTA_PER_MINUTE: int = 60
+    SHEETS_QUOTA_BURST: int = 10
+
+    # Pool de navegadores compartido entre jobs
+    BROWSER_POOL_SIZE: int = 3
+    BROWSER_POOL_WARM: int = 1
+    BROWSER_MAX_PAGES: int = 50
+    BROWSER_LEASE_TIMEOUT: int = 300
+
     # Configuración de logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(levelname)s - %(message)s"
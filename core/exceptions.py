@@ -3,10 +3,17 @@ from typing import Any, Dict, Union
 
 class ScraperException(Exception):
     """Excepción base para errores del scraper"""
-    def __init__(self, message: str, status_code: int = 500, details: Dict[str, Any] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 500,
+        details: Dict[str, Any] = None,
+        headers: Dict[str, str] = None
+    ):
         self.message = message
         self.status_code = status_code
         self.details = details or {}
+        self.headers = headers
         super().__init__(self.message)
 
 class JobNotFoundException(ScraperException):
@@ -51,6 +58,34 @@ class ScraperExecutionException(ScraperException):
             details={"scraper_type": scraper_type}
         )
 
+class QueueFullException(ScraperException):
+    """Excepción para cuando la cola de trabajos no admite más jobs"""
+    def __init__(self, retry_after: int, message: str = "La cola de trabajos está llena"):
+        super().__init__(
+            message=message,
+            status_code=429,
+            details={"retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class JobNotResumableException(ScraperException):
+    """Excepción para reanudar un trabajo que no terminó con resultados parciales"""
+    def __init__(self, job_id: str, status: str):
+        super().__init__(
+            message=f"El trabajo {job_id} no se puede reanudar en estado '{status}'",
+            status_code=409,
+            details={"job_id": job_id, "status": status}
+        )
+
+class JobNotCancellableException(ScraperException):
+    """Excepción para cancelar un trabajo que ya terminó o que este proceso no ejecuta"""
+    def __init__(self, job_id: str, status: str):
+        super().__init__(
+            message=f"El trabajo {job_id} no se puede cancelar en estado '{status}'",
+            status_code=409,
+            details={"job_id": job_id, "status": status}
+        )
+
 def handle_scraper_exception(e: Exception) -> HTTPException:
     """
     Convierte excepciones del scraper en HTTPException
@@ -66,7 +101,8 @@ def handle_scraper_exception(e: Exception) -> HTTPException:
             detail={
                 "error": e.message,
                 "details": e.details
-            }
+            },
+            headers=e.headers
         )
     
     # Manejar excepciones no controladas
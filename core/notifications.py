@@ -1,33 +1,252 @@
-import requests
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+from pathlib import Path
+from urllib.parse import urlsplit
+import asyncio
+import json
+import time
+from core.config import settings
 from core.logging import logger
 
+if TYPE_CHECKING:
+    import aiohttp
+
+# Respuestas 4xx que sí se reintentan; el resto de 4xx va directo a dead letters
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+class WebhookDelivery:
+    """Una entrega pendiente a un webhook: una notificación o un lote para el mismo destino"""
+
+    def __init__(self, url: str, payloads: List[Dict[str, Any]], job_ids: List[str]):
+        self.url = url
+        self.payloads = payloads
+        self.job_ids = job_ids
+        self.attempts = 0
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        # Un lote de un solo elemento mantiene el formato de siempre
+        if len(self.payloads) == 1:
+            return self.payloads[0]
+        return {"notifications": self.payloads}
+
+
+class WebhookDispatcher:
+    """
+    Entrega asíncrona de notificaciones a webhooks.
+
+    Las notificaciones se programan sin bloquear y se envían con una sesión aiohttp
+    compartida: como máximo `concurrency` entregas a la vez y `per_host` por destino
+    (un receptor lento no acapara la capacidad de los demás), con timeout por destino
+    y reintentos con backoff exponencial. Las entregas que agotan los reintentos
+    se registran en el archivo de dead letters (una línea JSON por entrega). Con
+    `batch_window` > 0 las notificaciones a un mismo webhook dentro de la ventana
+    se envían juntas como `{"notifications": [...]}`.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = settings.WEBHOOK_CONCURRENCY,
+        per_host: int = settings.WEBHOOK_PER_HOST_CONCURRENCY,
+        max_attempts: int = settings.WEBHOOK_MAX_ATTEMPTS,
+        retry_backoff: float = settings.WEBHOOK_RETRY_BACKOFF,
+        batch_window: float = settings.WEBHOOK_BATCH_WINDOW,
+        batch_max: int = settings.WEBHOOK_BATCH_MAX,
+        dead_letter_path: str = settings.WEBHOOK_DEAD_LETTER_PATH
+    ):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.batch_window = batch_window
+        self.batch_max = max(1, batch_max)
+        self.dead_letter_path = Path(dead_letter_path)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._batches: Dict[str, WebhookDelivery] = {}
+        self._batch_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._retries: Dict[WebhookDelivery, asyncio.TimerHandle] = {}
+        self._in_progress = 0
+        self.stats_counters = {"delivered": 0, "retries": 0, "dead_letters": 0}
+
+    def _ensure_started(self) -> None:
+        """Crea la sesión y los límites en el loop actual la primera vez que se usa"""
+        if self._session is not None:
+            return
+        # aiohttp se importa al primer envío para no alargar el arranque de la API
+        import aiohttp
+
+        self._session = aiohttp.ClientSession(headers={'Content-Type': 'application/json'})
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    def enqueue(self, url: str, payload: Dict[str, Any], job_id: str) -> None:
+        """Programa la entrega de una notificación; retorna de inmediato"""
+        # Los modelos de pydantic entregan la URL como HttpUrl
+        url = str(url)
+        self._ensure_started()
+        if self.batch_window <= 0:
+            self._schedule(WebhookDelivery(url, [payload], [job_id]))
+            return
+
+        batch = self._batches.get(url)
+        if batch is None:
+            batch = self._batches[url] = WebhookDelivery(url, [], [])
+            self._batch_timers[url] = asyncio.get_running_loop().call_later(self.batch_window, self._flush, url)
+        batch.payloads.append(payload)
+        batch.job_ids.append(job_id)
+        if len(batch.payloads) >= self.batch_max:
+            self._flush(url)
+
+    def _flush(self, url: str) -> None:
+        timer = self._batch_timers.pop(url, None)
+        if timer:
+            timer.cancel()
+        batch = self._batches.pop(url, None)
+        if batch:
+            self._schedule(batch)
+
+    def _timeout_for(self, url: str) -> "aiohttp.ClientTimeout":
+        import aiohttp
+
+        host = urlsplit(url).netloc
+        return aiohttp.ClientTimeout(total=settings.WEBHOOK_TIMEOUTS.get(host, settings.WEBHOOK_TIMEOUT))
+
+    def _schedule(self, delivery: WebhookDelivery) -> None:
+        task = asyncio.create_task(self._run(delivery))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, delivery: WebhookDelivery) -> None:
+        try:
+            host = urlsplit(delivery.url).netloc
+            host_slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+            # Primero el cupo del destino: las entregas en espera no ocupan cupos globales
+            async with host_slots, self._slots:
+                self._in_progress += 1
+                try:
+                    await self._deliver(delivery)
+                finally:
+                    self._in_progress -= 1
+        except asyncio.CancelledError:
+            await self._dead_letter(delivery, "Servicio detenido antes de entregar la notificación")
+            raise
+        except Exception as e:
+            logger.error(f"Error inesperado entregando webhook a {delivery.url}: {e}")
+
+    async def _deliver(self, delivery: WebhookDelivery) -> None:
+        import aiohttp
+
+        delivery.attempts += 1
+        retryable = True
+        try:
+            async with self._session.post(
+                delivery.url,
+                json=delivery.body,
+                timeout=self._timeout_for(delivery.url)
+            ) as response:
+                if response.status < 400:
+                    self.stats_counters["delivered"] += len(delivery.payloads)
+                    logger.info(f"Notificación enviada para jobs {', '.join(delivery.job_ids)} al webhook {delivery.url}")
+                    return
+                retryable = response.status >= 500 or response.status in RETRYABLE_STATUSES
+                error = f"HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+
+        if not retryable or delivery.attempts >= self.max_attempts:
+            await self._dead_letter(delivery, error)
+            return
+
+        delay = self.retry_backoff * 2 ** (delivery.attempts - 1)
+        logger.warning(f"Webhook {delivery.url} falló ({error}); reintento {delivery.attempts} en {delay:.1f}s")
+        self.stats_counters["retries"] += 1
+        self._retries[delivery] = asyncio.get_running_loop().call_later(delay, self._requeue, delivery)
+
+    def _requeue(self, delivery: WebhookDelivery) -> None:
+        self._retries.pop(delivery, None)
+        self._schedule(delivery)
+
+    async def _dead_letter(self, delivery: WebhookDelivery, error: str) -> None:
+        logger.error(f"Notificación para jobs {', '.join(delivery.job_ids)} descartada tras {delivery.attempts} intentos: {error}")
+        self.stats_counters["dead_letters"] += len(delivery.payloads)
+        record = {
+            "url": delivery.url,
+            "job_ids": delivery.job_ids,
+            "body": delivery.body,
+            "attempts": delivery.attempts,
+            "error": error,
+            "failed_at": time.time()
+        }
+        try:
+            await asyncio.to_thread(self._append_dead_letter, record)
+        except OSError as e:
+            logger.error(f"No se pudo escribir el dead letter del webhook: {e}")
+
+    def _append_dead_letter(self, record: Dict[str, Any]) -> None:
+        self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def stop(self, timeout: float = settings.QUEUE_DRAIN_TIMEOUT) -> None:
+        """Envía los lotes abiertos, espera las entregas pendientes hasta `timeout` y cierra la sesión"""
+        if self._session is None:
+            return
+        for url in list(self._batches):
+            self._flush(url)
+        deadline = time.time() + timeout
+        while (self._retries or self._tasks) and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
+        # Lo que no se alcanzó a entregar queda en dead letters
+        for delivery, timer in list(self._retries.items()):
+            timer.cancel()
+            await self._dead_letter(delivery, "Servicio detenido antes de entregar la notificación")
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        await self._session.close()
+        self._session = None
+        self._host_slots = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._tasks) - self._in_progress,
+            "in_progress": self._in_progress,
+            "waiting_retry": len(self._retries),
+            "open_batches": len(self._batches),
+            **self.stats_counters
+        }
+
+
+# Instancia global compartida por todo el proceso
+webhook_dispatcher = WebhookDispatcher()
+
+
 def notify_job_completion(job_id: str, webhook_url: str, sheet_url: str, email: str) -> bool:
     """
     Notifica la finalización de un job vía webhook
-    
+
+    La entrega es asíncrona (ver `WebhookDispatcher`): la función solo la encola
+    y no bloquea el event loop aunque el receptor sea lento.
+
     Args:
         job_id (str): ID del trabajo completado
         webhook_url (str): URL del webhook para notificar
         sheet_url (str): URL de la hoja de Google Sheets creada
         email (str): Email del usuario que solicitó el scraping
-    
+
     Returns:
-        bool: True si la notificación fue exitosa
+        bool: True si la notificación quedó encolada
     """
+    if not webhook_url:
+        return False
     payload = {
         "email": email,
         "link": sheet_url
     }
-    
-    try:
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            headers={'Content-Type': 'application/json'}
-        )
-        response.raise_for_status()
-        logger.info(f"Notificación enviada para job {job_id} al webhook {webhook_url} (email: {email})")
-        return True
-    except Exception as e:
-        logger.error(f"Error al enviar notificación para job {job_id}: {e}")
-        return False 
\ No newline at end of file
+    webhook_dispatcher.enqueue(str(webhook_url), payload, job_id)
+    return True
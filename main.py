@@ -1,11 +1,41 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from routers import scraping
+from core.config import settings
+from core.notifications import webhook_dispatcher
+from services.queue_service import queue_service
+from services.sheets_service import sheets_service
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia los recursos compartidos al arrancar y los libera al apagar"""
+    loop = asyncio.get_running_loop()
+    # En modo broker los navegadores viven en los workers externos (worker.py)
+    runs_scrapers = settings.EXECUTION_MODE != "broker"
+    warmup = None
+    if runs_scrapers:
+        # selenium se importa solo si este proceso ejecuta scrapers
+        from scrappers.browser_pool import browser_pool
+        # Resolver chromedriver y precalentar navegadores en segundo plano: la API atiende
+        # de inmediato y el primer job que llegue antes resuelve el driver por su cuenta
+        warmup = loop.run_in_executor(None, browser_pool.start)
+    await queue_service.start()
+    yield
+    # Drenar la cola antes de liberar los navegadores
+    await queue_service.stop()
+    # Entregar las notificaciones pendientes antes de cerrar la sesión HTTP
+    await webhook_dispatcher.stop()
+    await sheets_service.close()
+    if runs_scrapers:
+        await asyncio.gather(warmup, return_exceptions=True)
+        await loop.run_in_executor(None, browser_pool.shutdown)
+
 app = FastAPI(
     title="Xepelin Blog Scraper API",
     description="""
@@ -32,7 +62,8 @@ app = FastAPI(
 | optimized | Scraping optimizado con concurrencia |
 | ultra | Scraping optimizado con funciones asíncronas |
     """,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -1,6 +1,7 @@
+import asyncio
 from datetime import datetime
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from models.requests import ScraperModel
 from pydantic import EmailStr
 
@@ -11,41 +12,152 @@ class ScrapingJob:
         category: str, 
         model: ScraperModel, 
         webhook: Optional[str] = None,
-        email: str = None
+        email: str = None,
+        priority: int = 0,
+        parent_id: Optional[str] = None
     ):
         self.job_id = job_id
         self.category = category
         self.model = model
-        self.webhook = webhook
+        # El request lo trae como HttpUrl; el registro del job tiene que ser JSON
+        self.webhook = str(webhook) if webhook else None
         self.email = email
+        self.priority = priority
         self.status = "pending"
-        self.results: Optional[List[Dict[str, Any]]] = None
+        # Artículos del job (JobResults del almacén de resultados al terminar)
+        self.results: Optional[Iterable[Dict[str, Any]]] = None
         self.start_time: Optional[float] = None
         self.end_time: Optional[float] = None
         self.queued_at = time.time()
         self.partial_results: List[Dict[str, Any]] = []
         self.error: Optional[str] = None
+        self.sheet_url: Optional[str] = None
+        # Coalescencia: job líder cuya ejecución se comparte y jobs que la siguen
+        self.coalesced_with: Optional[str] = None
+        self.followers: List["ScrapingJob"] = []
+        self.finished = asyncio.Event()
+        # División de "todas las categorias": job padre y jobs hijos por categoría
+        self.parent_id = parent_id
+        self.children: List["ScrapingJob"] = []
+        # Reanudación: job cuyos resultados y checkpoint continúa esta ejecución
+        self.resume_from: Optional[str] = None
+        # Post-proceso (exportación y notificación), con estado propio separado del scraping
+        self.export_status: Optional[str] = None
+        self.export_error: Optional[str] = None
+        self.export_attempts = 0
+        self.exported = asyncio.Event()
 
-    def to_dict(self) -> Dict[str, Any]:
-        response = {
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "ScrapingJob":
+        """Reconstruye un job terminado desde su registro (sin resultados ni hijos)"""
+        job = cls(
+            job_id=record["job_id"],
+            category=record["category"],
+            model=ScraperModel(record["model"]),
+            webhook=record.get("webhook"),
+            email=record.get("email"),
+            priority=record.get("priority") or 0,
+            parent_id=record.get("parent_id")
+        )
+        job.status = record["status"]
+        job.error = record.get("error")
+        job.coalesced_with = record.get("coalesced_with")
+        job.queued_at = record["queued_at"]
+        job.start_time = record.get("start_time")
+        job.end_time = record.get("end_time")
+        job.sheet_url = record.get("sheet_url")
+        job.export_status = record.get("export_status")
+        job.export_error = record.get("export_error")
+        if job.status in ("completed", "partial", "error", "cancelled"):
+            job.finished.set()
+        if job.export_status in ("completed", "error", "skipped"):
+            job.exported.set()
+        return job
+
+    def to_record(self) -> Dict[str, Any]:
+        """Estado serializable del job, compartido entre procesos por el backend de estado"""
+        record = {
             "job_id": self.job_id,
             "status": self.status,
             "category": self.category,
-            "model": self.model,
-            "email": self.email
+            "model": getattr(self.model, "value", self.model),
+            "webhook": self.webhook,
+            "email": self.email,
+            "priority": self.priority,
+            "error": self.error,
+            "coalesced_with": self.coalesced_with,
+            "parent_id": self.parent_id,
+            "queued_at": self.queued_at,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "articles_count": len(self.results) if self.results else 0,
+            "sheet_url": self.sheet_url,
+            "export_status": self.export_status,
+            "export_error": self.export_error,
+            # Job cuyos segmentos guardan los artículos (el líder en los jobs coalescidos)
+            "results_ref": getattr(self.results, "job_id", None)
         }
+        if self.children:
+            record["children"] = [
+                {
+                    "job_id": child.job_id,
+                    "category": child.category,
+                    "status": child.status,
+                    "articles_count": len(child.results) if child.results else 0,
+                    "finished": child.finished.is_set()
+                }
+                for child in self.children
+            ]
+        return record
+
+
+def job_response(record: Dict[str, Any], articles: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Construye la respuesta de estado de un job a partir de su registro
+
+    Args:
+        record: Registro del job (`ScrapingJob.to_record`)
+        articles: Página de artículos a incluir si el job terminó con resultados
+    """
+    response = {
+        "job_id": record["job_id"],
+        "status": record["status"],
+        "category": record["category"],
+        "model": record["model"],
+        "email": record.get("email")
+    }
+
+    if record.get("start_time"):
+        response["duration"] = round(
+            (record.get("end_time") or time.time()) - record["start_time"],
+            2
+        )
+
+    if record.get("error"):
+        response["error"] = record["error"]
+
+    if record.get("coalesced_with"):
+        response["coalesced_with"] = record["coalesced_with"]
+
+    if record.get("parent_id"):
+        response["parent_id"] = record["parent_id"]
 
-        if self.start_time:
-            response["duration"] = round(
-                (self.end_time or time.time()) - self.start_time,
-                2
-            )
+    children = record.get("children")
+    if children:
+        finished = sum(1 for child in children if child["finished"])
+        response["progress"] = f"{finished}/{len(children)}"
+        response["children"] = [
+            {key: value for key, value in child.items() if key != "finished"}
+            for child in children
+        ]
 
-        if self.error:
-            response["error"] = self.error
+    if record.get("export_status"):
+        response["export_status"] = record["export_status"]
+        response["export_error"] = record.get("export_error")
+        response["sheet_url"] = record.get("sheet_url")
 
-        if self.status in ["completed", "partial"]:
-            response["articles_count"] = len(self.results) if self.results else 0
-            response["articles"] = self.results
+    if record["status"] in ["completed", "partial"]:
+        response["articles_count"] = record.get("articles_count", 0)
+        response["articles"] = articles
 
-        return response
+    return response
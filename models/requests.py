@@ -13,6 +13,8 @@ class ScrapingRequest(BaseModel):
     webhook: HttpUrl
     model: Optional[ScraperModel] = ScraperModel.ULTRA
     email: Optional[EmailStr] = "jpramirez5@uc.cl"
+    # Mayor prioridad se despacha primero; a igual prioridad, orden de llegada
+    priority: Optional[int] = 0
 
     class Config:
         json_schema_extra = {
@@ -15,5 +15,15 @@ class ArticleResponse(BaseModel):
     model: str
     duration: Optional[float] = None
     error: Optional[str] = None
+    coalesced_with: Optional[str] = None
+    predicted_start: Optional[str] = None
+    eta: Optional[str] = None
+    parent_id: Optional[str] = None
+    progress: Optional[str] = None
+    children: Optional[List[Dict[str, Any]]] = None
+    export_status: Optional[str] = None
+    export_error: Optional[str] = None
+    sheet_url: Optional[str] = None
     articles_count: Optional[int] = None
     articles: Optional[List[Dict[str, Any]]] = None
+    next_offset: Optional[int] = None
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import Dict
 import uuid
 from models.requests import ScrapingRequest, ScraperModel
@@ -59,8 +59,7 @@ def load_endpoint_docs(filename: str) -> Dict:
     #responses=scraping_docs["responses"]
 )
 async def scrape_blog(
-    request: ScrapingRequest,
-    background_tasks: BackgroundTasks
+    request: ScrapingRequest
 ) -> Dict:
     """Inicia un trabajo de scraping de manera asíncrona"""
     try:
@@ -91,7 +90,8 @@ async def scrape_blog(
                 category=request.category, 
                 model=request.model,
                 webhook=request.webhook,
-                email=request.email
+                email=request.email,
+                priority=request.priority or 0
             )
         except Exception as e:
             logger.error(f"Error al crear el job: {str(e)}")
@@ -103,9 +103,8 @@ async def scrape_blog(
                 }
             )
         
-        # Agregar job a la cola
-        queue_service.add_job(job)
-        background_tasks.add_task(queue_service.process_job, job)
+        # Agregar job a la cola; un worker del scheduler lo procesará
+        await queue_service.add_job(job)
         
         logger.info(f"Job {job_id} creado exitosamente para categoría {request.category}")
         return {
@@ -134,6 +133,52 @@ async def scrape_blog(
         logger.error(f"Error inesperado: {str(e)}")
         raise handle_scraper_exception(e)
 
+@router.post(
+    "/{job_id}/resume",
+    response_model=ScrapingResponse
+)
+async def resume_job(job_id: str) -> Dict:
+    """Reanuda un trabajo parcial descargando solo los artículos que faltan"""
+    try:
+        job = await queue_service.resume_job(job_id)
+    except Exception as e:
+        logger.error(f"No se pudo reanudar el job {job_id}: {str(e)}")
+        raise handle_scraper_exception(e)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Trabajo no encontrado: {job_id}"
+        )
+    return {
+        "job_id": job_id,
+        "status": "accepted",
+        "message": f"Reanudación en cola. Use GET /scraping/status/{job_id} para verificar el estado"
+    }
+
+@router.delete(
+    "/{job_id}",
+    response_model=ScrapingResponse
+)
+async def cancel_job(job_id: str) -> Dict:
+    """Cancela un trabajo pendiente o en curso y libera su worker"""
+    try:
+        job = await queue_service.cancel_job(job_id)
+    except Exception as e:
+        logger.error(f"No se pudo cancelar el job {job_id}: {str(e)}")
+        raise handle_scraper_exception(e)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Trabajo no encontrado: {job_id}"
+        )
+    return {
+        "job_id": job_id,
+        "status": "cancelled",
+        "message": "Trabajo cancelado"
+    }
+
 @router.get(
     "/queue/status",
     #summary=queue_docs["summary"],
@@ -142,7 +187,7 @@ async def scrape_blog(
 )
 async def get_queue_status() -> Dict:
     """Obtiene el estado actual de la cola de trabajos"""
-    return queue_service.get_queue_status()
+    return await queue_service.get_queue_status()
 
 @router.get(
     "/models",
@@ -175,12 +220,16 @@ async def get_available_categories() -> Dict:
     #description=status_docs["description"],
     #responses=status_docs["responses"]
 )
-async def get_job_status(job_id: str) -> Dict:
-    """Obtiene el estado y resultados de un trabajo de scraping"""
-    job = queue_service.get_job_status(job_id)
-    if not job:
+async def get_job_status(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Primer artículo a retornar"),
+    limit: int = Query(settings.RESULTS_EXPORT_CHUNK, ge=1, description="Cantidad máxima de artículos a retornar")
+) -> Dict:
+    """Obtiene el estado y resultados de un trabajo de scraping (paginados con offset/limit)"""
+    response = await queue_service.get_job_response(job_id, offset, limit)
+    if not response:
         raise HTTPException(
             status_code=404,
             detail=f"Trabajo no encontrado: {job_id}"
         )
-    return job.to_dict()
+    return response
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+from cachetools import TTLCache
+
+
+def canonical_url(url: str) -> str:
+    """Normaliza la URL de un artículo para usarla como clave de cache"""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, '', ''))
+
+
+class _EvictionCountingCache(TTLCache):
+    """TTLCache que cuenta las expulsiones LRU por capacidad"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.evictions += 1
+        return key, value
+
+
+class ArticleCache:
+    """
+    Cache de artículos compartida por todos los jobs del proceso.
+
+    Acotada por tamaño (expulsión LRU) y por antigüedad (TTL), con clave en la
+    URL canónica del artículo. Es segura para threads y corrutinas.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.ARTICLE_CACHE_MAXSIZE,
+        ttl: int = settings.ARTICLE_CACHE_TTL
+    ):
+        self._cache = _EvictionCountingCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Retorna una copia del artículo cacheado o None si no existe o expiró"""
+        with self._lock:
+            article = self._cache.get(canonical_url(url))
+            if article is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(article)
+
+    def set(self, url: str, article: Dict[str, Any]) -> None:
+        """Guarda el artículo en cache"""
+        if not article:
+            return
+        with self._lock:
+            self._cache[canonical_url(url)] = dict(article)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna los contadores de uso de la cache"""
+        with self._lock:
+            self._cache.expire()
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self._cache.evictions
+            }
+
+
+# Instancia global compartida entre jobs y modelos
+article_cache = ArticleCache()
@@ -0,0 +1,236 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+from aiohttp import ClientTimeout
+from scrappers.article_store import FetchedResource, build_resource, conditional_headers
+
+logger = logging.getLogger(__name__)
+
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>',
+    re.DOTALL
+)
+
+TITLE_KEYS = ('title', 'titulo', 'name')
+CATEGORY_KEYS = ('category', 'categoria', 'categories', 'tag')
+AUTHOR_KEYS = ('author', 'autor', 'authors', 'writer')
+AUTHOR_NAME_KEYS = ('name', 'fullName', 'full_name', 'nombre', 'title')
+AUTHOR_POSITION_KEYS = ('position', 'role', 'jobTitle', 'job_title', 'charge', 'cargo', 'description')
+READING_TIME_KEYS = ('readingTime', 'reading_time', 'timeToRead', 'readTime', 'tiempoLectura')
+
+
+def extract_next_data(html: str) -> Optional[Dict[str, Any]]:
+    """Extrae el JSON embebido en `__NEXT_DATA__` sin construir un árbol HTML"""
+    match = NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def _first(node: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        value = node.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _as_text(value: Any, keys: Tuple[str, ...] = AUTHOR_NAME_KEYS) -> Optional[str]:
+    """Convierte un valor del JSON (texto, objeto o lista) a texto plano"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = _first(value, keys)
+    if isinstance(value, (str, int, float)):
+        return str(value).strip()
+    return None
+
+
+def _find_article_node(value: Any, depth: int = 0) -> Optional[Dict[str, Any]]:
+    """Busca en pageProps el objeto que describe al artículo"""
+    if depth > 6:
+        return None
+    if isinstance(value, dict):
+        if isinstance(_first(value, TITLE_KEYS), str) and _first(value, AUTHOR_KEYS):
+            return value
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+
+    for child in children:
+        node = _find_article_node(child, depth + 1)
+        if node:
+            return node
+    return None
+
+
+def map_article(page_props: Dict[str, Any], url: str) -> Optional[Dict[str, str]]:
+    """
+    Mapea los datos de la página al mismo diccionario que produce el extractor HTML
+
+    Returns:
+        Diccionario del artículo o None si faltan campos obligatorios
+    """
+    node = _find_article_node(page_props)
+    if not node:
+        return None
+
+    author = _first(node, AUTHOR_KEYS)
+    if isinstance(author, list):
+        author = author[0] if author else None
+
+    reading_time = _first(node, READING_TIME_KEYS)
+    if isinstance(reading_time, (int, float)):
+        reading_time = f"{int(reading_time)} min de lectura"
+
+    article = {
+        'Titular': _as_text(_first(node, TITLE_KEYS)),
+        'Categoría': _as_text(_first(node, CATEGORY_KEYS)),
+        'URL': url,
+        'Autor': _as_text(author),
+        'Cargo': _as_text(author, AUTHOR_POSITION_KEYS) if isinstance(author, dict) else '',
+        'Tiempo de Lectura': _as_text(reading_time)
+    }
+    if not all(article[key] for key in ('Titular', 'Categoría', 'Autor', 'Tiempo de Lectura')):
+        return None
+    article['Cargo'] = article['Cargo'] or ''
+    return article
+
+
+class ArticleDataFetcher:
+    """
+    Obtiene los artículos desde las rutas de datos de Next.js (`/_next/data/<buildId>/...json`).
+
+    El buildId se aprende del `__NEXT_DATA__` de la primera página descargada y se
+    descarta cuando la ruta de datos responde 404 (nuevo deploy del sitio). Un
+    buildId rechazado no se vuelve a aprender: si el sitio no sirve las rutas de
+    datos, no se paga un 404 por artículo; se reintenta cuando cambia el buildId.
+    """
+
+    def __init__(self):
+        self.build_id: Optional[str] = None
+        # buildId cuya ruta de datos respondió 404
+        self.rejected_build_id: Optional[str] = None
+        # Se desactiva si los datos embebidos dejan de mapearse (cambio de esquema)
+        self.data_routes_usable = True
+
+    def _data_url(self, url: str) -> str:
+        path = urlparse(url).path.rstrip('/')
+        return f"{settings.BLOG_BASE_URL}/_next/data/{self.build_id}{path}.json"
+
+    def article_from_body(self, url: str, source_url: str, body: bytes, html: Optional[str]) -> Optional[Dict[str, str]]:
+        """Mapea el artículo desde una respuesta de ruta de datos o de página HTML"""
+        if source_url != url:
+            data = json.loads(body)
+            return map_article(data.get('pageProps', {}), url)
+
+        next_data = extract_next_data(html or '')
+        if not next_data:
+            return None
+
+        build_id = next_data.get('buildId')
+        if build_id and build_id != self.rejected_build_id:
+            self.build_id = build_id
+        page_props = next_data.get('props', {}).get('pageProps', {})
+        article = map_article(page_props, url)
+        self.data_routes_usable = article is not None
+        return article
+
+    async def _get(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        source_url: str,
+        timeout: Optional[ClientTimeout],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Optional[Dict[str, str]], Optional[str], Optional[FetchedResource]]:
+        """Descarga un recurso y retorna (status, artículo, HTML, metadatos del recurso)"""
+        async with session.get(source_url, timeout=timeout, headers=headers) as response:
+            if response.status != 200:
+                return response.status, None, None, None
+            body = await response.read()
+            html = await response.text() if source_url == url else None
+            resource = build_resource(source_url, response.headers, body)
+        return 200, self.article_from_body(url, source_url, body, html), html, resource
+
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        timeout: Optional[ClientTimeout] = None
+    ) -> Tuple[Optional[Dict[str, str]], Optional[str], Optional[FetchedResource]]:
+        """
+        Obtiene el artículo desde los datos embebidos de la página
+
+        Returns:
+            tuple: (artículo mapeado o None, HTML descargado para el extractor de respaldo,
+                    metadatos del recurso descargado)
+        """
+        if self.build_id and self.data_routes_usable:
+            try:
+                status, article, _, resource = await self._get(session, url, self._data_url(url), timeout)
+                if status == 404:
+                    # Nuevo deploy del sitio: se aprende el buildId nuevo desde el HTML
+                    self.rejected_build_id = self.build_id
+                    self.build_id = None
+                if article:
+                    return article, None, resource
+            except Exception as e:
+                logger.warning(f"Error en ruta de datos para {url}: {e}")
+
+        _, article, html, resource = await self._get(session, url, url, timeout)
+        return article, html, resource
+
+    async def revalidate(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        stored: Dict[str, Any],
+        timeout: Optional[ClientTimeout] = None
+    ) -> Tuple[bool, Optional[Dict[str, str]], Optional[str], Optional[FetchedResource]]:
+        """
+        Revalida un artículo guardado con un GET condicional sobre su recurso de origen
+
+        Returns:
+            tuple: (sin cambios, artículo, HTML descargado, metadatos del recurso)
+        """
+        source_url = stored['source_url']
+        headers = conditional_headers(stored, source_url)
+        async with session.get(source_url, timeout=timeout, headers=headers) as response:
+            if response.status == 304:
+                resource = FetchedResource(
+                    source_url,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    stored['content_hash']
+                )
+                return True, stored['article'], None, resource
+            if response.status != 200:
+                return False, None, None, None
+            body = await response.read()
+            html = await response.text() if source_url == url else None
+            resource = build_resource(source_url, response.headers, body)
+
+        if resource.content_hash == stored['content_hash']:
+            return True, stored['article'], None, resource
+        return False, self.article_from_body(url, source_url, body, html), html, resource
+
+
+# Instancia global: el buildId se comparte entre jobs
+article_data_fetcher = ArticleDataFetcher()
@@ -0,0 +1,165 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+from scrappers.article_cache import canonical_url
+
+logger = logging.getLogger(__name__)
+
+
+class FetchedResource(NamedTuple):
+    """Metadatos de la respuesta HTTP de la que se extrajo un artículo"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+def content_hash(body: bytes) -> str:
+    """Hash del contenido descargado para detectar cambios sin validadores HTTP"""
+    return hashlib.sha256(body).hexdigest()
+
+
+def build_resource(url: str, headers: Mapping[str, str], body: bytes) -> FetchedResource:
+    """Construye los metadatos del recurso a partir de la respuesta HTTP"""
+    return FetchedResource(
+        url=url,
+        etag=headers.get('ETag'),
+        last_modified=headers.get('Last-Modified'),
+        content_hash=content_hash(body)
+    )
+
+
+def conditional_headers(record: Optional[Dict[str, Any]], source_url: str) -> Dict[str, str]:
+    """
+    Headers If-None-Match/If-Modified-Since para revalidar un artículo guardado
+
+    Los validadores solo aplican si el registro se obtuvo desde el mismo recurso.
+    """
+    headers = {}
+    if record and record.get("source_url") == source_url:
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+    return headers
+
+
+class ArticleStore:
+    """
+    Almacén persistente de artículos en SQLite.
+
+    Guarda cada artículo con los validadores HTTP (ETag/Last-Modified) y el hash
+    del recurso del que se extrajo. Usa modo WAL para que varios procesos del
+    mismo host compartan el archivo.
+    """
+
+    def __init__(self, path: str = settings.ARTICLE_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna la conexión del thread actual, creándola si no existe"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    source_url TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    checked_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Obtiene el registro guardado de un artículo"""
+        try:
+            row = self._connect().execute(
+                "SELECT * FROM articles WHERE url = ?", (canonical_url(url),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Error leyendo almacén de artículos: {e}")
+            return None
+        if not row:
+            return None
+        record = dict(row)
+        record["article"] = json.loads(record.pop("data"))
+        return record
+
+    def save(self, url: str, article: Dict[str, Any], resource: FetchedResource) -> None:
+        """Guarda o reemplaza un artículo junto con sus validadores"""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO articles
+                    (url, data, source_url, etag, last_modified, content_hash, fetched_at, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    canonical_url(url),
+                    json.dumps(article, ensure_ascii=False),
+                    resource.url,
+                    resource.etag,
+                    resource.last_modified,
+                    resource.content_hash,
+                    now,
+                    now
+                )
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Error guardando artículo {url}: {e}")
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Marca un artículo como revalidado (respuesta 304 o contenido sin cambios)"""
+        try:
+            conn = self._connect()
+            conn.execute(
+                """
+                UPDATE articles
+                SET checked_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE url = ?
+                """,
+                (time.time(), etag, last_modified, canonical_url(url))
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Error actualizando artículo {url}: {e}")
+
+
+# Instancia global compartida por los tres scrapers
+article_store = ArticleStore()
@@ -0,0 +1,225 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserLeaseTimeout(Exception):
+    """No se obtuvo un navegador del pool dentro del tiempo límite"""
+
+
+class PooledBrowser:
+    """Navegador del pool junto con su contador de páginas servidas"""
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    Pool acotado de navegadores Chrome headless compartido entre jobs y categorías.
+
+    Los navegadores se crean bajo demanda (o al iniciar la app con `start`) y se
+    reutilizan entre leases. Cada navegador se recicla después de `max_pages`
+    páginas y se verifica su salud antes de entregarlo.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.BROWSER_POOL_SIZE,
+        warm: int = settings.BROWSER_POOL_WARM,
+        max_pages: int = settings.BROWSER_MAX_PAGES,
+        lease_timeout: float = settings.BROWSER_LEASE_TIMEOUT
+    ):
+        self.size = size
+        self.warm = min(warm, size)
+        self.max_pages = max_pages
+        self.lease_timeout = lease_timeout
+        self._idle: "queue.LifoQueue[PooledBrowser]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._driver_path: Optional[str] = None
+        self._driver_path_resolved = False
+        self._closed = False
+        self.stats = {
+            "created": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "leases": 0
+        }
+
+    def _count(self, name: str) -> None:
+        """Incrementa un contador de `stats` (se actualizan desde los threads que piden navegadores)"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _build_options(self) -> webdriver.ChromeOptions:
+        """Configura las opciones de Chrome comunes a todos los scrapers"""
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+        chrome_options.add_argument(f'user-agent={settings.USER_AGENT}')
+        chrome_options.page_load_strategy = 'eager'
+        return chrome_options
+
+    def _resolve_driver_path(self) -> Optional[str]:
+        """Resuelve la ruta de chromedriver una sola vez por proceso"""
+        with self._lock:
+            if not self._driver_path_resolved:
+                try:
+                    from webdriver_manager.chrome import ChromeDriverManager
+                    self._driver_path = ChromeDriverManager().install()
+                except Exception as e:
+                    # Selenium Manager resuelve el driver si webdriver_manager falla
+                    logger.warning(f"No se pudo resolver chromedriver con webdriver_manager: {e}")
+                    self._driver_path = None
+                self._driver_path_resolved = True
+            return self._driver_path
+
+    def _create_browser(self) -> PooledBrowser:
+        """Inicia un nuevo navegador Chrome"""
+        driver_path = self._resolve_driver_path()
+        service = Service(driver_path) if driver_path else Service()
+        driver = webdriver.Chrome(service=service, options=self._build_options())
+        self._count("created")
+        logger.info("Nuevo navegador iniciado en el pool")
+        return PooledBrowser(driver)
+
+    @staticmethod
+    def _quit(browser: PooledBrowser) -> None:
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error al cerrar navegador: {e}")
+
+    @staticmethod
+    def _is_healthy(browser: PooledBrowser) -> bool:
+        """Verifica que el navegador siga respondiendo"""
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _checkout(self) -> PooledBrowser:
+        """Obtiene un navegador sano, reutilizando uno ocioso si existe"""
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create_browser()
+
+            if self._is_healthy(browser):
+                return browser
+
+            self._count("unhealthy")
+            logger.warning("Navegador no saludable descartado del pool")
+            self._quit(browser)
+
+    def _checkin(self, browser: PooledBrowser, broken: bool) -> None:
+        """Devuelve el navegador al pool o lo recicla si corresponde"""
+        browser.pages += 1
+
+        if broken or self._closed or browser.pages >= self.max_pages:
+            if not broken and browser.pages >= self.max_pages:
+                self._count("recycled")
+            self._quit(browser)
+            return
+
+        try:
+            # Liberar la memoria de la página anterior antes de reutilizarlo
+            browser.driver.get("about:blank")
+        except Exception:
+            self._quit(browser)
+            return
+        self._idle.put(browser)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        """
+        Presta un navegador del pool durante el bloque `with`
+
+        Args:
+            timeout: Segundos máximos de espera por un navegador libre
+        Raises:
+            BrowserLeaseTimeout: Si no hay navegador disponible a tiempo
+        """
+        if self._closed:
+            raise RuntimeError("El pool de navegadores está cerrado")
+
+        wait = self.lease_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise BrowserLeaseTimeout(f"No hay navegadores disponibles tras {wait} segundos")
+
+        browser = None
+        broken = False
+        try:
+            browser = self._checkout()
+            self._count("leases")
+            yield browser.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            if browser:
+                self._checkin(browser, broken)
+            self._slots.release()
+
+    def start(self) -> None:
+        """Resuelve el driver y precalienta navegadores al iniciar la app"""
+        self._closed = False
+        self._resolve_driver_path()
+        for _ in range(self.warm - self._idle.qsize()):
+            try:
+                self._idle.put(self._create_browser())
+            except Exception as e:
+                logger.error(f"No se pudo precalentar el pool de navegadores: {e}")
+                break
+        logger.info(f"Pool de navegadores iniciado ({self._idle.qsize()}/{self.size} precalentados)")
+
+    def shutdown(self) -> None:
+        """Cierra todos los navegadores ociosos; los prestados se cierran al devolverse"""
+        self._closed = True
+        browsers: List[PooledBrowser] = []
+        while True:
+            try:
+                browsers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for browser in browsers:
+            self._quit(browser)
+        logger.info(f"Pool de navegadores cerrado ({len(browsers)} navegadores)")
+
+    def get_status(self) -> dict:
+        """Retorna el estado actual del pool"""
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            **stats
+        }
+
+
+# Instancia global del pool compartida por todos los scrapers
+browser_pool = BrowserPool()
@@ -0,0 +1,37 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class JobCheckpoint:
+    """
+    Avance de un job: listados de categorías ya descubiertos y URLs de artículos ya descargados.
+
+    Al reanudar un job parcial, el scraper reutiliza los listados guardados y solo
+    descarga las URLs que todavía no están en `fetched`.
+    """
+
+    def __init__(self, listings: Optional[Dict[str, List[str]]] = None, fetched: Optional[Iterable[str]] = None):
+        self.listings: Dict[str, List[str]] = dict(listings or {})
+        self.fetched: Set[str] = set(fetched or ())
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "JobCheckpoint":
+        if not data:
+            return cls()
+        return cls(data.get("listings"), data.get("fetched"))
+
+    def listing(self, url: str) -> Optional[List[str]]:
+        """Listado guardado de la categoría o None si aún no se descubrió"""
+        return self.listings.get(url)
+
+    def record_listing(self, url: str, urls: List[str]) -> None:
+        if urls:
+            self.listings[url] = list(urls)
+
+    def remaining(self, urls: List[str]) -> List[str]:
+        """URLs del listado que aún no se descargaron"""
+        return [url for url in urls if url not in self.fetched]
+
+    def to_dict(self, results: Optional[Iterable[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Estado serializable, sumando a `fetched` las URLs de los artículos obtenidos en esta ejecución"""
+        fetched = self.fetched | {article["URL"] for article in results or [] if article and article.get("URL")}
+        return {"listings": self.listings, "fetched": sorted(fetched)}
@@ -0,0 +1,171 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class LoadedListing(NamedTuple):
+    """Listado cargado de una categoría y si se recorrió completo"""
+    urls: List[str]
+    # False si la paginación se cortó (timeout, cancelación, red inactiva, límite de clics)
+    complete: bool = True
+    # Cola del listado anterior que la paginación no volvió a recorrer: se sirve desde
+    # article_store sin petición HTTP
+    stored_urls: FrozenSet[str] = frozenset()
+
+
+# Recibe el último listado conocido (o None) y retorna el listado actualizado
+ListingLoaderFn = Callable[[Optional[List[str]]], LoadedListing]
+
+
+class ListingEntry(NamedTuple):
+    """Listado cacheado de URLs de una categoría"""
+    urls: List[str]
+    fetched_at: float
+    fresh: bool
+
+
+class ListingCache:
+    """
+    Cache por categoría de las URLs de artículos descubiertas.
+
+    Dentro del TTL el listado se sirve sin abrir el navegador. Pasado el TTL se
+    sirve el listado antiguo de inmediato y se refresca en segundo plano
+    (stale-while-revalidate). Pasado `max_stale` se vuelve a cargar en línea.
+    Solo se cachean listados completos: uno cortado por el timeout o la
+    cancelación de un job se usa en ese job pero no se sirve a los demás.
+    """
+
+    def __init__(
+        self,
+        ttl: int = settings.LISTING_CACHE_TTL,
+        max_stale: int = settings.LISTING_CACHE_MAX_STALE
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[str, tuple] = {}
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.LISTING_REFRESH_WORKERS,
+            thread_name_prefix="listing-refresh"
+        )
+        self.stats_counters = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0
+        }
+
+    def lookup(self, key: str) -> Optional[ListingEntry]:
+        """Retorna el listado cacheado si aún es utilizable"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                self.stats_counters["misses"] += 1
+                return None
+
+            urls, fetched_at = entry
+            age = time.time() - fetched_at
+            if age >= self.ttl + self.max_stale:
+                self.stats_counters["misses"] += 1
+                return None
+
+            fresh = age < self.ttl
+            self.stats_counters["fresh_hits" if fresh else "stale_hits"] += 1
+            return ListingEntry(list(urls), fetched_at, fresh)
+
+    def store(self, key: str, listing: LoadedListing) -> None:
+        """Guarda el listado de una categoría (los vacíos o incompletos no se cachean)"""
+        urls = listing.urls
+        if not urls:
+            return
+        if not listing.complete:
+            logger.info(f"Listado de {key} incompleto ({len(urls)} artículos); no se cachea")
+            return
+        with self._lock:
+            self._entries[key] = (list(urls), time.time())
+
+    def previous(self, key: str) -> Optional[List[str]]:
+        """
+        Retorna el último listado completo de la categoría como base de una carga incremental
+
+        Pasado `max_stale` retorna None para que el listado se vuelva a paginar entero.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or time.time() - entry[1] >= self.ttl + self.max_stale:
+                return None
+            return list(entry[0])
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _refresh(self, key: str, loader: ListingLoaderFn) -> None:
+        try:
+            listing = loader(self.previous(key))
+            self.store(key, listing)
+            logger.info(f"Listado de {key} refrescado en segundo plano ({len(listing.urls)} artículos)")
+        except Exception as e:
+            logger.error(f"Error refrescando listado de {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def refresh_in_background(self, key: str, loader: ListingLoaderFn) -> None:
+        """Programa un refresco del listado si no hay uno en curso para la categoría"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats_counters["refreshes"] += 1
+        self._executor.submit(self._refresh, key, loader)
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: ListingLoaderFn,
+        refresher: Optional[ListingLoaderFn] = None
+    ) -> LoadedListing:
+        """
+        Obtiene el listado desde cache o lo carga
+
+        Args:
+            key: URL de la categoría
+            loader: Carga el listado en línea cuando no hay cache utilizable; recibe
+                el último listado conocido para permitir cargas incrementales
+            refresher: Carga usada para el refresco en segundo plano (por defecto `loader`)
+        """
+        entry = self.lookup(key)
+        if entry:
+            if not entry.fresh:
+                self.refresh_in_background(key, refresher or loader)
+            return LoadedListing(entry.urls)
+
+        listing = loader(self.previous(key))
+        self.store(key, listing)
+        return listing
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "categories": len(self._entries),
+                "ttl": self.ttl,
+                "refreshing": len(self._refreshing),
+                **self.stats_counters
+            }
+
+
+# Instancia global compartida entre jobs y modelos
+listing_cache = ListingCache()
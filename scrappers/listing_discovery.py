@@ -0,0 +1,181 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import asyncio
+import logging
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+import aiohttp
+from aiohttp import ClientTimeout
+
+logger = logging.getLogger(__name__)
+
+
+def _local_name(tag: str) -> str:
+    """Retorna el nombre del tag XML sin namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def is_category_article(url: str, category_url: str) -> bool:
+    """Indica si la URL corresponde a un artículo directo de la categoría"""
+    prefix = urlparse(category_url).path.rstrip('/') + '/'
+    path = urlparse(url).path.rstrip('/')
+    if not path.startswith(prefix):
+        return False
+    slug = path[len(prefix):]
+    return bool(slug) and '/' not in slug
+
+
+class ListingSource:
+    """Fuente de descubrimiento de URLs de artículos de una categoría"""
+
+    name = "source"
+
+    async def discover(self, session: aiohttp.ClientSession, category_url: str) -> List[str]:
+        raise NotImplementedError
+
+
+class SitemapSource(ListingSource):
+    """Obtiene las URLs desde el sitemap del sitio (soporta sitemap index)"""
+
+    name = "sitemap"
+
+    def __init__(self, sitemap_url: str):
+        self.sitemap_url = sitemap_url
+
+    async def _fetch_entries(self, session: aiohttp.ClientSession, url: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """Retorna (entradas url/lastmod, sitemaps hijos) de un documento sitemap"""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            root = ET.fromstring(await response.read())
+
+        entries, children = [], []
+        for node in root:
+            loc, lastmod = None, ""
+            for child in node:
+                name = _local_name(child.tag)
+                if name == 'loc':
+                    loc = (child.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = (child.text or '').strip()
+            if not loc:
+                continue
+            if _local_name(node.tag) == 'sitemap':
+                children.append(loc)
+            else:
+                entries.append((loc, lastmod))
+        return entries, children
+
+    async def discover(self, session: aiohttp.ClientSession, category_url: str) -> List[str]:
+        entries, children = await self._fetch_entries(session, self.sitemap_url)
+
+        if children:
+            # Priorizar los sitemaps del blog para mantener 1-2 round-trips
+            blog_children = [c for c in children if 'blog' in c] or children
+            results = await asyncio.gather(
+                *(self._fetch_entries(session, c) for c in blog_children),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, tuple):
+                    entries.extend(result[0])
+
+        matches = [(loc, lastmod) for loc, lastmod in entries if is_category_article(loc, category_url)]
+        # El listado del blog muestra primero los más recientes
+        matches.sort(key=lambda entry: entry[1], reverse=True)
+        return [loc for loc, _ in matches]
+
+
+class FeedSource(ListingSource):
+    """Obtiene las URLs desde un feed RSS o Atom"""
+
+    name = "feed"
+
+    def __init__(self, feed_url: str):
+        self.feed_url = feed_url
+
+    async def discover(self, session: aiohttp.ClientSession, category_url: str) -> List[str]:
+        feed_url = self.feed_url.format(category_url=category_url.rstrip('/'))
+        async with session.get(feed_url) as response:
+            response.raise_for_status()
+            root = ET.fromstring(await response.read())
+
+        links = []
+        for node in root.iter():
+            if _local_name(node.tag) not in ('item', 'entry'):
+                continue
+            for child in node:
+                if _local_name(child.tag) != 'link':
+                    continue
+                link = (child.get('href') or child.text or '').strip()
+                if link:
+                    links.append(urljoin(feed_url, link))
+                    break
+        return [link for link in links if is_category_article(link, category_url)]
+
+
+class ListingDiscovery:
+    """
+    Descubre las URLs de artículos de una categoría vía HTTP plano.
+
+    Prueba cada fuente en orden y retorna la primera lista no vacía. Si todas
+    fallan retorna None para que el scraper use el navegador como respaldo.
+    """
+
+    def __init__(self, sources: List[ListingSource], timeout: int = settings.LISTING_DISCOVERY_TIMEOUT):
+        self.sources = sources
+        self.timeout = timeout
+
+    async def discover(self, category_url: str) -> Optional[List[str]]:
+        """Descubre las URLs de artículos de la categoría"""
+        if not settings.LISTING_DISCOVERY_ENABLED or not self.sources:
+            return None
+
+        timeout = ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': settings.USER_AGENT}
+        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
+            for source in self.sources:
+                try:
+                    urls = await source.discover(session, category_url)
+                except Exception as e:
+                    logger.warning(f"Fuente {source.name} falló para {category_url}: {e}")
+                    continue
+
+                if urls:
+                    # Eliminar duplicados manteniendo el orden
+                    urls = list(dict.fromkeys(urls))
+                    logger.info(f"Encontrados {len(urls)} artículos en {category_url} vía {source.name}")
+                    return urls
+
+        return None
+
+    def discover_sync(self, category_url: str) -> Optional[List[str]]:
+        """Versión síncrona de `discover` para los scrapers basados en threads"""
+        try:
+            return asyncio.run(self.discover(category_url))
+        except Exception as e:
+            logger.warning(f"Error en descubrimiento de artículos para {category_url}: {e}")
+            return None
+
+
+def build_listing_discovery() -> ListingDiscovery:
+    """Construye el descubridor con las fuentes configuradas"""
+    sources: List[ListingSource] = [
+        SitemapSource(urljoin(settings.BLOG_BASE_URL, path))
+        for path in settings.LISTING_SITEMAP_PATHS
+    ]
+    sources.extend(
+        FeedSource(template if '{category_url}' in template else urljoin(settings.BLOG_BASE_URL, template))
+        for template in settings.LISTING_FEED_PATHS
+    )
+    return ListingDiscovery(sources)
+
+
+# Instancia global usada por los tres scrapers
+listing_discovery = build_listing_discovery()
@@ -0,0 +1,248 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from core.config import settings
+import logging
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Lee los href de las tarjetas de artículos directamente en el navegador
+CARD_HREFS_SCRIPT = """
+return Array.from(
+    document.querySelectorAll('div[class*="BlogArticle_box"] a[href]'),
+    a => a.getAttribute('href')
+);
+"""
+
+
+# Cuenta las peticiones fetch/XHR en curso para detectar inactividad de red
+TRACK_REQUESTS_SCRIPT = """
+if (window.__pendingRequests === undefined) {
+    window.__pendingRequests = 0;
+    const done = () => { window.__pendingRequests = Math.max(0, window.__pendingRequests - 1); };
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function () {
+            window.__pendingRequests++;
+            return originalFetch.apply(this, arguments).finally(done);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__pendingRequests++;
+        this.addEventListener('loadend', done);
+        return originalSend.apply(this, arguments);
+    };
+}
+"""
+
+# Estado del listado en una sola llamada: [tarjetas, botón visible, peticiones en curso]
+LISTING_STATE_SCRIPT = """
+const cards = document.querySelectorAll('div[class*="BlogArticle_box"]').length;
+const button = Array.from(document.querySelectorAll('button'))
+    .some(b => b.textContent.includes('Cargar más'));
+return [cards, button, window.__pendingRequests || 0];
+"""
+
+CLICK_LOAD_MORE_SCRIPT = """
+const button = Array.from(document.querySelectorAll('button'))
+    .find(b => b.textContent.includes('Cargar más'));
+if (!button) { return false; }
+button.scrollIntoView();
+button.click();
+return true;
+"""
+
+
+# Motivos de fin de la paginación con los que el listado quedó completo ('known': se
+# alcanzó el listado conocido, que se antepone completo)
+COMPLETE_STOP_REASONS = ('end', 'known')
+
+
+def absolute_article_url(href: str) -> str:
+    """Convierte el href de una tarjeta en URL absoluta"""
+    return href if href.startswith('http') else f"{settings.BLOG_BASE_URL}{href}"
+
+
+def card_urls(driver) -> List[str]:
+    """Retorna las URLs de las tarjetas cargadas, sin duplicados y en orden"""
+    hrefs = driver.execute_script(CARD_HREFS_SCRIPT) or []
+    return list(dict.fromkeys(absolute_article_url(href) for href in hrefs if href))
+
+
+def reached_known_urls(
+    urls: Iterable[str],
+    known_urls: Optional[Set[str]],
+    stop_after: int = settings.LISTING_INCREMENTAL_STOP_AFTER
+) -> bool:
+    """Indica si el listado ya muestra `stop_after` URLs conocidas seguidas"""
+    if not known_urls or stop_after <= 0:
+        return False
+    run = 0
+    for url in urls:
+        run = run + 1 if url in known_urls else 0
+        if run >= stop_after:
+            return True
+    return False
+
+
+def merge_with_previous(head: List[str], previous: Optional[List[str]]) -> List[str]:
+    """
+    Antepone la cabecera nueva del listado al listado conocido
+
+    `previous` debe ser un listado completo (ver `ListingCache.previous`): unir la
+    cabecera a uno truncado perdería para siempre los artículos más antiguos. El
+    resultado es el listado entero; la cola que solo aporta `previous` (ver
+    `known_tail`) se sirve desde article_store sin volver a descargarla.
+    """
+    return list(dict.fromkeys(head + (previous or [])))
+
+
+def known_tail(head: List[str], previous: Optional[List[str]]) -> FrozenSet[str]:
+    """
+    Retorna las URLs del listado anterior que la cabecera nueva no volvió a cargar
+
+    La paginación se detuvo antes de llegar a ellas, así que no hay señal de que
+    cambiaran: se reutiliza el artículo guardado. Se revalidan cuando el listado
+    se vuelve a paginar entero (pasado `max_stale` de la cache de listados).
+    """
+    return frozenset(previous or []) - frozenset(head)
+
+
+class ListingPaginator:
+    """
+    Motor de paginación del listado basado en señales del navegador.
+
+    En lugar de pausas fijas, después de cada clic en "Cargar más" espera a que
+    aumente el número de tarjetas, desaparezca el botón o la red quede inactiva
+    sin tarjetas nuevas. Registra la duración de cada clic.
+    """
+
+    def __init__(
+        self,
+        driver,
+        should_stop: Callable[[], bool] = lambda: False,
+        known_urls: Optional[Set[str]] = None,
+        on_batch: Optional[Callable[[List[str]], None]] = None,
+        max_clicks: int = settings.LISTING_MAX_CLICKS,
+        batch_timeout: float = settings.LISTING_BATCH_TIMEOUT,
+        network_idle: float = settings.LISTING_NETWORK_IDLE,
+        poll_interval: float = settings.LISTING_POLL_INTERVAL
+    ):
+        self.driver = driver
+        self.should_stop = should_stop
+        self.known_urls = known_urls
+        self.on_batch = on_batch
+        self.max_clicks = max_clicks
+        self.batch_timeout = batch_timeout
+        self.network_idle = network_idle
+        self.poll_interval = poll_interval
+        self.click_durations: List[float] = []
+        self.stop_reason: Optional[str] = None
+        self.total_time = 0.0
+
+    def _state(self) -> tuple:
+        cards, button, pending = self.driver.execute_script(LISTING_STATE_SCRIPT)
+        return int(cards), bool(button), int(pending)
+
+    def _wait(self, condition: Callable[[Any], Any]) -> Any:
+        """Espera hasta que la condición retorne un valor verdadero o se agote el tiempo"""
+        try:
+            return WebDriverWait(self.driver, self.batch_timeout, poll_frequency=self.poll_interval).until(condition)
+        except TimeoutException:
+            return None
+
+    def _wait_initial_load(self) -> None:
+        """Espera a que aparezcan las primeras tarjetas o el botón de carga"""
+        self._wait(lambda d: any(self._state()[:2]))
+
+    def _wait_for_batch(self, cards_before: int) -> str:
+        """
+        Espera el resultado de un clic en "Cargar más"
+
+        Returns:
+            'loaded' si llegaron tarjetas nuevas, 'end' si desapareció el botón sin
+            peticiones en curso,
+            'idle' si la red quedó inactiva sin tarjetas nuevas o 'timeout'
+        """
+        idle_since = [None]
+
+        def batch_arrived(_driver):
+            cards, button, pending = self._state()
+            if cards > cards_before:
+                return 'loaded'
+            if not button and not pending:
+                return 'end'
+            if pending:
+                idle_since[0] = None
+                return None
+            idle_since[0] = idle_since[0] or time.monotonic()
+            if time.monotonic() - idle_since[0] >= self.network_idle:
+                return 'idle'
+            return None
+
+        return self._wait(batch_arrived) or 'timeout'
+
+    def _publish_batch(self) -> bool:
+        """Entrega el lote actual y retorna True si ya se alcanzaron URLs conocidas"""
+        if not (self.known_urls or self.on_batch):
+            return False
+        batch = card_urls(self.driver)
+        if self.on_batch:
+            self.on_batch(batch)
+        return reached_known_urls(batch, self.known_urls)
+
+    def run(self, url: str) -> List[str]:
+        """Carga el listado completo (o su cabecera nueva) y retorna las URLs de las tarjetas"""
+        start = time.monotonic()
+        self.driver.get(url)
+        self.driver.execute_script(TRACK_REQUESTS_SCRIPT)
+        self._wait_initial_load()
+
+        while True:
+            if self._publish_batch():
+                self.stop_reason = 'known'
+                break
+            if self.should_stop():
+                self.stop_reason = 'stopped'
+                break
+            if len(self.click_durations) >= self.max_clicks:
+                self.stop_reason = 'max_clicks'
+                break
+
+            cards_before = self._state()[0]
+            click_start = time.monotonic()
+            if not self.driver.execute_script(CLICK_LOAD_MORE_SCRIPT):
+                self.stop_reason = 'end'
+                break
+
+            outcome = self._wait_for_batch(cards_before)
+            self.click_durations.append(round(time.monotonic() - click_start, 3))
+            if outcome != 'loaded':
+                self.stop_reason = outcome
+                break
+
+        urls = card_urls(self.driver)
+        self.total_time = round(time.monotonic() - start, 3)
+        logger.info(
+            f"Listado {url}: {len(urls)} artículos, {len(self.click_durations)} clics "
+            f"en {self.total_time}s (fin: {self.stop_reason})"
+        )
+        return urls
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna las métricas de la paginación"""
+        return {
+            "clicks": len(self.click_durations),
+            "click_durations": self.click_durations,
+            "stop_reason": self.stop_reason,
+            "total_time": self.total_time
+        }
@@ -10,17 +10,18 @@ from core.config import settings
 
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import unicodedata
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from scrappers.browser_pool import browser_pool
+from scrappers.listing_discovery import listing_discovery
+from scrappers.listing_cache import LoadedListing, listing_cache
+from scrappers.listing_loader import COMPLETE_STOP_REASONS, ListingPaginator, known_tail, merge_with_previous, reached_known_urls
+from scrappers.article_cache import article_cache
+from scrappers.job_checkpoint import JobCheckpoint
+from scrappers.article_store import article_store, build_resource, conditional_headers
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +29,14 @@ class OptimizedScraper:
     def __init__(self):
         self.partial_results = []
         self.should_stop = False
+        self.cancelled = False
+        # Avance reutilizable al reanudar el job (listados y artículos ya descargados)
+        self.checkpoint = JobCheckpoint()
+        # URLs de la cola del listado anterior, servidas desde article_store
+        self.stored_urls: Set[str] = set()
         self.start_time = None
         self.timeout = settings.MAX_TIMEOUT
+        self.pagination_stats = {}
         self.category_urls = {
             'pymes': 'pymes',
             'corporativos': 'corporativos',
@@ -41,21 +48,17 @@ class OptimizedScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.setup_driver()
-
-    def setup_driver(self):
-        """Configura el driver de Chrome con las opciones necesarias"""
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument(f'user-agent={self.headers["User-Agent"]}')
-        self.chrome_options = chrome_options
+
+    def cancel(self) -> None:
+        """Detiene el scraping en curso (navegador, threads y descargas) en el próximo punto de control"""
+        self.cancelled = True
+        self.should_stop = True
 
     def check_timeout(self) -> bool:
-        """Verifica si se ha excedido el tiempo máximo"""
+        """Verifica si se ha excedido el tiempo máximo o se canceló el job"""
+        if self.cancelled:
+            self.should_stop = True
+            return True
         if self.start_time and time.time() - self.start_time >= self.timeout:
             self.should_stop = True
             return True
@@ -71,16 +74,43 @@ class OptimizedScraper:
         normalized_category = self.normalize_text(category)
         for cat, url_suffix in self.category_urls.items():
             if self.normalize_text(cat) == normalized_category:
-                return f"https://xepelin.com/blog/{url_suffix}"
+                return f"{settings.BLOG_BASE_URL}/blog/{url_suffix}"
         return None
 
     def get_article_details(self, url: str) -> Optional[Dict]:
         """Obtiene los detalles de un artículo específico"""
         if self.check_timeout():
             return None
+
+        cached = article_cache.get(url)
+        if cached:
+            self.partial_results.append(cached)
+            return cached
             
         try:
-            response = requests.get(url, headers=self.headers, timeout=5)
+            stored = article_store.get(url)
+            if stored and url in self.stored_urls:
+                # Cola del listado anterior: se reutiliza sin petición HTTP
+                article_data = stored['article']
+                article_cache.set(url, article_data)
+                self.partial_results.append(article_data)
+                return article_data
+
+            response = requests.get(
+                url,
+                headers={**self.headers, **conditional_headers(stored, url)},
+                timeout=5
+            )
+            resource = build_resource(url, response.headers, response.content)
+
+            # Reutilizar el artículo guardado si no cambió desde la última descarga
+            if stored and (response.status_code == 304 or resource.content_hash == stored['content_hash']):
+                article_store.touch(url, resource.etag, resource.last_modified)
+                article = stored['article']
+                article_cache.set(url, article)
+                self.partial_results.append(article)
+                return article
+
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -102,6 +132,8 @@ class OptimizedScraper:
                 'Tiempo de Lectura': reading_time,
                 'URL': url
             }
+            article_store.save(url, article, resource)
+            article_cache.set(url, article)
             self.partial_results.append(article)
             return article
             
@@ -109,55 +141,65 @@ class OptimizedScraper:
             logger.error(f"Error obteniendo detalles del artículo {url}: {e}")
             return None
 
-    def get_all_articles(self, url: str) -> Optional[str]:
-        """Obtiene el contenido HTML de todos los artículos de una página"""
-        driver = None
+    def get_all_articles(self, url: str, known_urls: Optional[Set[str]] = None) -> Optional[List[str]]:
+        """
+        Obtiene las URLs de todos los artículos del listado de una página
+
+        Con `known_urls` la paginación se detiene al aparecer suficientes artículos
+        ya conocidos seguidos (modo incremental).
+        """
         try:
             if self.check_timeout():
                 return None
 
             logger.info(f"Accediendo a: {url}")
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.implicitly_wait(5)
-            driver.get(url)
-            time.sleep(2)
-
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-
-            articles_loaded = 0
-            last_height = driver.execute_script("return document.body.scrollHeight")
-
-            while not self.check_timeout():
-                try:
-                    load_more = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Cargar más')]"))
-                    )
-                    driver.execute_script("arguments[0].scrollIntoView();", load_more)
-                    load_more.click()
-                    articles_loaded += 1
-
-                    time.sleep(1)
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-
-                except TimeoutException:
-                    logger.info("No hay más artículos para cargar")
-                    break
-                except Exception as e:
-                    logger.error(f"Error al cargar más artículos: {str(e)}")
-                    break
-
-            return driver.page_source
+            with browser_pool.lease() as driver:
+                paginator = ListingPaginator(
+                    driver,
+                    should_stop=self.check_timeout,
+                    known_urls=known_urls
+                )
+                urls = paginator.run(url)
+                self.pagination_stats[url] = paginator.get_stats()
+                return urls
 
         except Exception as e:
             logger.error(f"Error en get_all_articles: {str(e)}")
             return None
-        finally:
-            if driver:
-                driver.quit()
+
+    def get_article_urls(self, url: str) -> LoadedListing:
+        """Obtiene las URLs de los artículos, sirviendo el listado cacheado si existe"""
+        return listing_cache.get_or_load(
+            url,
+            lambda previous: self.load_article_urls(url, previous),
+            # El refresco en segundo plano no debe quedar sujeto al timeout de este job
+            refresher=lambda previous: OptimizedScraper().load_article_urls(url, previous)
+        )
+
+    def load_article_urls(self, url: str, previous: Optional[List[str]] = None) -> LoadedListing:
+        """
+        Obtiene las URLs de los artículos vía sitemap/feeds o, si fallan, con el navegador
+
+        Args:
+            url: URL de la categoría
+            previous: Último listado completo conocido; el navegador solo carga la cabecera nueva
+        """
+        article_urls = listing_discovery.discover_sync(url)
+        if article_urls:
+            return LoadedListing(article_urls)
+
+        logger.info(f"Descubrimiento HTTP sin resultados, usando navegador para {url}")
+        known_urls = set(previous) if previous else None
+        article_urls = self.get_all_articles(url, known_urls)
+        if not article_urls:
+            return LoadedListing([], False)
+
+        stored_urls = frozenset()
+        if reached_known_urls(article_urls, known_urls):
+            stored_urls = known_tail(article_urls, previous)
+            article_urls = merge_with_previous(article_urls, previous)
+        stop_reason = self.pagination_stats.get(url, {}).get("stop_reason")
+        return LoadedListing(article_urls, stop_reason in COMPLETE_STOP_REASONS, stored_urls)
 
     def process_category(self, category: str) -> List[Dict]:
         """Procesa una categoría específica usando ThreadPoolExecutor"""
@@ -170,30 +212,30 @@ class OptimizedScraper:
             return self.partial_results
 
         try:
-            page_source = self.get_all_articles(url)
-            if not page_source:
-                return self.partial_results
-
-            soup = BeautifulSoup(page_source, 'html.parser')
-            article_cards = soup.find_all('div', {'class': 'BlogArticle_box__JyD1X'})
-            logger.info(f"Encontrados {len(article_cards)} artículos en {category}")
+            article_urls = self.checkpoint.listing(url)
+            if not article_urls:
+                listing = self.get_article_urls(url)
+                article_urls = listing.urls
+                self.stored_urls |= listing.stored_urls
+                # Un listado cortado no se guarda: al reanudar se vuelve a paginar
+                if listing.complete:
+                    self.checkpoint.record_listing(url, article_urls)
+            logger.info(f"Encontrados {len(article_urls)} artículos en {category}")
+            article_urls = self.checkpoint.remaining(article_urls)
 
             with ThreadPoolExecutor(max_workers=5) as executor:
                 futures = []
-                for card in article_cards:
+                for article_url in article_urls:
                     if self.check_timeout():
-                        executor.shutdown(wait=False)
+                        executor.shutdown(wait=False, cancel_futures=True)
                         return self.partial_results
 
-                    article_url = card.find('a')['href']
-                    if not article_url.startswith('http'):
-                        article_url = f"https://xepelin.com{article_url}"
-                    
                     futures.append(executor.submit(self.get_article_details, article_url))
 
                 for future in as_completed(futures):
                     if self.check_timeout():
-                        executor.shutdown(wait=False)
+                        # Descarta las descargas aún no iniciadas para liberar los threads
+                        executor.shutdown(wait=False, cancel_futures=True)
                         return self.partial_results
 
                     try:
@@ -211,6 +253,7 @@ class OptimizedScraper:
         """Método principal para iniciar el scraping"""
         self.partial_results = []
         self.should_stop = False
+        self.stored_urls = set()
         self.start_time = time.time()
 
         try:
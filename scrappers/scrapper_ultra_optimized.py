@@ -8,23 +8,23 @@ sys.path.append(str(root_dir))
 from core.config import settings
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import unicodedata
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
 import logging
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set
 import asyncio
 import aiohttp
 from functools import lru_cache
 import uvloop
 from aiohttp import ClientTimeout
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from scrappers.browser_pool import browser_pool
+from scrappers.listing_discovery import listing_discovery
+from scrappers.listing_cache import LoadedListing, listing_cache
+from scrappers.listing_loader import COMPLETE_STOP_REASONS, ListingPaginator, known_tail, merge_with_previous, reached_known_urls
+from scrappers.article_data import article_data_fetcher
+from scrappers.article_cache import article_cache
+from scrappers.job_checkpoint import JobCheckpoint
+from scrappers.article_store import article_store, build_resource
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +32,14 @@ class UltraOptimizedScraper:
     def __init__(self):
         self.partial_results = []
         self.should_stop = False
+        self.cancelled = False
+        # Avance reutilizable al reanudar el job (listados y artículos ya descargados)
+        self.checkpoint = JobCheckpoint()
+        # URLs de la cola del listado anterior, servidas desde article_store
+        self.stored_urls: Set[str] = set()
         self.start_time = None
         self.timeout = settings.MAX_TIMEOUT
-        self.url_cache = set()
-        self.results_cache = {}
+        self.pagination_stats = {}
         self.category_urls = {
             'pymes': 'pymes',
             'corporativos': 'corporativos',
@@ -44,19 +48,11 @@ class UltraOptimizedScraper:
             'xepelin': 'noticias',
             'emprendedores': 'emprendedores'
         }
-        self.setup_driver()
 
-    def setup_driver(self):
-        """Configura el driver de Chrome con las opciones necesarias"""
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
-        chrome_options.page_load_strategy = 'eager'
-        self.chrome_options = chrome_options
+    def cancel(self) -> None:
+        """Detiene el scraping en curso (navegador, threads y descargas) en el próximo punto de control"""
+        self.cancelled = True
+        self.should_stop = True
 
     def check_timeout(self) -> bool:
         """Verifica si se ha excedido el tiempo máximo"""
@@ -74,127 +70,230 @@ class UltraOptimizedScraper:
         """Obtiene la URL correspondiente a una categoría"""
         normalized_category = self.normalize_text(category)
         url_suffix = self.category_urls.get(normalized_category)
-        return f"https://xepelin.com/blog/{url_suffix}" if url_suffix else None
+        return f"{settings.BLOG_BASE_URL}/blog/{url_suffix}" if url_suffix else None
+
+    @staticmethod
+    def parse_article_html(html: str, url: str) -> Optional[Dict]:
+        """Extrae los datos del artículo desde el HTML renderizado"""
+        soup = BeautifulSoup(html, 'lxml')
+        
+        data = {
+            'Titular': soup.find('h1', {'class': 'ArticleSingle_title__0DNjm'}).text.strip(),
+            'Categoría': soup.find('a', {'class': 'text-primary-main'}).text.strip(),
+            'URL': url
+        }
+        
+        author_section = soup.find('div', {'class': 'flex gap-2'})
+        if author_section:
+            author_info = author_section.text.strip().split('|')
+            data.update({
+                'Autor': author_info[0].strip(),
+                'Cargo': author_info[1].strip() if len(author_info) > 1 else ''
+            })
+        
+        reading_time = soup.find('div', {'class': 'Text_body__snVk8'})
+        if reading_time:
+            data['Tiempo de Lectura'] = reading_time.text.strip()
+        
+        return data
 
     async def get_article_details(self, session: aiohttp.ClientSession, url: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
-        if url in self.url_cache:
-            return self.results_cache.get(url)
+        cached = article_cache.get(url)
+        if cached:
+            return cached
         
         async with semaphore:
             try:
                 timeout = ClientTimeout(total=10)
-                async with session.get(url, timeout=timeout) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'lxml')
-                    
-                    data = {
-                        'Titular': soup.find('h1', {'class': 'ArticleSingle_title__0DNjm'}).text.strip(),
-                        'Categoría': soup.find('a', {'class': 'text-primary-main'}).text.strip(),
-                        'URL': url
-                    }
-                    
-                    author_section = soup.find('div', {'class': 'flex gap-2'})
-                    if author_section:
-                        author_info = author_section.text.strip().split('|')
-                        data.update({
-                            'Autor': author_info[0].strip(),
-                            'Cargo': author_info[1].strip() if len(author_info) > 1 else ''
-                        })
-                    
-                    reading_time = soup.find('div', {'class': 'Text_body__snVk8'})
-                    if reading_time:
-                        data['Tiempo de Lectura'] = reading_time.text.strip()
-                    
-                    self.url_cache.add(url)
-                    self.results_cache[url] = data
+                data, html, resource = None, None, None
+                
+                # SQLite bloquea (commit con timeout=30): fuera del event loop
+                stored = await asyncio.to_thread(article_store.get, url)
+                if stored and url in self.stored_urls:
+                    # Cola del listado anterior: se reutiliza sin petición HTTP
+                    data = stored['article']
+                    article_cache.set(url, data)
                     return data
+                if stored:
+                    # GET condicional: con 304 o contenido idéntico se reutiliza el registro
+                    unchanged, data, html, resource = await article_data_fetcher.revalidate(session, url, stored, timeout)
+                    if unchanged:
+                        await asyncio.to_thread(article_store.touch, url, resource.etag, resource.last_modified)
+                        article_cache.set(url, data)
+                        return data
+                
+                if not data and html is None and settings.ARTICLE_DATA_ROUTES_ENABLED:
+                    # Datos embebidos de Next.js: menos bytes y sin depender de clases CSS
+                    data, html, resource = await article_data_fetcher.fetch(session, url, timeout)
+                
+                if not data:
+                    if html is None:
+                        async with session.get(url, timeout=timeout) as response:
+                            if response.status != 200:
+                                return None
+                            body = await response.read()
+                            html = await response.text()
+                            resource = build_resource(url, response.headers, body)
+                    data = self.parse_article_html(html, url)
+                
+                await asyncio.to_thread(article_store.save, url, data, resource)
+                article_cache.set(url, data)
+                return data
                     
             except Exception as e:
                 logger.error(f"Error procesando {url}: {e}")
                 return None
 
     async def process_articles(self, urls: List[str]) -> List[Dict]:
-        semaphore = asyncio.Semaphore(10)
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        queue.put_nowait(None)
+        return await self.consume_article_queue(queue)
+
+    async def consume_article_queue(self, queue: asyncio.Queue) -> List[Dict]:
+        """
+        Descarga los artículos de la cola con un pool de fetchers asíncronos
+
+        La cola termina con un marcador None; los fetchers procesan las URLs a
+        medida que llegan, sin esperar a que el listado termine de cargar.
+        """
+        semaphore = asyncio.Semaphore(settings.ULTRA_FETCH_CONCURRENCY)
         connector = aiohttp.TCPConnector(limit=None, ttl_dns_cache=300)
         timeout = ClientTimeout(total=30)
+        results = []
         
         async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            tasks = []
-            for url in urls:
-                task = asyncio.create_task(self.get_article_details(session, url, semaphore))
-                def callback(task):
-                    try:
-                        if not task.cancelled() and task.exception() is None:
-                            result = task.result()
-                            if result:
-                                self.partial_results.append(result)
-                    except Exception:
-                        pass
-                
-                task.add_done_callback(callback)
-                tasks.append(task)
-                
+            async def fetcher():
+                while True:
+                    url = await queue.get()
+                    if url is None or self.should_stop:
+                        # Reenviar el marcador para que terminen los demás fetchers
+                        queue.put_nowait(None)
+                        return
+                    result = await self.get_article_details(session, url, semaphore)
+                    if result:
+                        results.append(result)
+                        self.partial_results.append(result)
+            
+            tasks = [asyncio.create_task(fetcher()) for _ in range(settings.ULTRA_FETCH_CONCURRENCY)]
             try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                valid_results = [r for r in results 
-                               if r is not None 
-                               and isinstance(r, dict) 
-                               and not isinstance(r, Exception)]
-                return valid_results
+                await asyncio.gather(*tasks)
+                return results
             except asyncio.CancelledError:
-                logger.info(f"Proceso cancelado. Retornando {len(self.partial_results)} resultados parciales")
-                return [r for r in self.partial_results if r is not None]
+                # Quien canceló (DELETE o timeout del job) recoge partial_results
+                logger.info(f"Proceso cancelado con {len(self.partial_results)} resultados parciales")
+                raise
             finally:
                 for task in tasks:
                     if not task.done():
                         task.cancel()
 
-    def get_all_articles(self, url: str) -> Optional[str]:
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
-        chrome_options.page_load_strategy = 'eager'
+    def get_all_articles(
+        self,
+        url: str,
+        known_urls: Optional[Set[str]] = None,
+        on_batch: Optional[Callable[[List[str]], None]] = None
+    ) -> Optional[List[str]]:
+        """
+        Obtiene las URLs de todos los artículos del listado de una página
+
+        Args:
+            known_urls: URLs conocidas; la paginación se detiene al alcanzarlas
+            on_batch: Recibe las URLs de las tarjetas tras cada carga del listado
+        """
+        with browser_pool.lease() as driver:
+            paginator = ListingPaginator(
+                driver,
+                should_stop=lambda: self.should_stop,
+                known_urls=known_urls,
+                on_batch=on_batch
+            )
+            urls = paginator.run(url)
+            self.pagination_stats[url] = paginator.get_stats()
+            return urls
+
+    async def get_article_urls(
+        self,
+        url: str,
+        on_batch: Optional[Callable[[List[str]], None]] = None
+    ) -> LoadedListing:
+        """Obtiene las URLs de los artículos, sirviendo el listado cacheado si existe"""
+        entry = listing_cache.lookup(url)
+        if entry:
+            if not entry.fresh:
+                # El refresco en segundo plano no debe quedar sujeto al timeout de este job
+                listing_cache.refresh_in_background(
+                    url,
+                    lambda previous: asyncio.run(UltraOptimizedScraper().load_article_urls(url, previous))
+                )
+            return LoadedListing(entry.urls)
+
+        listing = await self.load_article_urls(url, listing_cache.previous(url), on_batch)
+        listing_cache.store(url, listing)
+        return listing
+
+    async def load_article_urls(
+        self,
+        url: str,
+        previous: Optional[List[str]] = None,
+        on_batch: Optional[Callable[[List[str]], None]] = None
+    ) -> LoadedListing:
+        """
+        Obtiene las URLs de los artículos vía sitemap/feeds o, si fallan, con el navegador
+
+        Args:
+            url: URL de la categoría
+            previous: Último listado completo conocido; el navegador solo carga la cabecera nueva
+            on_batch: Recibe (desde el thread del navegador) cada lote de URLs cargado
+        """
+        urls = await listing_discovery.discover(url)
+        if urls:
+            return LoadedListing(urls)
+
+        logger.info(f"Descubrimiento HTTP sin resultados, usando navegador para {url}")
+        known_urls = set(previous) if previous else None
+        loop = asyncio.get_event_loop()
+        urls = await loop.run_in_executor(None, self.get_all_articles, url, known_urls, on_batch)
         
-        service = Service(ChromeDriverManager().install())
+        if not urls:
+            return LoadedListing([], False)
+        
+        stored_urls = frozenset()
+        if reached_known_urls(urls, known_urls):
+            stored_urls = known_tail(urls, previous)
+            urls = merge_with_previous(urls, previous)
+        stop_reason = self.pagination_stats.get(url, {}).get("stop_reason")
+        return LoadedListing(urls, stop_reason in COMPLETE_STOP_REASONS, stored_urls)
+
+    async def produce_article_urls(self, url: str, queue: asyncio.Queue) -> List[str]:
+        """Publica en la cola las URLs de la categoría a medida que el listado carga"""
+        loop = asyncio.get_running_loop()
+        # Las URLs ya descargadas en una ejecución anterior del job no se vuelven a pedir
+        seen = set(self.checkpoint.fetched)
+        
+        def enqueue(urls: List[str]) -> None:
+            for article_url in urls:
+                if article_url not in seen:
+                    seen.add(article_url)
+                    queue.put_nowait(article_url)
         
         try:
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            driver.set_script_timeout(5)
-            driver.implicitly_wait(3)
-            
-            driver.get(url)
-            time.sleep(2)
-            
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            
-            while True:
-                try:
-                    load_more = WebDriverWait(driver, 3).until(
-                        EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Cargar más')]"))
-                    )
-                    driver.execute_script("arguments[0].scrollIntoView(); arguments[0].click();", load_more)
-                    
-                    time.sleep(0.5)
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break
-                    last_height = new_height
-                    
-                except TimeoutException:
-                    break
-                    
-            return driver.page_source
-            
+            urls = self.checkpoint.listing(url)
+            if urls is None:
+                listing = await self.get_article_urls(
+                    url,
+                    on_batch=lambda batch: loop.call_soon_threadsafe(enqueue, batch)
+                )
+                urls = listing.urls
+                self.stored_urls |= listing.stored_urls
+                # Un listado cortado no se guarda: al reanudar se vuelve a paginar
+                if listing.complete:
+                    self.checkpoint.record_listing(url, urls)
+            enqueue(urls)
+            return urls
         finally:
-            if 'driver' in locals():
-                driver.quit()
+            queue.put_nowait(None)
 
     async def process_category(self, category: str) -> List[Dict]:
         logger.info(f"\nIniciando procesamiento de categoría: {category}")
@@ -203,24 +302,21 @@ class UltraOptimizedScraper:
             return []
         
         try:
-            loop = asyncio.get_event_loop()
-            page_source = await loop.run_in_executor(None, self.get_all_articles, url)
-            
-            if not page_source:
-                return []
-            
-            soup = BeautifulSoup(page_source, 'lxml')
-            article_cards = soup.find_all('div', {'class': 'BlogArticle_box__JyD1X'})
-            logger.info(f"Encontrados {len(article_cards)} artículos en {category}")
+            # El listado y la descarga de artículos avanzan en paralelo
+            queue: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.create_task(self.produce_article_urls(url, queue))
+            try:
+                results = await self.consume_article_queue(queue)
+            finally:
+                if not producer.done():
+                    producer.cancel()
             
-            urls = [
-                f"https://xepelin.com{card.find('a')['href']}" 
-                if not card.find('a')['href'].startswith('http') 
-                else card.find('a')['href']
-                for card in article_cards
-            ]
+            if producer.cancelled() or producer.exception():
+                logger.error(f"Error listando categoría {category}: {producer.exception() if not producer.cancelled() else 'cancelado'}")
+            else:
+                logger.info(f"Encontrados {len(producer.result())} artículos en {category}")
             
-            return await self.process_articles(urls)
+            return results
             
         except Exception as e:
             logger.error(f"Error en categoría {category}: {e}")
@@ -229,6 +325,7 @@ class UltraOptimizedScraper:
     async def scrape_async(self, category: str) -> Optional[List[Dict]]:
         self.partial_results = []
         self.should_stop = False
+        self.stored_urls = set()
         
         try:
             if self.normalize_text(category) == "todas las categorias":
@@ -0,0 +1,320 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+from core.config import settings
+from core.logging import logger
+from models.requests import ScraperModel
+
+
+class JobBroker:
+    """
+    Interfaz del broker entre la API y los workers externos (`worker.py`).
+
+    La API encola el payload del job y consulta su resultado; los workers reclaman
+    jobs de los modelos que atienden y escriben el resultado de vuelta. Un job
+    reclamado que no termina dentro de `claim_timeout` vuelve a la cola. La API
+    descarta el resultado al leerlo (`acknowledge`); los que nadie lee expiran
+    tras `result_ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        claim_timeout: int = settings.BROKER_CLAIM_TIMEOUT,
+        result_ttl: int = settings.BROKER_RESULT_TTL
+    ):
+        self.claim_timeout = claim_timeout
+        self.result_ttl = result_ttl
+
+    def enqueue(self, payload: Dict[str, Any]) -> None:
+        """Encola un job; el payload incluye al menos job_id, model y category"""
+        raise NotImplementedError
+
+    def claim(self, models: List[str], worker_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Reclama el siguiente job de alguno de los modelos o retorna None tras `timeout` segundos"""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Guarda el resultado de un job reclamado"""
+        raise NotImplementedError
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna el resultado del job o None si aún no termina"""
+        raise NotImplementedError
+
+    def acknowledge(self, job_id: str) -> None:
+        """Elimina el job y su resultado una vez que la API lo leyó"""
+        raise NotImplementedError
+
+    def claimed_at(self, job_id: str) -> Optional[float]:
+        """Momento en que un worker reclamó el job o None si sigue en cola"""
+        raise NotImplementedError
+
+    def cancel(self, job_id: str) -> None:
+        """Cancela un job: no se reclama si sigue en cola y el worker que lo ejecuta lo detiene"""
+        raise NotImplementedError
+
+    def is_cancelled(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class SQLiteBroker(JobBroker):
+    """
+    Broker sobre un archivo SQLite compartido por los procesos de un mismo host.
+
+    El reclamo se hace dentro de una transacción `BEGIN IMMEDIATE`, por lo que
+    dos workers nunca toman el mismo job.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        claim_timeout: int = settings.BROKER_CLAIM_TIMEOUT,
+        poll_interval: float = settings.BROKER_POLL_INTERVAL,
+        result_ttl: int = settings.BROKER_RESULT_TTL
+    ):
+        super().__init__(claim_timeout, result_ttl)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS broker_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    claimed_by TEXT,
+                    claimed_at REAL,
+                    result TEXT,
+                    finished_at REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_broker_jobs_queue ON broker_jobs (status, model, enqueued_at)"
+            )
+            self._schema_ready = True
+
+    def purge_expired(self) -> int:
+        """Elimina los resultados y cancelaciones que nadie leyó dentro de `result_ttl`"""
+        cursor = self._connect().execute(
+            "DELETE FROM broker_jobs WHERE status IN ('done', 'cancelled') AND finished_at < ?",
+            (time.time() - self.result_ttl,)
+        )
+        return cursor.rowcount
+
+    def enqueue(self, payload: Dict[str, Any]) -> None:
+        self.purge_expired()
+        self._connect().execute(
+            """
+            INSERT OR REPLACE INTO broker_jobs (job_id, model, payload, status, enqueued_at)
+            VALUES (?, ?, ?, 'queued', ?)
+            """,
+            (payload["job_id"], payload["model"], json.dumps(payload, ensure_ascii=False), time.time())
+        )
+
+    def _claim_once(self, models: List[str], worker_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        now = time.time()
+        placeholders = ",".join("?" for _ in models)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Los jobs de workers caídos vuelven a la cola
+            conn.execute(
+                "UPDATE broker_jobs SET status = 'queued', claimed_by = NULL, claimed_at = NULL "
+                "WHERE status = 'claimed' AND claimed_at < ?",
+                (now - self.claim_timeout,)
+            )
+            row = conn.execute(
+                f"SELECT job_id, payload FROM broker_jobs WHERE status = 'queued' AND model IN ({placeholders}) "
+                "ORDER BY enqueued_at LIMIT 1",
+                models
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE broker_jobs SET status = 'claimed', claimed_by = ?, claimed_at = ? WHERE job_id = ?",
+                    (worker_id, now, row["job_id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row["payload"]) if row else None
+
+    def claim(self, models: List[str], worker_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            payload = self._claim_once(models, worker_id)
+            if payload or time.monotonic() >= deadline:
+                return payload
+            time.sleep(self.poll_interval)
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._connect().execute(
+            "UPDATE broker_jobs SET status = 'done', result = ?, finished_at = ? WHERE job_id = ?",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+        )
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT result FROM broker_jobs WHERE job_id = ? AND status = 'done'", (job_id,)
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def acknowledge(self, job_id: str) -> None:
+        self._connect().execute("DELETE FROM broker_jobs WHERE job_id = ?", (job_id,))
+
+    def claimed_at(self, job_id: str) -> Optional[float]:
+        row = self._connect().execute(
+            "SELECT claimed_at FROM broker_jobs WHERE job_id = ? AND status = 'claimed'", (job_id,)
+        ).fetchone()
+        return row["claimed_at"] if row else None
+
+    def cancel(self, job_id: str) -> None:
+        self._connect().execute(
+            "UPDATE broker_jobs SET status = 'cancelled', finished_at = ? "
+            "WHERE job_id = ? AND status IN ('queued', 'claimed')",
+            (time.time(), job_id)
+        )
+
+    def is_cancelled(self, job_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM broker_jobs WHERE job_id = ? AND status = 'cancelled'", (job_id,)
+        ).fetchone()
+        return row is not None
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) AS total FROM broker_jobs GROUP BY status"
+        ).fetchall()
+        return {"backend": "sqlite", **{row["status"]: row["total"] for row in rows}}
+
+
+class RedisBroker(JobBroker):
+    """
+    Broker sobre Redis para workers en varias máquinas.
+
+    Recibe un cliente compatible con redis-py (`lpush`, `brpop`, `hset`, `hget`,
+    `hdel`, `hgetall`, `set`, `get`, `delete`, `exists`, `llen`) con
+    `decode_responses=True`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        prefix: str = "scraper",
+        claim_timeout: int = settings.BROKER_CLAIM_TIMEOUT,
+        result_ttl: int = settings.BROKER_RESULT_TTL
+    ):
+        super().__init__(claim_timeout, result_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _queue_key(self, model: str) -> str:
+        return f"{self.prefix}:queue:{model}"
+
+    @property
+    def _claimed_key(self) -> str:
+        return f"{self.prefix}:claimed"
+
+    def _result_key(self, job_id: str) -> str:
+        return f"{self.prefix}:result:{job_id}"
+
+    def _cancel_key(self, job_id: str) -> str:
+        return f"{self.prefix}:cancel:{job_id}"
+
+    def enqueue(self, payload: Dict[str, Any]) -> None:
+        self.client.lpush(self._queue_key(payload["model"]), json.dumps(payload, ensure_ascii=False))
+
+    def _requeue_expired(self) -> None:
+        """Devuelve a la cola los jobs reclamados por workers que no respondieron"""
+        now = time.time()
+        for job_id, raw in (self.client.hgetall(self._claimed_key) or {}).items():
+            claim = json.loads(raw)
+            if now - claim["claimed_at"] > self.claim_timeout and self.client.hdel(self._claimed_key, job_id):
+                self.enqueue(claim["payload"])
+                logger.warning(f"Job {job_id} devuelto a la cola: el worker {claim['worker']} no respondió")
+
+    def claim(self, models: List[str], worker_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        self._requeue_expired()
+        item = self.client.brpop([self._queue_key(model) for model in models], timeout=max(1, int(timeout)))
+        if not item:
+            return None
+        payload = json.loads(item[1])
+        if self.is_cancelled(payload["job_id"]):
+            return None
+        self.client.hset(
+            self._claimed_key,
+            payload["job_id"],
+            json.dumps({"worker": worker_id, "claimed_at": time.time(), "payload": payload}, ensure_ascii=False)
+        )
+        return payload
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self.client.set(self._result_key(job_id), json.dumps(result, ensure_ascii=False), ex=self.result_ttl)
+        self.client.hdel(self._claimed_key, job_id)
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._result_key(job_id))
+        return json.loads(raw) if raw else None
+
+    def acknowledge(self, job_id: str) -> None:
+        self.client.delete(self._result_key(job_id), self._cancel_key(job_id))
+
+    def claimed_at(self, job_id: str) -> Optional[float]:
+        raw = self.client.hget(self._claimed_key, job_id)
+        return json.loads(raw)["claimed_at"] if raw else None
+
+    def cancel(self, job_id: str) -> None:
+        self.client.set(self._cancel_key(job_id), "1", ex=self.result_ttl)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return bool(self.client.exists(self._cancel_key(job_id)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "queued": sum(self.client.llen(self._queue_key(model.value)) for model in ScraperModel),
+            "claimed": len(self.client.hgetall(self._claimed_key) or {})
+        }
+
+
+def build_broker(url: str = settings.BROKER_URL) -> JobBroker:
+    """
+    Crea el broker según la URL configurada
+
+    `sqlite:///ruta/al/archivo.db` usa SQLite; `redis://...` requiere el paquete `redis`.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("BROKER_URL usa Redis pero el paquete 'redis' no está instalado")
+        return RedisBroker(redis.Redis.from_url(url, decode_responses=True))
+    raise ValueError(f"BROKER_URL no soportada: {url}")
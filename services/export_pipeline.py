@@ -0,0 +1,148 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+from core.config import settings
+from core.logging import logger
+from core.notifications import notify_job_completion
+from models.jobs import ScrapingJob
+from services.sheets_service import sheets_service
+
+
+class ExportPipeline:
+    """
+    Etapa de post-proceso de los jobs: exportación a Google Sheets y notificación.
+
+    Corre en sus propios workers, separada de los workers de scraping: un job
+    entra aquí apenas tiene resultados y su worker de scraping queda libre. La
+    exportación se reintenta con backoff exponencial hasta `max_attempts`; la
+    notificación se entrega después por el despachador de webhooks, que aplica
+    sus propios reintentos.
+    """
+
+    def __init__(
+        self,
+        on_update: Callable[[ScrapingJob], None],
+        workers: int = settings.EXPORT_WORKERS,
+        max_attempts: int = settings.EXPORT_MAX_ATTEMPTS,
+        retry_backoff: float = settings.EXPORT_RETRY_BACKOFF
+    ):
+        self.on_update = on_update
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Dict[str, Tuple[asyncio.TimerHandle, ScrapingJob]] = {}
+        self._in_progress = 0
+        self.stats_counters = {"exported": 0, "failed": 0, "retries": 0}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Post-proceso iniciado con {self.workers} workers")
+
+    async def stop(self, timeout: float = settings.QUEUE_DRAIN_TIMEOUT) -> None:
+        """Espera las exportaciones pendientes hasta `timeout` y detiene los workers"""
+        deadline = time.time() + timeout
+        while (self._retries or self._pending()) and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Lo que no alcanzó a exportarse queda como error para no dejar jobs esperando
+        abandoned = [job for _, job in self._retries.values()]
+        for handle, _ in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        while not self._queue.empty():
+            abandoned.append(self._queue.get_nowait())
+        for job in abandoned:
+            job.export_error = "Servicio detenido antes de exportar el trabajo"
+            self._complete(job, "error")
+
+    def _pending(self) -> int:
+        return (self._queue.qsize() if self._queue else 0) + self._in_progress
+
+    def submit(self, job: ScrapingJob) -> None:
+        """Encola la exportación del job (no bloquea al worker de scraping)"""
+        job.export_attempts = 0
+        job.export_error = None
+        if not job.results:
+            self._complete(job, "skipped")
+            return
+        job.export_status = "pending"
+        self._queue.put_nowait(job)
+        self.on_update(job)
+
+    def _complete(self, job: ScrapingJob, status: str) -> None:
+        job.export_status = status
+        job.exported.set()
+        self.on_update(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._in_progress += 1
+            try:
+                await self._export(job)
+            except asyncio.CancelledError:
+                job.export_error = "Servicio detenido durante la exportación"
+                self._complete(job, "error")
+                raise
+            except Exception as e:
+                logger.error(f"Error inesperado exportando job {job.job_id}: {str(e)}")
+            finally:
+                self._in_progress -= 1
+                self._queue.task_done()
+
+    async def _export(self, job: ScrapingJob) -> None:
+        job.export_attempts += 1
+        job.export_status = "exporting"
+        self.on_update(job)
+        try:
+            if not job.sheet_url:
+                success, sheet_url = await sheets_service.save_job_results(job)
+                if not success:
+                    raise RuntimeError("No se pudieron guardar los resultados en Google Sheets")
+                job.sheet_url = sheet_url
+
+            notify_job_completion(
+                job_id=job.job_id,
+                webhook_url=job.webhook,
+                sheet_url=job.sheet_url,
+                email=job.email
+            )
+
+            self.stats_counters["exported"] += 1
+            self._complete(job, "completed")
+
+        except Exception as e:
+            job.export_error = str(e)
+            if job.export_attempts >= self.max_attempts:
+                logger.error(f"Exportación del job {job.job_id} fallida tras {job.export_attempts} intentos: {str(e)}")
+                self.stats_counters["failed"] += 1
+                self._complete(job, "error")
+                return
+
+            delay = self.retry_backoff * 2 ** (job.export_attempts - 1)
+            logger.warning(f"Exportación del job {job.job_id} fallida ({str(e)}); reintento en {delay:.1f}s")
+            self.stats_counters["retries"] += 1
+            job.export_status = "retrying"
+            self.on_update(job)
+            handle = asyncio.get_running_loop().call_later(delay, self._retry, job)
+            self._retries[job.job_id] = (handle, job)
+
+    def _retry(self, job: ScrapingJob) -> None:
+        self._retries.pop(job.job_id, None)
+        self._queue.put_nowait(job)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_progress": self._in_progress,
+            "retrying": len(self._retries),
+            **self.stats_counters
+        }
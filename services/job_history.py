@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Any
+import csv
+import glob
+import statistics
+import threading
+from core.config import settings
+from core.logging import logger
+
+
+class JobHistory:
+    """
+    Historial móvil de duraciones y cantidad de artículos por (modelo, categoría).
+
+    Se usa para estimar la duración de los jobs en cola. Al iniciar se siembra con
+    los resultados de benchmark disponibles en `outputs/`.
+    """
+
+    def __init__(self, window: int = settings.JOB_HISTORY_WINDOW):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: Any, category: str) -> Tuple[str, str]:
+        model = getattr(model, "value", model)
+        return str(model).lower(), category.strip().lower()
+
+    def record(self, model: Any, category: str, duration: float, articles_count: int) -> None:
+        """Registra la duración de un job completado"""
+        key = self._key(model, category)
+        with self._lock:
+            samples = self._samples.setdefault(key, deque(maxlen=self.window))
+            samples.append((float(duration), int(articles_count)))
+
+    def seed_from_benchmarks(self, pattern: str = settings.JOB_HISTORY_SEED_GLOB) -> int:
+        """Carga los resultados completados de los CSV de benchmark; retorna cuántos cargó"""
+        loaded = 0
+        for path in sorted(glob.glob(pattern)):
+            try:
+                with open(path, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        # Los benchmarks sin duración válida no aportan a la estimación
+                        if row.get("status") != "completed" or float(row["duration"]) <= 0:
+                            continue
+                        self.record(
+                            row["model"],
+                            row["category"],
+                            float(row["duration"]),
+                            int(row.get("articles_count") or 0)
+                        )
+                        loaded += 1
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"No se pudo leer el historial de {path}: {e}")
+        return loaded
+
+    def expected_duration(self, model: Any, category: str) -> float:
+        """
+        Duración esperada de un job
+
+        Usa la mediana del par (modelo, categoría); si no hay historial, la mediana
+        del modelo y en último caso `JOB_DEFAULT_DURATION`.
+        """
+        key = self._key(model, category)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples:
+                return statistics.median(duration for duration, _ in samples)
+
+            model_samples = [
+                duration
+                for (sample_model, _), values in self._samples.items()
+                if sample_model == key[0]
+                for duration, _ in values
+            ]
+        if model_samples:
+            return statistics.median(model_samples)
+        return float(settings.JOB_DEFAULT_DURATION)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                f"{model}/{category}": {
+                    "samples": len(values),
+                    "median_duration": round(statistics.median(d for d, _ in values), 2),
+                    "median_articles": statistics.median(a for _, a in values)
+                }
+                for (model, category), values in self._samples.items()
+            }
+
+
+job_history = JobHistory()
+job_history.seed_from_benchmarks()
@@ -0,0 +1,89 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import asyncio
+import time
+from core.config import settings
+from core.logging import logger
+from models.requests import ScraperModel
+from scrappers.job_checkpoint import JobCheckpoint
+from services.scraper_factory import ScraperFactory
+
+
+class ScrapingOutcome(NamedTuple):
+    """Resultado de ejecutar un scraper: estado, artículos, error y checkpoint para reanudar"""
+    status: str
+    results: List[Dict[str, Any]]
+    error: Optional[str]
+    checkpoint: Optional[Dict[str, Any]] = None
+
+
+async def run_scraping(
+    scraper_factory: ScraperFactory,
+    model: ScraperModel,
+    category: str,
+    job_id: str,
+    checkpoint: Optional[Dict[str, Any]] = None,
+    on_cancel: Optional[Callable[[ScrapingOutcome], None]] = None
+) -> ScrapingOutcome:
+    """
+    Ejecuta el scraper del modelo con el tiempo límite de un job
+
+    Se usa tanto desde el proceso de la API como desde los workers externos.
+    Ante un timeout retorna los resultados parciales del scraper. Con `checkpoint`
+    (de una ejecución anterior) solo se descargan los artículos que faltan. Si la
+    ejecución se cancela, `on_cancel` recibe lo avanzado antes de propagar la cancelación.
+    """
+    try:
+        scraper = scraper_factory.get_scraper(model)
+        scraper.checkpoint = JobCheckpoint.from_dict(checkpoint)
+
+        async def do_scraping():
+            if hasattr(scraper, 'scrape_async'):
+                return await scraper.scrape_async(category)
+            else:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, scraper.scrape, category)
+
+        limit = settings.MAX_TIMEOUT - 1
+        started = time.monotonic()
+        try:
+            results = await asyncio.wait_for(do_scraping(), timeout=limit)
+            results = results if results else []
+            if time.monotonic() - started >= limit:
+                # El scraper absorbió la cancelación del timeout y retornó lo que alcanzó a descargar
+                logger.warning(f"Timeout en job {job_id}. Artículos: {len(results)}")
+                return ScrapingOutcome(
+                    "partial",
+                    results,
+                    "Timeout: se devuelven resultados parciales",
+                    scraper.checkpoint.to_dict(results)
+                )
+            return ScrapingOutcome("completed", results, None, scraper.checkpoint.to_dict(results))
+
+        except asyncio.CancelledError:
+            # Propaga la cancelación a los threads del scraper (Selenium, executor)
+            scraper.cancel()
+            logger.info(f"Job {job_id} cancelado")
+            if on_cancel:
+                results = [article for article in list(getattr(scraper, 'partial_results', None) or []) if article]
+                on_cancel(ScrapingOutcome("partial", results, None, scraper.checkpoint.to_dict(results)))
+            raise
+
+        except asyncio.TimeoutError:
+            if hasattr(scraper, 'get_partial_results'):
+                results = await scraper.get_partial_results()
+            elif hasattr(scraper, 'partial_results'):
+                results = scraper.partial_results
+            else:
+                results = []
+            logger.warning(f"Timeout en job {job_id}. Artículos: {len(results) if results else 0}")
+            results = results or []
+            return ScrapingOutcome(
+                "partial",
+                results,
+                "Timeout: se devuelven resultados parciales",
+                scraper.checkpoint.to_dict(results)
+            )
+
+    except Exception as e:
+        logger.error(f"Error procesando job {job_id}: {str(e)}")
+        return ScrapingOutcome("error", [], str(e))
@@ -0,0 +1,270 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+from core.config import settings
+
+FINISHED_STATUSES = ("completed", "partial", "error", "cancelled")
+
+
+def _expired_job_ids(records: List[Dict[str, Any]], max_age: float, max_count: int) -> List[str]:
+    """Jobs terminados que exceden la antigüedad máxima o la cantidad máxima a conservar"""
+    cutoff = time.time() - max_age
+    finished = sorted(
+        (record for record in records if record["status"] in FINISHED_STATUSES),
+        key=lambda record: record["queued_at"],
+        reverse=True
+    )
+    return [
+        record["job_id"]
+        for index, record in enumerate(finished)
+        if index >= max_count or (record.get("end_time") or record["queued_at"]) < cutoff
+    ]
+
+
+class JobStateBackend:
+    """
+    Backend del estado de los jobs que leen los endpoints de estado.
+
+    Cada proceso de la API publica aquí el registro de sus jobs (`ScrapingJob.to_record`);
+    con un backend compartido, cualquier worker de uvicorn responde por cualquier job.
+    Los backends persistentes (`durable`) permiten liberar de memoria los jobs terminados.
+    Los artículos no viajan en el registro: se leen del almacén de resultados (`results_ref`).
+    Cada proceso registra además un latido para que los demás detecten sus jobs huérfanos.
+    """
+
+    durable = False
+
+    def publish(self, record: Dict[str, Any]) -> None:
+        """Guarda o reemplaza el registro de un job"""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_records(self) -> List[Dict[str, Any]]:
+        """Registros de todos los jobs en orden de llegada"""
+        raise NotImplementedError
+
+    def prune(self, max_age: float, max_count: int) -> List[str]:
+        """Elimina los jobs terminados fuera de la retención y retorna sus ids"""
+        raise NotImplementedError
+
+    def heartbeat(self, owner: str) -> None:
+        """Registra que el proceso `owner` sigue vivo"""
+        raise NotImplementedError
+
+    def owners(self) -> Dict[str, float]:
+        """Último latido de cada proceso registrado"""
+        raise NotImplementedError
+
+    def remove_owner(self, owner: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryJobState(JobStateBackend):
+    """Estado local del proceso (solo válido con un worker de uvicorn y sin persistencia)"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._owners: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records[record["job_id"]] = record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._records.get(job_id)
+
+    def list_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self._records.values(), key=lambda record: record["queued_at"])
+
+    def prune(self, max_age: float, max_count: int) -> List[str]:
+        with self._lock:
+            expired = _expired_job_ids(list(self._records.values()), max_age, max_count)
+            for job_id in expired:
+                del self._records[job_id]
+        return expired
+
+    def heartbeat(self, owner: str) -> None:
+        with self._lock:
+            self._owners[owner] = time.time()
+
+    def owners(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._owners)
+
+    def remove_owner(self, owner: str) -> None:
+        with self._lock:
+            self._owners.pop(owner, None)
+
+
+class SQLiteJobState(JobStateBackend):
+    """
+    Almacén persistente de jobs en SQLite (WAL), compartido por los procesos de un host.
+    """
+
+    durable = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    queued_at REAL NOT NULL,
+                    end_time REAL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queued_at ON jobs (queued_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS owners (
+                    owner TEXT PRIMARY KEY,
+                    seen REAL NOT NULL
+                )
+            """)
+            self._schema_ready = True
+
+    def publish(self, record: Dict[str, Any]) -> None:
+        self._connect().execute(
+            """
+            INSERT OR REPLACE INTO jobs (job_id, status, queued_at, end_time, updated_at, data)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                record["job_id"],
+                record["status"],
+                record["queued_at"],
+                record.get("end_time"),
+                time.time(),
+                json.dumps(record, ensure_ascii=False)
+            )
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_records(self) -> List[Dict[str, Any]]:
+        rows = self._connect().execute("SELECT data FROM jobs ORDER BY queued_at").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def prune(self, max_age: float, max_count: int) -> List[str]:
+        conn = self._connect()
+        placeholders = ",".join("?" for _ in FINISHED_STATUSES)
+        expired = [
+            row[0] for row in conn.execute(
+                f"""
+                SELECT job_id FROM jobs
+                WHERE status IN ({placeholders})
+                  AND (COALESCE(end_time, queued_at) < ? OR job_id NOT IN (
+                      SELECT job_id FROM jobs WHERE status IN ({placeholders})
+                      ORDER BY queued_at DESC LIMIT ?
+                  ))
+                """,
+                (*FINISHED_STATUSES, time.time() - max_age, *FINISHED_STATUSES, max_count)
+            ).fetchall()
+        ]
+        if expired:
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in expired])
+            conn.execute("COMMIT")
+        return expired
+
+    def heartbeat(self, owner: str) -> None:
+        self._connect().execute("INSERT OR REPLACE INTO owners (owner, seen) VALUES (?, ?)", (owner, time.time()))
+
+    def owners(self) -> Dict[str, float]:
+        return dict(self._connect().execute("SELECT owner, seen FROM owners").fetchall())
+
+    def remove_owner(self, owner: str) -> None:
+        self._connect().execute("DELETE FROM owners WHERE owner = ?", (owner,))
+
+
+class RedisJobState(JobStateBackend):
+    """
+    Estado compartido en Redis para procesos de la API en varias máquinas.
+
+    Recibe un cliente compatible con redis-py (`hset`, `hget`, `hvals`, `hgetall`,
+    `hdel`) con `decode_responses=True`.
+    """
+
+    durable = True
+
+    def __init__(self, client: Any, prefix: str = "scraper"):
+        self.client = client
+        self.key = f"{prefix}:jobs"
+        self.owners_key = f"{prefix}:owners"
+
+    def publish(self, record: Dict[str, Any]) -> None:
+        self.client.hset(self.key, record["job_id"], json.dumps(record, ensure_ascii=False))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hget(self.key, job_id)
+        return json.loads(raw) if raw else None
+
+    def list_records(self) -> List[Dict[str, Any]]:
+        records = [json.loads(raw) for raw in self.client.hvals(self.key) or []]
+        return sorted(records, key=lambda record: record["queued_at"])
+
+    def prune(self, max_age: float, max_count: int) -> List[str]:
+        expired = _expired_job_ids(self.list_records(), max_age, max_count)
+        if expired:
+            self.client.hdel(self.key, *expired)
+        return expired
+
+    def heartbeat(self, owner: str) -> None:
+        self.client.hset(self.owners_key, owner, time.time())
+
+    def owners(self) -> Dict[str, float]:
+        return {owner: float(seen) for owner, seen in (self.client.hgetall(self.owners_key) or {}).items()}
+
+    def remove_owner(self, owner: str) -> None:
+        self.client.hdel(self.owners_key, owner)
+
+
+def build_job_state(url: str = settings.JOB_STATE_URL) -> JobStateBackend:
+    """
+    Crea el backend de estado según la URL configurada
+
+    `sqlite:///ruta/al/archivo.db` (por defecto), `memory://` o `redis://...`
+    (requiere el paquete `redis`).
+    """
+    if url.startswith("memory://"):
+        return InMemoryJobState()
+    if url.startswith("sqlite:///"):
+        return SQLiteJobState(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("JOB_STATE_URL usa Redis pero el paquete 'redis' no está instalado")
+        return RedisJobState(redis.Redis.from_url(url, decode_responses=True))
+    raise ValueError(f"JOB_STATE_URL no soportada: {url}")
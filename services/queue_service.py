@@ -1,26 +1,328 @@
 from collections import deque
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
+from datetime import datetime
+import heapq
 import asyncio
-from asyncio import Semaphore, TimeoutError
+from asyncio import TimeoutError
+import os
+import socket
 import time
+import uuid
 from core.logging import logger
-from models.jobs import ScrapingJob
+from core.exceptions import JobNotCancellableException, JobNotResumableException, QueueFullException
+from models.jobs import ScrapingJob, job_response
 from models.requests import ScraperModel
 from services.scraper_factory import ScraperFactory
 from core.config import settings
-from core.notifications import notify_job_completion
-from services.sheets_service import sheets_service
+from core.notifications import webhook_dispatcher
+from services.export_pipeline import ExportPipeline
+from services.job_history import job_history
+from services.job_runner import ScrapingOutcome, run_scraping
+from services.broker import JobBroker, build_broker
+from services.job_state import FINISHED_STATUSES, build_job_state
+from services.result_store import merge_articles, result_store
+from scrappers.article_cache import article_cache
+from scrappers.listing_cache import listing_cache
+
+ALL_CATEGORIES = "todas las categorias"
 
 class QueueService:
     def __init__(self):
         self.queue: deque = deque()
+        # Jobs terminados en memoria (solo con el backend memory://; si no, se leen del almacén)
         self.results: Dict[str, ScrapingJob] = {}
-        self._model_semaphores: Dict[ScraperModel, Semaphore] = {
-            ScraperModel.BASE: Semaphore(1),
-            ScraperModel.OPTIMIZED: Semaphore(1),
-            ScraperModel.ULTRA: Semaphore(1)
-        }
         self.scraper_factory = ScraperFactory()
+        # Estado publicado para los endpoints de estado (compartido entre procesos si no es memory://)
+        self.state = build_job_state()
+        # Dueño de los registros que publica este proceso (el pid se repite entre reinicios de un contenedor)
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Último registro pendiente de publicar por job y la tarea que los escribe en orden
+        self._unpublished: Dict[str, Tuple[ScrapingJob, Dict[str, Any]]] = {}
+        self._publisher: Optional[asyncio.Task] = None
+        # En modo broker los jobs se ejecutan en workers externos (worker.py)
+        self.broker: Optional[JobBroker] = (
+            build_broker() if settings.EXECUTION_MODE == "broker" else None
+        )
+        # Último job líder por (categoría, modelo) para coalescer solicitudes iguales
+        self._leaders: Dict[Tuple[str, ScraperModel], ScrapingJob] = {}
+        # Scheduler: workers por modelo que despachan desde la cola
+        self._workers: List[asyncio.Task] = []
+        # Tareas auxiliares: jobs coalescidos esperando a su líder y unión de jobs hijos
+        self._tasks: set = set()
+        # Scraping en curso por job, para poder cancelarlo
+        self._running: Dict[str, asyncio.Task] = {}
+        # Scraping en curso de un job cancelado que heredó uno de sus followers
+        self._handoffs: Dict[str, ScrapingJob] = {}
+        # Avance de los scrapings interrumpidos por el apagado, para poder reanudarlos
+        self._interrupted: Dict[str, ScrapingOutcome] = {}
+        self._job_available: Dict[ScraperModel, asyncio.Condition] = {}
+        self._retention_task: Optional[asyncio.Task] = None
+        # Post-proceso: exportación y notificación fuera de los workers de scraping
+        self.exporter = ExportPipeline(on_update=self._publish)
+        self._accepting = False
+        self._draining = False
+
+    async def start(self) -> None:
+        """Inicia los workers de cada modelo (se llama desde el lifespan de la app)"""
+        if self._workers:
+            return
+        self._accepting = True
+        self._draining = False
+        for model in ScraperModel:
+            self._job_available[model] = asyncio.Condition()
+            for index in range(self._worker_count(model)):
+                self._workers.append(
+                    asyncio.create_task(self._worker(model), name=f"worker-{model.value}-{index}")
+                )
+        self._retention_task = asyncio.create_task(self._retention_loop())
+        await self._heartbeat()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        await self.exporter.start()
+        logger.info(f"Scheduler iniciado con {len(self._workers)} workers")
+
+    async def stop(self, timeout: float = settings.QUEUE_DRAIN_TIMEOUT) -> None:
+        """
+        Drena la cola antes de apagar
+
+        Deja de aceptar jobs, espera a que los workers terminen los jobs encolados
+        hasta `timeout` segundos y cancela los que sigan pendientes. Los jobs en
+        curso que se cancelan quedan como partial (con su checkpoint) o error.
+        """
+        self._accepting = False
+        self._draining = True
+        for condition in self._job_available.values():
+            async with condition:
+                condition.notify_all()
+
+        if self._workers:
+            done, running = await asyncio.wait(self._workers, timeout=timeout)
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+                logger.warning(f"Drenaje incompleto: {len(running)} workers cancelados")
+
+        for job in [
+            job for job in self.queue
+            if job.status == "pending" and not job.coalesced_with and not job.children
+        ]:
+            job.status = "error"
+            job.error = "Servicio detenido antes de procesar el trabajo"
+            job.end_time = time.time()
+            self._finish(job)
+
+        await self.exporter.stop(timeout)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._flush_publications()
+        if self._retention_task:
+            self._retention_task.cancel()
+            self._retention_task = None
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+            try:
+                # Todos los jobs de este proceso ya terminaron: no queda nada que reconciliar
+                await asyncio.to_thread(self.state.remove_owner, self.instance_id)
+            except Exception as e:
+                logger.warning(f"No se pudo quitar el latido del proceso: {str(e)}")
+        self._workers = []
+        logger.info("Scheduler detenido")
+
+    async def _retention_loop(self) -> None:
+        """Aplica periódicamente la retención de jobs terminados"""
+        while True:
+            try:
+                expired = await asyncio.to_thread(
+                    self.state.prune,
+                    settings.JOB_RETENTION_MAX_AGE,
+                    settings.JOB_RETENTION_MAX_COUNT
+                )
+                for job_id in expired:
+                    self.results.pop(job_id, None)
+                if expired:
+                    logger.info(f"Retención: {len(expired)} jobs terminados eliminados")
+                referenced = await self._referenced_results()
+                await asyncio.to_thread(result_store.sweep, referenced, settings.JOB_RETENTION_INTERVAL)
+            except Exception as e:
+                logger.warning(f"Error aplicando la retención de jobs: {str(e)}")
+            await asyncio.sleep(settings.JOB_RETENTION_INTERVAL)
+
+    async def _heartbeat(self) -> None:
+        """Registra el latido de este proceso y cierra los jobs huérfanos de procesos caídos"""
+        try:
+            await asyncio.to_thread(self.state.heartbeat, self.instance_id)
+            orphaned = await asyncio.to_thread(self._reconcile_orphans)
+            if orphaned:
+                logger.warning(f"{orphaned} jobs huérfanos de procesos detenidos cerrados")
+        except Exception as e:
+            logger.warning(f"Error registrando el latido del proceso: {str(e)}")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.STATE_HEARTBEAT_INTERVAL)
+            await self._heartbeat()
+
+    def _reconcile_orphans(self) -> int:
+        """
+        Cierra los jobs pendientes o en curso cuyo proceso dejó de latir
+
+        Tras una caída o un reinicio sus registros quedarían como pending/processing
+        para siempre (la retención solo elimina jobs terminados). Quedan como partial
+        si alcanzaron a guardar artículos y si no como error. Los registros sin dueño
+        son de versiones anteriores y se tratan igual.
+
+        Returns:
+            int: cantidad de jobs cerrados
+        """
+        now = time.time()
+        owners = self.state.owners()
+        live = {owner for owner, seen in owners.items() if now - seen < settings.STATE_OWNER_TIMEOUT}
+        live.add(self.instance_id)
+        orphaned = [
+            record for record in self.state.list_records()
+            if record["status"] in ("pending", "processing") and record.get("owner") not in live
+        ]
+        for record in orphaned:
+            record["status"] = "partial" if record.get("articles_count") else "error"
+            record["error"] = "El proceso que ejecutaba el trabajo se detuvo antes de terminarlo"
+            record["end_time"] = now
+            self.state.publish(record)
+        for owner in owners.keys() - live:
+            self.state.remove_owner(owner)
+        return len(orphaned)
+
+    async def _referenced_results(self) -> set:
+        """Resultados que algún job conservado todavía referencia"""
+        records = await asyncio.to_thread(self.state.list_records)
+        referenced = {record.get("results_ref") for record in records}
+        referenced.update(getattr(job.results, "job_id", None) for job in [*self.queue, *self.results.values()])
+        return referenced
+
+    def _finish(self, job: ScrapingJob) -> None:
+        """
+        Cierra un job terminado: lo saca de la cola y publica su estado final
+
+        Con un backend persistente el job deja la memoria cuando su estado final
+        queda publicado (ver `_publish_pending`); las consultas posteriores leen sus
+        artículos desde el almacén. Si no se pudo publicar se conserva en memoria.
+        """
+        if job in self.queue:
+            self.queue.remove(job)
+        job.finished.set()
+        self.results[job.job_id] = job
+        self._publish(job)
+
+        key = self._coalesce_key(job)
+        if self._leaders.get(key) is job and not settings.JOB_COALESCE_WINDOW:
+            del self._leaders[key]
+
+    @staticmethod
+    def _worker_count(model: ScraperModel) -> int:
+        return max(1, int(settings.QUEUE_WORKERS.get(model.value, 1)))
+
+    def _pending_for(self, model: ScraperModel) -> List[ScrapingJob]:
+        """Jobs pendientes que ocupan un worker (los coalescidos y los padres divididos no)"""
+        return [
+            job for job in self.queue
+            if job.model == model and job.status == "pending"
+            and not job.coalesced_with and not job.children
+        ]
+
+    @staticmethod
+    def _dispatch_key(job: ScrapingJob, now: float) -> Tuple[float, ...]:
+        """
+        Orden de despacho: mayor prioridad primero; luego FIFO o el job esperado
+        más corto, descontando el tiempo en cola para que los largos no esperen indefinidamente
+        """
+        if settings.QUEUE_POLICY == "fifo":
+            return (-job.priority, job.queued_at)
+        expected = job_history.expected_duration(job.model, job.category)
+        waited = now - job.queued_at
+        return (-job.priority, expected - settings.QUEUE_AGING_FACTOR * waited, job.queued_at)
+
+    def _ordered_pending(self, model: ScraperModel) -> List[ScrapingJob]:
+        now = time.time()
+        return sorted(self._pending_for(model), key=lambda job: self._dispatch_key(job, now))
+
+    def _select_next(self, model: ScraperModel) -> Optional[ScrapingJob]:
+        """Elige el siguiente job del modelo según la política de despacho"""
+        pending = self._ordered_pending(model)
+        return pending[0] if pending else None
+
+    def _forecast(self, model: ScraperModel) -> Dict[str, Tuple[float, float]]:
+        """
+        Estima inicio y fin de los jobs pendientes de un modelo
+
+        Simula el despacho en el orden actual sobre los workers del modelo, partiendo
+        del tiempo restante esperado de los jobs en curso.
+
+        Returns:
+            dict: job_id -> (inicio estimado, fin estimado) en epoch
+        """
+        now = time.time()
+        running = [
+            job for job in self.queue
+            if job.model == model and job.status == "processing" and not job.coalesced_with
+        ]
+        free_at = [
+            now + max(0.0, job_history.expected_duration(job.model, job.category) - (now - (job.start_time or now)))
+            for job in running
+        ]
+        free_at += [now] * max(0, self._worker_count(model) - len(free_at))
+        heapq.heapify(free_at)
+
+        forecast = {}
+        for job in self._ordered_pending(model):
+            start = heapq.heappop(free_at)
+            end = start + job_history.expected_duration(job.model, job.category)
+            forecast[job.job_id] = (start, end)
+            heapq.heappush(free_at, end)
+        return forecast
+
+    def get_job_forecast(self, job: ScrapingJob) -> Dict[str, Any]:
+        """
+        Inicio estimado y ETA de un job en cola
+
+        Los coalescidos usan los de su líder y los padres divididos los de sus hijos pendientes.
+        """
+        target = self.get_job_status(job.coalesced_with) if job.coalesced_with else job
+        if not target:
+            return {}
+        forecast = self._forecast(target.model)
+        if target.children:
+            estimates = [forecast[child.job_id] for child in target.children if child.job_id in forecast]
+        elif target.status == "pending" and target.job_id in forecast:
+            estimates = [forecast[target.job_id]]
+        else:
+            estimates = []
+        if not estimates:
+            return {}
+        start = min(begin for begin, _ in estimates)
+        end = max(finish for _, finish in estimates)
+        return {
+            "predicted_start": datetime.fromtimestamp(start).isoformat(timespec="seconds"),
+            "eta": datetime.fromtimestamp(end).isoformat(timespec="seconds")
+        }
+
+    async def _worker(self, model: ScraperModel) -> None:
+        """Toma jobs del modelo en orden hasta que la cola se drena"""
+        condition = self._job_available[model]
+        while True:
+            async with condition:
+                await condition.wait_for(
+                    lambda: self._pending_for(model) or self._draining
+                )
+                job = self._select_next(model)
+                if job is None:
+                    return
+                # Reservar el job antes de soltar el lock para que otro worker no lo tome
+                job.status = "processing"
+            await self.process_job(job)
+
+    def _backlog_size(self) -> int:
+        return sum(len(self._pending_for(model)) for model in ScraperModel)
 
     def _force_partial_if_timeout(self, job: ScrapingJob) -> None:
         """Fuerza el estado partial si se excede el tiempo"""
@@ -34,89 +336,562 @@ class QueueService:
             job.error = f"Timeout: se devuelven resultados parciales (duración: {duration:.2f}s)"
             logger.warning(f"Job {job.job_id} forzado a partial por duración: {duration:.2f}s")
 
+    @staticmethod
+    def _coalesce_key(job: ScrapingJob) -> Tuple[str, ScraperModel]:
+        return job.category.strip().lower(), job.model
+
+    def _find_leader(self, job: ScrapingJob) -> Optional[ScrapingJob]:
+        """Busca un job igual pendiente, en curso o completado dentro de la ventana de frescura"""
+        if not settings.JOB_COALESCING_ENABLED:
+            return None
+        leader = self._leaders.get(self._coalesce_key(job))
+        if not leader:
+            return None
+        if leader.status in ["pending", "processing"]:
+            return leader
+        if (
+            leader.status == "completed"
+            and leader.end_time
+            and time.time() - leader.end_time < settings.JOB_COALESCE_WINDOW
+        ):
+            return leader
+        return None
+
+    def _spawn(self, coroutine) -> None:
+        """Lanza una tarea auxiliar manteniendo la referencia hasta que termine"""
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _notify_worker(self, model: ScraperModel) -> None:
+        condition = self._job_available[model]
+        async with condition:
+            condition.notify()
+
+    def _split(self, job: ScrapingJob) -> List[ScrapingJob]:
+        """Divide "todas las categorias" en un job hijo por categoría"""
+        if (
+            not settings.JOB_SPLIT_ALL_CATEGORIES
+            or job.parent_id
+            or job.category.strip().lower() != ALL_CATEGORIES
+        ):
+            return []
+        return [
+            ScrapingJob(
+                job_id=f"{job.job_id}:{category.replace(' ', '-')}",
+                category=category,
+                model=job.model,
+                priority=job.priority,
+                parent_id=job.job_id
+            )
+            for category in sorted(settings.VALID_CATEGORIES - {ALL_CATEGORIES})
+        ]
+
+    def _publish(self, job: ScrapingJob) -> None:
+        """
+        Publica el estado del job (y el progreso de su padre) en el backend de estado
+
+        No bloquea el loop: el registro queda pendiente y una tarea lo escribe en un
+        thread. Si el job cambia antes de escribirse solo se publica su último estado.
+        """
+        for published in [job, self.get_job_status(job.parent_id) if job.parent_id else None]:
+            if published:
+                self._unpublished[published.job_id] = (published, {**published.to_record(), "owner": self.instance_id})
+        if self._publisher is None or self._publisher.done():
+            self._publisher = asyncio.create_task(self._publish_pending())
+
+    async def _publish_pending(self) -> None:
+        """Escribe en orden los registros pendientes; con backend persistente libera los jobs terminados"""
+        while self._unpublished:
+            job_id = next(iter(self._unpublished))
+            job, record = self._unpublished.pop(job_id)
+            try:
+                await asyncio.to_thread(self.state.publish, record)
+            except Exception as e:
+                logger.error(f"No se pudo publicar el estado del job {job_id}: {str(e)}")
+                continue
+            if (
+                self.state.durable
+                and job.finished.is_set()
+                and job_id not in self._unpublished
+                and self.results.get(job_id) is job
+            ):
+                del self.results[job_id]
+
+    async def _flush_publications(self) -> None:
+        """Espera a que se escriban los registros pendientes"""
+        while self._publisher is not None and not self._publisher.done():
+            await asyncio.shield(self._publisher)
+
+    def _mark_processing(self, job: ScrapingJob, start: float) -> None:
+        job.start_time = start
+        job.status = "processing"
+        self._publish(job)
+        for follower in job.followers:
+            follower.status = "processing"
+            follower.start_time = start
+            self._publish(follower)
+
+    async def _reduce_children(self, job: ScrapingJob) -> None:
+        """Espera a los jobs hijos y une sus resultados en el job padre"""
+        try:
+            await asyncio.gather(*(child.finished.wait() for child in job.children))
+            if job.status == "cancelled":
+                job.end_time = time.time()
+                return
+            job.results = await asyncio.to_thread(
+                result_store.write,
+                job.job_id,
+                (article for child in job.children for article in (child.results or []))
+            )
+            incomplete = [child.category for child in job.children if child.status != "completed"]
+            if not incomplete:
+                job.status = "completed"
+            elif job.results:
+                job.status = "partial"
+                job.error = f"Categorías con resultados incompletos: {', '.join(incomplete)}"
+            else:
+                job.status = "error"
+                job.error = "Ninguna categoría terminó correctamente"
+
+            child_starts = [child.start_time for child in job.children if child.start_time]
+            job.start_time = job.start_time or (min(child_starts) if child_starts else None)
+            job.end_time = time.time()
+            logger.info(f"Job {job.job_id} unido desde {len(job.children)} categorías: {len(job.results)} artículos")
+
+            self.exporter.submit(job)
+        except Exception as e:
+            logger.error(f"Error uniendo resultados del job {job.job_id}: {str(e)}")
+            job.status = "error"
+            job.error = str(e)
+            job.end_time = time.time()
+        finally:
+            self._finish(job)
+
+    async def _enqueue_child(self, child: ScrapingJob) -> None:
+        """Encola un job hijo; si ya hay un job igual en curso se coalesce con él"""
+        leader = self._find_leader(child)
+        if leader:
+            self._attach_to_leader(child, leader)
+        else:
+            self._leaders[self._coalesce_key(child)] = child
+        self.queue.append(child)
+        self._publish(child)
+        if leader:
+            self._spawn(self._follow_leader(child, leader))
+        else:
+            await self._notify_worker(child.model)
+
+    @staticmethod
+    def _attach_to_leader(job: ScrapingJob, leader: ScrapingJob) -> None:
+        job.coalesced_with = leader.job_id
+        if leader.status == "processing":
+            job.status = "processing"
+            job.start_time = leader.start_time
+        leader.followers.append(job)
+        logger.info(f"Job {job.job_id} coalescido con job {leader.job_id} ({job.category}, {job.model})")
+
+    async def _follow_leader(self, job: ScrapingJob, leader: ScrapingJob) -> None:
+        """
+        Espera la ejecución del job líder y comparte sus resultados con el job coalescido
+
+        Si el líder se cancela, su ejecución pasa al follower más antiguo (ver `_promote`):
+        ese job deja de seguir a nadie y los demás pasan a seguirlo a él.
+        """
+        promoted = False
+        try:
+            await leader.finished.wait()
+            while job.coalesced_with and job.coalesced_with != leader.job_id:
+                leader = self.get_job_status(job.coalesced_with)
+                await leader.finished.wait()
+            if not job.coalesced_with:
+                # Ahora el job lleva la ejecución y termina por su cuenta
+                promoted = True
+                return
+            if job.status == "cancelled":
+                return
+            job.status = leader.status
+            job.results = leader.results
+            job.error = leader.error
+            job.start_time = leader.start_time
+            job.end_time = leader.end_time
+
+            if leader.export_status:
+                # El scraping ya terminó; la exportación del líder sigue en el post-proceso
+                job.export_status = "pending"
+                self._publish(job)
+                await leader.exported.wait()
+                job.sheet_url = leader.sheet_url
+                if job.sheet_url:
+                    # Cada job notifica a su propio webhook/email con la hoja compartida
+                    self.exporter.submit(job)
+                else:
+                    job.export_status = leader.export_status
+                    job.export_error = leader.export_error
+                    job.exported.set()
+        except Exception as e:
+            logger.error(f"Error en job coalescido {job.job_id}: {str(e)}")
+            job.status = "error"
+            job.error = str(e)
+            job.end_time = time.time()
+        finally:
+            if not promoted:
+                self._finish(job)
+
+    async def _run_on_broker(self, job: ScrapingJob, checkpoint: Optional[Dict[str, Any]] = None) -> ScrapingOutcome:
+        """Envía el job al broker y espera el resultado escrito por un worker externo"""
+        await asyncio.to_thread(self.broker.enqueue, {
+            "job_id": job.job_id,
+            "model": job.model.value,
+            "category": job.category,
+            "checkpoint": checkpoint
+        })
+        enqueued_at = time.time()
+        try:
+            while True:
+                result = await asyncio.to_thread(self.broker.get_result, job.job_id)
+                if result:
+                    await asyncio.to_thread(self.broker.acknowledge, job.job_id)
+                    return ScrapingOutcome(
+                        result["status"],
+                        result.get("results") or [],
+                        result.get("error"),
+                        result.get("checkpoint")
+                    )
+                # El plazo de ejecución corre desde el reclamo; la espera en cola tiene el suyo
+                claimed_at = await asyncio.to_thread(self.broker.claimed_at, job.job_id)
+                if claimed_at:
+                    if time.time() - claimed_at >= settings.BROKER_CLAIM_TIMEOUT:
+                        error = "El worker no terminó el trabajo a tiempo"
+                        break
+                elif time.time() - enqueued_at >= settings.BROKER_QUEUE_TIMEOUT:
+                    error = "Ningún worker tomó el trabajo a tiempo"
+                    break
+                await asyncio.sleep(settings.BROKER_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            # El worker externo detiene el job al ver la marca de cancelación
+            await asyncio.to_thread(self.broker.cancel, job.job_id)
+            raise
+        # Sin cancelar, el job podría ejecutarse después y dejar un resultado huérfano
+        await asyncio.to_thread(self.broker.cancel, job.job_id)
+        return ScrapingOutcome("error", [], error)
+
+    async def _scrape(self, job: ScrapingJob) -> ScrapingOutcome:
+        """Ejecuta el scraping del job (en este proceso o en el broker) desde su checkpoint"""
+        checkpoint = await asyncio.to_thread(result_store.read_checkpoint, job.resume_from)
+        if self.broker:
+            outcome = await self._run_on_broker(job, checkpoint)
+        else:
+            def on_cancel(partial: ScrapingOutcome) -> None:
+                self._interrupted[job.job_id] = partial
+
+            outcome = await run_scraping(
+                self.scraper_factory, job.model, job.category, job.job_id, checkpoint, on_cancel
+            )
+        return outcome._replace(checkpoint=outcome.checkpoint or checkpoint)
+
     async def process_job(self, job: ScrapingJob) -> None:
-        """Procesa un trabajo de scraping de manera asíncrona"""
+        """Procesa un trabajo de scraping (lo ejecuta un worker del scheduler)"""
         try:
-            async with self._model_semaphores[job.model]:
-                start = time.time()
-                job.start_time = start
-                job.status = "processing"
-                logger.info(f"Iniciando procesamiento de job {job.job_id} con modelo {job.model}")
-
-                try:
-                    scraper = self.scraper_factory.get_scraper(job.model)
-                    
-                    async def do_scraping():
-                        if hasattr(scraper, 'scrape_async'):
-                            return await scraper.scrape_async(job.category)
-                        else:
-                            loop = asyncio.get_running_loop()
-                            return await loop.run_in_executor(None, scraper.scrape, job.category)
-
-                    try:
-                        results = await asyncio.wait_for(do_scraping(), timeout=settings.MAX_TIMEOUT - 1)
-                        job.results = results if results else []
-                        job.status = "completed"
-                        
-                        print(f"\n=== Scraping Completado ===")
-                        print(f"ID: {job.job_id}")
-                        print(f"Modelo: {job.model}")
-                        print(f"Categoría: {job.category}")
-                        print(f"Total artículos: {len(job.results)}")
-                        print("===========================\n")
-                        
-                    except asyncio.TimeoutError:
+            start = time.time()
+            self._mark_processing(job, start)
+            parent = self.get_job_status(job.parent_id) if job.parent_id else None
+            if parent and parent.status == "pending":
+                self._mark_processing(parent, start)
+            logger.info(f"Iniciando procesamiento de job {job.job_id} con modelo {job.model}")
+
+            checkpoint = None
+            previous = None
+            interrupted = False
+            run_id = job.job_id
+            # Se registra antes de ceder el loop para que DELETE pueda cancelarlo en cualquier punto
+            scraping = asyncio.ensure_future(self._scrape(job))
+            self._running[job.job_id] = scraping
+            try:
+                # Una continuación solo descarga lo que falta y se une a los resultados anteriores
+                previous = result_store.open(job.resume_from) if job.resume_from else None
+                outcome = await scraping
+                job = self._run_owner(job)
+                if job.status == "cancelled":
+                    # El DELETE llegó con el scraping ya terminado: se descarta su resultado
+                    logger.info(f"Job {job.job_id} cancelado; worker liberado")
+                else:
+                    job.status, job.error, checkpoint = outcome.status, outcome.error, outcome.checkpoint
+                    job.results = await asyncio.to_thread(
+                        result_store.write, job.job_id, merge_articles(previous, outcome.results)
+                    )
+                    if job.status == "error" and job.results:
+                        # Se conserva lo avanzado para poder reanudar otra vez
                         job.status = "partial"
-                        if hasattr(scraper, 'get_partial_results'):
-                            job.results = await scraper.get_partial_results()
-                        elif hasattr(scraper, 'partial_results'):
-                            job.results = scraper.partial_results
-                        else:
-                            job.results = []
-                        job.error = "Timeout: se devuelven resultados parciales"
-                        logger.warning(f"Timeout en job {job.job_id}. Artículos: {len(job.results) if job.results else 0}")
-
-                except Exception as e:
-                    job.status = "error"
-                    job.error = str(e)
-                    logger.error(f"Error procesando job {job.job_id}: {str(e)}")
-
-                finally:
-                    end = time.time()
-                    job.end_time = end
-                    
+
+                if job.status == "completed" and not job.resume_from:
+                    job_history.record(job.model, job.category, time.time() - start, len(job.results))
+                    logger.info(
+                        f"Scraping completado: job {job.job_id}, modelo {job.model}, "
+                        f"categoría {job.category}, {len(job.results)} artículos"
+                    )
+
+            except asyncio.CancelledError:
+                job = self._run_owner(job)
+                if job.status == "cancelled":
+                    logger.info(f"Job {job.job_id} cancelado; worker liberado")
+                else:
+                    # Apagado del servicio con el job en curso: se conserva lo avanzado
+                    # para que el job se pueda reanudar y no quede como "processing"
+                    interrupted = True
+                    partial = self._interrupted.pop(run_id, None)
+                    checkpoint = partial.checkpoint if partial else None
+                    job.results = await asyncio.to_thread(
+                        result_store.write, job.job_id, merge_articles(previous, partial.results if partial else [])
+                    )
+                    job.status = "partial" if job.results else "error"
+                    job.error = "Servicio detenido durante el procesamiento del trabajo"
+                    logger.warning(f"Job {job.job_id} interrumpido por el apagado ({len(job.results)} artículos)")
+                    raise
+
+            except Exception as e:
+                job = self._run_owner(job)
+                job.status = "error"
+                job.error = str(e)
+                logger.error(f"Error procesando job {job.job_id}: {str(e)}")
+
+            finally:
+                job = self._run_owner(job)
+                self._running.pop(job.job_id, None)
+                self._interrupted.pop(run_id, None)
+                end = time.time()
+                job.end_time = end
+                
+                if job.status != "cancelled" and not interrupted:
                     self._force_partial_if_timeout(job)
-                    
-                    # Si hay resultados, guardar en Google Sheets y notificar
-                    if job.results and len(job.results) > 0:
-                        # Save to Google Sheets asíncronamente
-                        success, sheet_url = await sheets_service.save_job_results(job)
-                        
-                        if success:
-                            # Notify completion with sheet URL and email
-                            notify_job_completion(
-                                job_id=job.job_id,
-                                webhook_url=job.webhook,
-                                sheet_url=sheet_url,
-                                email=job.email
-                            )
-                    
-                    if job in self.queue:
-                        self.queue.remove(job)
-                    self.results[job.job_id] = job
+                if job.status == "partial" and checkpoint:
+                    await asyncio.to_thread(result_store.write_checkpoint, job.job_id, checkpoint)
+                
+                # La exportación y la notificación pasan al post-proceso para liberar
+                # el worker de scraping (los jobs hijos se exportan una sola vez desde el padre)
+                # Un job interrumpido por el apagado se exporta al reanudarlo
+                if not job.parent_id and job.status != "cancelled" and not interrupted:
+                    self.exporter.submit(job)
 
         except Exception as e:
             logger.error(f"Error en job {job.job_id}: {str(e)}")
             job.status = "error"
             job.error = str(e)
             job.end_time = time.time()
-            if job in self.queue:
-                self.queue.remove(job)
-            self.results[job.job_id] = job
 
-    def add_job(self, job: ScrapingJob) -> None:
-        """Agrega un trabajo a la cola"""
+        finally:
+            self._finish(job)
+
+    async def add_job(self, job: ScrapingJob) -> None:
+        """
+        Agrega un trabajo a la cola y despierta a un worker de su modelo
+
+        Si ya existe un job igual (categoría, modelo) pendiente o en curso, el nuevo
+        job se adjunta a su ejecución en lugar de lanzar otro scraping. "todas las
+        categorias" se divide en jobs hijos por categoría que se unen al terminar.
+
+        Raises:
+            QueueFullException: si el servicio no acepta jobs o la cola está llena
+        """
+        if not self._accepting:
+            raise QueueFullException(
+                retry_after=settings.QUEUE_RETRY_AFTER,
+                message="El servicio no está aceptando trabajos en este momento"
+            )
+
+        leader = self._find_leader(job)
+        children = [] if leader else self._split(job)
+        required = len(children) or 1
+        if not leader and self._backlog_size() + required > settings.QUEUE_MAX_PENDING:
+            raise QueueFullException(retry_after=settings.QUEUE_RETRY_AFTER)
+
+        if leader:
+            self._attach_to_leader(job, leader)
+        else:
+            self._leaders[self._coalesce_key(job)] = job
+        job.children = children
         self.queue.append(job)
+        self._publish(job)
+
+        if leader:
+            self._spawn(self._follow_leader(job, leader))
+        elif children:
+            logger.info(f"Job {job.job_id} dividido en {len(children)} jobs por categoría")
+            for child in children:
+                await self._enqueue_child(child)
+            self._spawn(self._reduce_children(job))
+        else:
+            await self._notify_worker(job.model)
+
+    async def _load_job(self, job_id: str) -> Optional[ScrapingJob]:
+        """Job de este proceso o reconstruido desde el backend de estado, con sus resultados e hijos"""
+        job = self.get_job_status(job_id)
+        if job:
+            return job
+        record = await asyncio.to_thread(self.state.get, job_id)
+        if not record:
+            return None
+        job = ScrapingJob.from_record(record)
+        job.results = await asyncio.to_thread(result_store.open, record.get("results_ref"))
+        for summary in record.get("children", []):
+            child = await self._load_job(summary["job_id"])
+            if child:
+                job.children.append(child)
+        return job
+
+    def _prepare_resume(self, job: ScrapingJob) -> None:
+        """Devuelve un job terminado a la cola como continuación de sus propios resultados"""
+        job.resume_from = getattr(job.results, "job_id", None) or job.job_id
+        job.status = "pending"
+        job.error = None
+        job.start_time = None
+        job.end_time = None
+        job.queued_at = time.time()
+        job.coalesced_with = None
+        job.followers = []
+        job.finished = asyncio.Event()
+        job.sheet_url = None
+        job.export_status = None
+        job.export_error = None
+        job.exported = asyncio.Event()
+        self.results.pop(job.job_id, None)
+        self.queue.append(job)
+        self._publish(job)
+
+    async def resume_job(self, job_id: str) -> Optional[ScrapingJob]:
+        """
+        Reanuda un job parcial desde su checkpoint
+
+        La continuación conserva el id del job, descarga solo los artículos que
+        faltan y los une a los resultados anteriores. Un job dividido reanuda
+        únicamente sus categorías incompletas.
+
+        Raises:
+            QueueFullException: si el servicio no acepta jobs o la cola está llena
+            JobNotResumableException: si el job no terminó como parcial
+        """
+        if not self._accepting:
+            raise QueueFullException(
+                retry_after=settings.QUEUE_RETRY_AFTER,
+                message="El servicio no está aceptando trabajos en este momento"
+            )
+
+        job = await self._load_job(job_id)
+        if not job:
+            return None
+        if job.status != "partial" or job.parent_id:
+            raise JobNotResumableException(job_id, job.status)
+
+        incomplete = [child for child in job.children if child.status != "completed"]
+        if self._backlog_size() + (len(incomplete) or 1) > settings.QUEUE_MAX_PENDING:
+            raise QueueFullException(retry_after=settings.QUEUE_RETRY_AFTER)
+
+        logger.info(f"Reanudando job {job_id} desde su checkpoint")
+        if job.children:
+            for child in incomplete:
+                self._prepare_resume(child)
+            self._prepare_resume(job)
+            for model in {child.model for child in incomplete}:
+                await self._notify_worker(model)
+            self._spawn(self._reduce_children(job))
+        else:
+            self._prepare_resume(job)
+            await self._notify_worker(job.model)
+        return job
+
+    def _run_owner(self, job: ScrapingJob) -> ScrapingJob:
+        """Job que recibe el resultado de la ejecución lanzada para `job` (cambia si se canceló con followers)"""
+        while job.job_id in self._handoffs:
+            job = self._handoffs.pop(job.job_id)
+        return job
+
+    def _promote(self, job: ScrapingJob) -> None:
+        """
+        Pasa la ejecución de un job cancelado a su follower más antiguo
+
+        El follower hereda el lugar en la cola, el scraping en curso o los jobs hijos,
+        y los demás followers pasan a seguirlo: cancelar un job no cancela los de
+        otros clientes que se coalescieron con él.
+        """
+        successor = job.followers.pop(0)
+        successor.coalesced_with = None
+        successor.followers, job.followers = job.followers, []
+        for follower in successor.followers:
+            follower.coalesced_with = successor.job_id
+        key = self._coalesce_key(job)
+        if self._leaders.get(key) is job:
+            self._leaders[key] = successor
+
+        if job.children:
+            successor.children, job.children = job.children, []
+            for child in successor.children:
+                child.parent_id = successor.job_id
+            self._spawn(self._reduce_children(successor))
+        elif job.job_id in self._running:
+            self._running[successor.job_id] = self._running.pop(job.job_id)
+            self._handoffs[job.job_id] = successor
+        else:
+            successor.status = "pending"
+            self._spawn(self._notify_worker(successor.model))
+        logger.info(f"Job {successor.job_id} hereda la ejecución del job cancelado {job.job_id}")
+
+    def _cancel(self, job: ScrapingJob) -> None:
+        job.status = "cancelled"
+        job.error = "Cancelado por el cliente"
+        job.end_time = time.time()
+
+        if job.followers:
+            # Otros clientes esperan esta ejecución: sigue para ellos
+            self._promote(job)
+            self._finish(job)
+            return
+
+        if job.children:
+            # El padre termina cuando sus hijos cancelados terminan (_reduce_children)
+            for child in job.children:
+                if not child.finished.is_set():
+                    self._cancel(child)
+            return
+
+        leader = self.get_job_status(job.coalesced_with) if job.coalesced_with else None
+        if leader:
+            # Un job coalescido solo se desprende; la ejecución compartida sigue
+            if job in leader.followers:
+                leader.followers.remove(job)
+            self._finish(job)
+            return
+
+        scraping = self._running.get(job.job_id)
+        if scraping:
+            # process_job libera el worker; run_scraping detiene navegador, threads y descargas
+            scraping.cancel()
+        else:
+            self._finish(job)
+
+    async def cancel_job(self, job_id: str) -> Optional[ScrapingJob]:
+        """
+        Cancela un job pendiente o en curso de este proceso
+
+        Un job en cola sale de ella; uno en curso se detiene de inmediato y su
+        worker queda libre para el siguiente job. Si otros jobs se coalescieron
+        con él, la ejecución sigue para ellos y solo este job termina cancelado.
+        Un job dividido cancela sus hijos.
+
+        Raises:
+            JobNotCancellableException: si el job ya terminó o corre en otro proceso
+        """
+        job = self.get_job_status(job_id)
+        if not job:
+            record = await asyncio.to_thread(self.state.get, job_id)
+            if not record:
+                return None
+            raise JobNotCancellableException(job_id, record["status"])
+        if job.finished.is_set() or job.status == "cancelled":
+            raise JobNotCancellableException(job_id, job.status)
+
+        logger.info(f"Cancelando job {job_id} ({job.status})")
+        self._cancel(job)
+        return job
 
     def get_job_status(self, job_id: str) -> Optional[ScrapingJob]:
         """Obtiene el estado de un trabajo específico"""
@@ -127,41 +902,80 @@ class QueueService:
         # Buscar en resultados
         return self.results.get(job_id)
 
-    def _format_job_info(self, job: ScrapingJob, job_type: str) -> Dict[str, Any]:
+    async def get_job_response(
+        self,
+        job_id: str,
+        offset: int = 0,
+        limit: int = settings.RESULTS_EXPORT_CHUNK
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Respuesta de estado de un job con una página de sus artículos
+
+        Los jobs de este proceso se leen en vivo; los de otros procesos, desde el
+        backend de estado compartido. Los artículos se leen del almacén de
+        resultados desde `offset`, como máximo `limit`; la lectura (que puede
+        descomprimir segmentos) corre fuera del event loop.
+        """
+        job = self.get_job_status(job_id)
+        record = job.to_record() if job else await asyncio.to_thread(self.state.get, job_id)
+        if not record:
+            return None
+        results = job.results if job and job.results is not None else await asyncio.to_thread(
+            result_store.open, record.get("results_ref")
+        )
+        articles = await asyncio.to_thread(results.page, offset, limit) if results else []
+        response = job_response(record, articles)
+        if results and offset + limit < len(results):
+            response["next_offset"] = offset + limit
+        if job:
+            response.update(self.get_job_forecast(job))
+        return response
+
+    def _format_job_info(self, record: Dict[str, Any], job_type: str) -> Dict[str, Any]:
         """Formatea la información del trabajo según su tipo"""
         info = {
-            "job_id": job.job_id,
-            "status": job.status,
-            "category": job.category,
-            "model": job.model
+            "job_id": record["job_id"],
+            "status": record["status"],
+            "category": record["category"],
+            "model": record["model"]
         }
+        if record.get("coalesced_with"):
+            info["coalesced_with"] = record["coalesced_with"]
 
         if job_type == "queue":
-            # Para trabajos en cola, mostrar tiempo de espera
-            info["waiting_time"] = round(time.time() - job.queued_at, 2)
+            # Para trabajos en cola, mostrar tiempo de espera y estimaciones
+            info["waiting_time"] = round(time.time() - record["queued_at"], 2)
+            job = self.get_job_status(record["job_id"])
+            if job:
+                info.update(self.get_job_forecast(job))
         elif job_type == "processing":
             # Para trabajos en proceso, información básica
-            if job.start_time:
-                info["duration"] = round(time.time() - job.start_time, 2)
+            if record.get("start_time"):
+                info["duration"] = round(time.time() - record["start_time"], 2)
         elif job_type == "finished":
             # Para trabajos completados, mostrar estadísticas
-            info["articles_count"] = len(job.results) if job.results else 0
-            if job.start_time and job.end_time:
-                info["duration"] = round(job.end_time - job.start_time, 2)
+            info["articles_count"] = record.get("articles_count", 0)
+            if record.get("export_status"):
+                info["export_status"] = record["export_status"]
+            if record.get("start_time") and record.get("end_time"):
+                info["duration"] = round(record["end_time"] - record["start_time"], 2)
 
         return info
 
-    def get_queue_status(self) -> Dict[str, Any]:
-        """Obtiene el estado actual de la cola"""
+    async def get_queue_status(self) -> Dict[str, Any]:
+        """Obtiene el estado actual de la cola (de todos los procesos que comparten el backend)"""
+        records = {record["job_id"]: record for record in await asyncio.to_thread(self.state.list_records)}
+        # Los jobs de este proceso se leen en vivo (su último estado puede no estar publicado aún)
+        for job in [*self.queue, *self.results.values()]:
+            records[job.job_id] = job.to_record()
+        records = list(records.values())
+
         # Obtener trabajos por estado
-        pending_jobs = [job for job in self.queue if job.status == "pending"]
-        processing_jobs = [
-            job for job in list(self.queue) + list(self.results.values())
-            if job.status == "processing"
-        ]
+        pending_jobs = [record for record in records if record["status"] == "pending"]
+        processing_jobs = [record for record in records if record["status"] == "processing"]
         completed_jobs = [
-            job for job in self.results.values()
-            if job.status in ["completed", "partial", "error"]
+            record for record in records
+            if record["status"] in FINISHED_STATUSES
         ]
 
         return {
@@ -169,17 +983,27 @@ class QueueService:
             "processing_jobs": len(processing_jobs),
             "completed_jobs": len(completed_jobs),
             "jobs_pending": [
-                self._format_job_info(job, "queue") 
-                for job in pending_jobs
+                self._format_job_info(record, "queue")
+                for record in pending_jobs
             ],
             "jobs_processing": [
-                self._format_job_info(job, "processing")
-                for job in processing_jobs
+                self._format_job_info(record, "processing")
+                for record in processing_jobs
             ],
             "jobs_finished": [
-                self._format_job_info(job, "finished")
-                for job in completed_jobs
-            ]
+                self._format_job_info(record, "finished")
+                for record in completed_jobs
+            ],
+            "workers": {model.value: self._worker_count(model) for model in ScraperModel},
+            "max_pending": settings.QUEUE_MAX_PENDING,
+            "policy": settings.QUEUE_POLICY,
+            "execution_mode": settings.EXECUTION_MODE,
+            "broker": self.broker.stats() if self.broker else None,
+            "export": self.exporter.stats(),
+            "webhooks": webhook_dispatcher.stats(),
+            "article_cache": article_cache.stats(),
+            "listing_cache": listing_cache.stats(),
+            "result_store": result_store.stats()
         }
 
 queue_service = QueueService()
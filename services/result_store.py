@@ -0,0 +1,312 @@
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from pathlib import Path
+import gzip
+import json
+import shutil
+import threading
+import time
+from core.config import settings
+from core.logging import logger
+
+INDEX_FILE = "index.json"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def merge_articles(*sources: Optional[Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Une varias fuentes de artículos omitiendo las URLs repetidas"""
+    seen = set()
+    for source in sources:
+        for article in source or []:
+            url = article.get("URL")
+            if url in seen:
+                continue
+            if url:
+                seen.add(url)
+            yield article
+
+
+class JobResults:
+    """
+    Artículos de un job, en memoria o en segmentos NDJSON comprimidos.
+
+    Se recorren con un cursor que solo descomprime los segmentos necesarios, por
+    lo que las lecturas paginadas y la exportación no cargan el job completo.
+    """
+
+    def __init__(self, store: "ResultStore", job_id: str, count: int, segments: List[Tuple[str, int]]):
+        self.store = store
+        self.job_id = job_id
+        self.count = count
+        self.segments = segments
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.cursor()
+
+    def cursor(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Itera los artículos desde `offset`, como máximo `limit`"""
+        end = self.count if limit is None else min(self.count, offset + limit)
+        if offset >= end:
+            return
+
+        cached = self.store._cached(self.job_id)
+        if cached is not None:
+            yield from islice(cached, offset, end)
+            return
+
+        # Un job que estaba solo en memoria pudo bajarse a disco al expulsarlo
+        if not self.segments:
+            stored = self.store.open(self.job_id)
+            self.segments = stored.segments if stored else []
+
+        position = 0
+        for name, size in self.segments:
+            if position + size <= offset:
+                position += size
+                continue
+            skip = max(0, offset - position)
+            for article in islice(self.store._read_segment(self.job_id, name), skip, None):
+                if position + skip >= end:
+                    return
+                yield article
+                skip += 1
+            position += size
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.cursor(offset, limit))
+
+    def chunks(self, size: int = settings.RESULTS_EXPORT_CHUNK) -> Iterator[List[Dict[str, Any]]]:
+        """Entrega los artículos en bloques de `size` para exportarlos"""
+        cursor = self.cursor()
+        while True:
+            chunk = list(islice(cursor, size))
+            if not chunk:
+                return
+            yield chunk
+
+
+class MemoryEntry(NamedTuple):
+    """Artículos de un job que por ahora solo existe en memoria"""
+    articles: List[Dict[str, Any]]
+    size: int
+    created: float
+
+
+class ResultStore:
+    """
+    Almacén de artículos de los jobs con presupuesto de memoria global.
+
+    Los jobs se mantienen en memoria mientras caben en `memory_budget` bytes; los
+    que no caben, y los menos usados cuando se excede el presupuesto, se bajan a
+    segmentos gzip en disco (persisten entre reinicios y se comparten entre
+    procesos del host). Si el disco no se puede escribir (p. ej. un sistema de
+    archivos de solo lectura) los resultados quedan en memoria en vez de perderse.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.RESULTS_DIR,
+        memory_budget: int = settings.RESULTS_MEMORY_BUDGET,
+        segment_size: int = settings.RESULTS_SEGMENT_SIZE
+    ):
+        self.directory = Path(directory)
+        self.memory_budget = memory_budget
+        self.segment_size = segment_size
+        self._cache: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        self._cached_bytes = 0
+        # Checkpoints que no se pudieron escribir en disco
+        self._checkpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.directory / job_id.replace(":", "_").replace("/", "_")
+
+    def _cached(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._cache.get(job_id)
+            if entry is None:
+                return None
+            self._cache.move_to_end(job_id)
+            return entry.articles
+
+    def _remember(self, job_id: str, articles: List[Dict[str, Any]], size: int) -> None:
+        """
+        Guarda los artículos del job en memoria bajando a disco los menos usados hasta respetar el presupuesto
+
+        Si un job no se puede bajar a disco se conserva aunque se exceda el presupuesto.
+        """
+        with self._lock:
+            self._forget(job_id)
+            self._cache[job_id] = MemoryEntry(articles, size, time.time())
+            self._cached_bytes += size
+            for evicted_id in list(self._cache):
+                if self._cached_bytes <= self.memory_budget:
+                    break
+                try:
+                    self._write_segments(evicted_id, self._cache[evicted_id].articles)
+                except OSError as e:
+                    logger.warning(f"No se pudieron bajar a disco los resultados del job {evicted_id}: {e}")
+                    continue
+                self._forget(evicted_id)
+
+    def _forget(self, job_id: str) -> None:
+        entry = self._cache.pop(job_id, None)
+        if entry:
+            self._cached_bytes -= entry.size
+
+    def _read_segment(self, job_id: str, name: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(self._job_dir(job_id) / name, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write(self, job_id: str, articles: Iterable[Dict[str, Any]]) -> JobResults:
+        """
+        Guarda los artículos de un job: en memoria si cabe en el presupuesto, si no en segmentos
+
+        El iterable se consume una sola vez (puede leer los resultados anteriores
+        del mismo job). Si los segmentos no se pueden escribir, el job queda en
+        memoria en vez de fallar.
+        """
+        articles = list(articles)
+        size = 0
+        for article in articles:
+            size += len(json.dumps(article, ensure_ascii=False))
+            if size > self.memory_budget:
+                break
+        else:
+            # Los segmentos de una ejecución anterior del job quedan obsoletos
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            self._remember(job_id, articles, size)
+            return JobResults(self, job_id, len(articles), [])
+
+        try:
+            return self._write_segments(job_id, articles)
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar en disco los resultados del job {job_id}, quedan en memoria: {e}")
+            size = sum(len(json.dumps(article, ensure_ascii=False)) for article in articles)
+            self._remember(job_id, articles, size)
+            return JobResults(self, job_id, len(articles), [])
+
+    def _write_segments(self, job_id: str, articles: List[Dict[str, Any]]) -> JobResults:
+        """Escribe los artículos en segmentos (en un directorio temporal que luego reemplaza al anterior)"""
+        final_dir = self._job_dir(job_id)
+        job_dir = final_dir.with_name(final_dir.name + ".tmp")
+        if job_dir.exists():
+            shutil.rmtree(job_dir)
+        job_dir.mkdir(parents=True)
+
+        segments: List[Tuple[str, int]] = []
+        buffer: List[str] = []
+
+        def flush():
+            name = f"{len(segments):05d}.ndjson.gz"
+            with gzip.open(job_dir / name, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write("\n".join(buffer) + "\n")
+            segments.append((name, len(buffer)))
+            buffer.clear()
+
+        for article in articles:
+            buffer.append(json.dumps(article, ensure_ascii=False))
+            if len(buffer) >= self.segment_size:
+                flush()
+        if buffer:
+            flush()
+
+        with open(job_dir / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump({"count": len(articles), "segments": segments}, f)
+        if final_dir.exists():
+            shutil.rmtree(final_dir)
+        job_dir.rename(final_dir)
+        return JobResults(self, job_id, len(articles), segments)
+
+    def open(self, job_id: Optional[str]) -> Optional[JobResults]:
+        """Abre los resultados de un job: en memoria o guardados en disco (de este u otro proceso)"""
+        if not job_id:
+            return None
+        cached = self._cached(job_id)
+        if cached is not None:
+            return JobResults(self, job_id, len(cached), [])
+        try:
+            with open(self._job_dir(job_id) / INDEX_FILE, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return JobResults(self, job_id, index["count"], [tuple(segment) for segment in index["segments"]])
+
+    def write_checkpoint(self, job_id: str, checkpoint: Dict[str, Any]) -> None:
+        """Guarda junto a los resultados el avance del job para poder reanudarlo (en memoria si el disco falla)"""
+        job_dir = self._job_dir(job_id)
+        try:
+            job_dir.mkdir(parents=True, exist_ok=True)
+            with open(job_dir / CHECKPOINT_FILE, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar en disco el checkpoint del job {job_id}, queda en memoria: {e}")
+            with self._lock:
+                self._checkpoints[job_id] = checkpoint
+            return
+        with self._lock:
+            self._checkpoints.pop(job_id, None)
+
+    def read_checkpoint(self, job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not job_id:
+            return None
+        with self._lock:
+            if job_id in self._checkpoints:
+                return self._checkpoints[job_id]
+        try:
+            with open(self._job_dir(job_id) / CHECKPOINT_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._forget(job_id)
+            self._checkpoints.pop(job_id, None)
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def sweep(self, referenced: Set[str], min_age: float) -> int:
+        """Elimina los resultados que ningún job referencia y que tienen más de `min_age` segundos"""
+        cutoff = time.time() - min_age
+        removed = 0
+        with self._lock:
+            for job_id, entry in list(self._cache.items()):
+                if job_id not in referenced and entry.created < cutoff:
+                    self._forget(job_id)
+                    self._checkpoints.pop(job_id, None)
+                    removed += 1
+        if not self.directory.exists():
+            return removed
+        keep = {self._job_dir(job_id).name for job_id in referenced if job_id}
+        for job_dir in self.directory.iterdir():
+            if job_dir.name in keep or job_dir.stat().st_mtime > cutoff:
+                continue
+            with self._lock:
+                for job_id in [job_id for job_id in self._cache if self._job_dir(job_id) == job_dir]:
+                    self._forget(job_id)
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Resultados sin referencias eliminados: {removed}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached_jobs": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "memory_budget": self.memory_budget
+            }
+
+
+# Instancia global compartida por todos los jobs del proceso
+result_store = ResultStore()
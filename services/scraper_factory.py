@@ -1,22 +1,36 @@
-from typing import Union
+from typing import TYPE_CHECKING, Dict, Tuple, Type, Union
+from importlib import import_module
 from models.requests import ScraperModel
-from scrappers.scrapper import BaseScraper
-from scrappers.scrapper_optimized import OptimizedScraper
-from scrappers.scrapper_ultra_optimized import UltraOptimizedScraper
+
+if TYPE_CHECKING:
+    from scrappers.scrapper import BaseScraper
+    from scrappers.scrapper_optimized import OptimizedScraper
+    from scrappers.scrapper_ultra_optimized import UltraOptimizedScraper
+
+# Módulo y clase de cada modelo. Se importan al primer uso para que arrancar la API
+# (y servir los endpoints de estado) no cargue selenium, bs4 ni requests
+SCRAPER_REGISTRY: Dict[ScraperModel, Tuple[str, str]] = {
+    ScraperModel.BASE: ("scrappers.scrapper", "BaseScraper"),
+    ScraperModel.OPTIMIZED: ("scrappers.scrapper_optimized", "OptimizedScraper"),
+    ScraperModel.ULTRA: ("scrappers.scrapper_ultra_optimized", "UltraOptimizedScraper")
+}
 
 class ScraperFactory:
     def __init__(self):
-        self._scrapers = {
-            ScraperModel.BASE: BaseScraper,
-            ScraperModel.OPTIMIZED: OptimizedScraper,
-            ScraperModel.ULTRA: UltraOptimizedScraper
-        }
+        self._scrapers: Dict[ScraperModel, Type] = {}
+
+    def _scraper_class(self, model: ScraperModel) -> Type:
+        scraper_class = self._scrapers.get(model)
+        if scraper_class is None:
+            entry = SCRAPER_REGISTRY.get(model)
+            if not entry:
+                raise ValueError(f"Modelo de scraper no válido: {model}")
+            module_name, class_name = entry
+            scraper_class = self._scrapers[model] = getattr(import_module(module_name), class_name)
+        return scraper_class
 
     def get_scraper(
-        self, 
+        self,
         model: ScraperModel
-    ) -> Union[BaseScraper, OptimizedScraper, UltraOptimizedScraper]:
-        scraper_class = self._scrapers.get(model)
-        if not scraper_class:
-            raise ValueError(f"Modelo de scraper no válido: {model}")
-        return scraper_class()
\ No newline at end of file
+    ) -> Union["BaseScraper", "OptimizedScraper", "UltraOptimizedScraper"]:
+        return self._scraper_class(model)()
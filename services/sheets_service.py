@@ -1,138 +1,408 @@
-import gspread
-from google.oauth2.service_account import Credentials
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from core.config import settings
 from core.logging import logger
 from models.jobs import ScrapingJob
-import time
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import json
 import os
+import random
+import time
+
+if TYPE_CHECKING:
+    import aiohttp
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive.file',
+    'https://www.googleapis.com/auth/drive'
+]
+HEADER = ['Titular', 'Categoría', 'Autor', 'Cargo', 'Tiempo de Lectura', 'URL']
+
+
+class SheetsRetryableError(Exception):
+    """Error transitorio de la API de Google (429, 5xx, red o token expirado)"""
+
+
+class TokenBucket:
+    """Limita las llamadas del lado del cliente: `rate` por segundo con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PendingExport:
+    """Job a la espera de escribirse en su hoja dentro de un lote compartido"""
+
+    def __init__(self, job: ScrapingJob, sheet_id: int, title: str, future: asyncio.Future):
+        self.job = job
+        self.sheet_id = sheet_id
+        self.title = title
+        self.future = future
+
+    def resolve(self, error: Optional[Exception] = None) -> None:
+        if self.future.done():
+            return
+        if error is None:
+            self.future.set_result(None)
+        else:
+            self.future.set_exception(error)
+
 
 class GoogleSheetsService:
+    """
+    Cliente asíncrono de Google Sheets sobre una sesión aiohttp compartida.
+
+    El token de acceso se obtiene firmando un JWT con la cuenta de servicio y se
+    reutiliza hasta que expira; las credenciales se leen recién con la primera
+    exportación, así que la API arranca aunque falten. Los metadatos de la
+    planilla (ids y títulos de sus hojas) y el permiso de lectura por link se
+    consultan una sola vez por proceso, aunque varias exportaciones los pidan a
+    la vez.
+
+    Los jobs que terminan dentro de `SHEETS_BATCH_WINDOW` se exportan juntos: la
+    creación de sus hojas y la escritura de sus filas se agrupan en la menor
+    cantidad de `batchUpdate` posible (hasta `SHEETS_BATCH_MAX_ROWS` filas cada
+    uno). Todas las llamadas pasan por un token bucket ajustado a la cuota por
+    minuto de la API, de modo que una ráfaga de exportaciones espera su turno en
+    vez de recibir 429.
+    """
+
     def __init__(self):
-        max_workers = int(os.getenv('GOOGLE_SHEETS_MAX_WORKERS', 3))
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.client = self._setup_client()
+        self.credentials: Optional[Dict[str, Any]] = None
+        self.signer = None
         self.spreadsheet_id = os.getenv('GOOGLE_SPREADSHEET_ID')
+        self.token_url: Optional[str] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._token: Optional[str] = None
+        self._token_expiry = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._metadata_lock: Optional[asyncio.Lock] = None
+        self._share_lock: Optional[asyncio.Lock] = None
+        self._sheet_ids: Optional[Set[int]] = None
+        self._titles: Set[str] = set()
+        self._shared = False
+        self._bucket = TokenBucket(settings.SHEETS_QUOTA_PER_MINUTE / 60, settings.SHEETS_QUOTA_BURST)
+        self._pending: List[PendingExport] = []
+        self._pending_rows = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    def _load_credentials(self) -> None:
+        """Lee las credenciales de la cuenta de servicio (una vez, al primer uso)"""
+        if self.signer is not None:
+            return
+        # google-auth solo se importa si de verdad se exporta algo
+        from google.auth import crypt
 
-    def _setup_client(self) -> gspread.Client:
-        """Inicializa el cliente de Google Sheets con las credenciales"""
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive.file',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
         # Obtener credenciales del .env
         credentials_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
         if not credentials_json:
             raise ValueError("GOOGLE_CREDENTIALS_JSON no encontrado en variables de entorno")
-            
-        credentials_dict = json.loads(credentials_json)
-        
-        credentials = Credentials.from_service_account_info(
-            credentials_dict,
-            scopes=scopes
-        )
-        
-        return gspread.authorize(credentials)
+        credentials = json.loads(credentials_json)
+        self.signer = crypt.RSASigner.from_service_account_info(credentials)
+        self.credentials = credentials
+        self.token_url = settings.GOOGLE_TOKEN_URL or credentials.get('token_uri', 'https://oauth2.googleapis.com/token')
 
-    def _get_spreadsheet(self) -> gspread.Spreadsheet:
-        """Obtiene la hoja de cálculo por ID"""
-        try:
-            return self.client.open_by_key(self.spreadsheet_id)
-        except gspread.SpreadsheetNotFound:
-            raise Exception(f"No se encontró la hoja de cálculo con ID: {self.spreadsheet_id}")
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            # aiohttp se importa a la primera exportación para no alargar el arranque de la API
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.GOOGLE_API_TIMEOUT)
+            )
+            self._token_lock = asyncio.Lock()
+            self._metadata_lock = asyncio.Lock()
+            self._share_lock = asyncio.Lock()
+        return self._session
+
+    async def close(self) -> None:
+        """Escribe los lotes pendientes y cierra la sesión"""
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _access_token(self) -> str:
+        """Token OAuth vigente; se renueva un minuto antes de expirar"""
+        async with self._token_lock:
+            if self._token and time.time() < self._token_expiry - 60:
+                return self._token
+            from google.auth import jwt
+
+            self._load_credentials()
+            now = int(time.time())
+            assertion = jwt.encode(self.signer, {
+                'iss': self.credentials['client_email'],
+                'scope': ' '.join(SCOPES),
+                'aud': self.token_url,
+                'iat': now,
+                'exp': now + 3600
+            })
+            async with self._get_session().post(self.token_url, data={
+                'grant_type': 'urn:ietf:params:oauth:grant-type:jwt-bearer',
+                'assertion': assertion.decode()
+            }) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise SheetsRetryableError(f"Token HTTP {response.status}")
+                if response.status >= 400:
+                    raise Exception(f"No se pudo obtener el token de Google: HTTP {response.status} {await response.text()}")
+                data = await response.json()
+            self._token = data['access_token']
+            self._token_expiry = time.time() + data.get('expires_in', 3600)
+            return self._token
 
     @retry(
+        retry=retry_if_exception_type(SheetsRetryableError),
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
         reraise=True
     )
-    def _batch_update(self, worksheet: gspread.Worksheet, values: List[List[str]]):
-        """Actualiza múltiples filas de una vez"""
-        if values:
-            worksheet.append_rows(values)
-            time.sleep(1)
+    async def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        import aiohttp
+
+        session = self._get_session()
+        headers = {'Authorization': f"Bearer {await self._access_token()}"}
+        await self._bucket.acquire()
+        try:
+            async with session.request(method, url, headers=headers, **kwargs) as response:
+                if response.status == 401:
+                    # Token revocado o expirado antes de tiempo: se pide otro en el reintento
+                    self._token = None
+                    raise SheetsRetryableError("HTTP 401")
+                if response.status == 429 or response.status >= 500:
+                    raise SheetsRetryableError(f"HTTP {response.status}")
+                if response.status >= 400:
+                    raise Exception(f"Google API HTTP {response.status}: {await response.text()}")
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise SheetsRetryableError(str(e) or type(e).__name__)
+
+    async def _load_metadata(self) -> None:
+        """Ids y títulos de las hojas existentes (una vez por proceso)"""
+        async with self._metadata_lock:
+            if self._sheet_ids is None:
+                await self._fetch_metadata()
+
+    async def _fetch_metadata(self) -> None:
+        try:
+            data = await self._request(
+                'GET',
+                f"{settings.GOOGLE_SHEETS_API_URL}/spreadsheets/{self.spreadsheet_id}",
+                params={'fields': 'sheets.properties(sheetId,title)'}
+            )
+        except SheetsRetryableError:
+            raise
+        except Exception as e:
+            raise Exception(f"No se encontró la hoja de cálculo con ID: {self.spreadsheet_id} ({str(e)})")
+        properties = [sheet['properties'] for sheet in data.get('sheets', [])]
+        self._sheet_ids = {p['sheetId'] for p in properties}
+        self._titles = {p['title'] for p in properties}
+
+    async def _ensure_shared(self) -> None:
+        """Da permisos de lectura a cualquiera con el link (una vez por proceso)"""
+        async with self._share_lock:
+            if self._shared:
+                return
+            try:
+                await self._request(
+                    'POST',
+                    f"{settings.GOOGLE_DRIVE_API_URL}/files/{self.spreadsheet_id}/permissions",
+                    json={'type': 'anyone', 'role': 'reader', 'allowFileDiscovery': False}
+                )
+                self._shared = True
+            except Exception as e:
+                logger.warning(f"No se pudieron actualizar los permisos: {str(e)}")
+                # Continuamos aunque falle el cambio de permisos
+
+    def _new_sheet(self, title: str) -> tuple[int, str]:
+        """Reserva un id y un título libres para la hoja nueva"""
+        sheet_id = random.randint(1, 2 ** 31 - 1)
+        while sheet_id in self._sheet_ids:
+            sheet_id = random.randint(1, 2 ** 31 - 1)
+        unique_title, suffix = title, 1
+        while unique_title in self._titles:
+            suffix += 1
+            unique_title = f"{title}_{suffix}"
+        self._sheet_ids.add(sheet_id)
+        self._titles.add(unique_title)
+        return sheet_id, unique_title
+
+    @staticmethod
+    def _append_cells(sheet_id: int, rows: Iterable[List[Any]]) -> Dict[str, Any]:
+        return {
+            'appendCells': {
+                'sheetId': sheet_id,
+                'rows': [
+                    {'values': [{'userEnteredValue': {'stringValue': '' if value is None else str(value)}} for value in row]}
+                    for row in rows
+                ],
+                'fields': 'userEnteredValue'
+            }
+        }
+
+    @staticmethod
+    def _article_rows(articles: Iterable[Dict[str, Any]]) -> List[List[Any]]:
+        return [
+            [
+                article['Titular'],
+                article['Categoría'],
+                article['Autor'],
+                article['Cargo'],
+                article['Tiempo de Lectura'],
+                article['URL']
+            ]
+            for article in articles
+        ]
+
+    async def _batch_update(self, requests: List[Dict[str, Any]]) -> None:
+        await self._request(
+            'POST',
+            f"{settings.GOOGLE_SHEETS_API_URL}/spreadsheets/{self.spreadsheet_id}:batchUpdate",
+            json={'requests': requests}
+        )
+
+    async def _export_requests(self, export: PendingExport) -> AsyncIterator[Tuple[Dict[str, Any], int]]:
+        """
+        Requests de un job con la cantidad de filas de cada uno, leyendo los artículos por bloques
+
+        Cada bloque puede venir de un segmento gzip en disco: se lee fuera del event loop.
+        """
+        job = export.job
+        chunks = job.results.chunks(settings.RESULTS_EXPORT_CHUNK) if job.results else iter(())
+        yield {
+            'addSheet': {
+                'properties': {
+                    'sheetId': export.sheet_id,
+                    'title': export.title,
+                    'gridProperties': {'rowCount': len(job.results) + 1, 'columnCount': len(HEADER)}
+                }
+            }
+        }, 0
+        first = await asyncio.to_thread(next, chunks, [])
+        yield self._append_cells(export.sheet_id, [HEADER, *self._article_rows(first)]), len(first) + 1
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield self._append_cells(export.sheet_id, self._article_rows(chunk)), len(chunk)
+
+    def _flush(self) -> None:
+        """Envía los jobs acumulados en la ventana como un lote"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        exports, self._pending, self._pending_rows = self._pending, [], 0
+        if exports:
+            task = asyncio.create_task(self._write_exports(exports))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    async def _write_exports(self, exports: List[PendingExport]) -> None:
+        """
+        Empaqueta los requests de los jobs en `batchUpdate` de hasta `SHEETS_BATCH_MAX_ROWS` filas
+
+        Cada job queda resuelto cuando se envía el lote que contiene su último request.
+        """
+        try:
+            batch: List[Tuple[PendingExport, Optional[Dict[str, Any]]]] = []
+            rows = 0
+            for export in exports:
+                async for request, count in self._export_requests(export):
+                    if export.future.done():
+                        break
+                    if batch and rows + count > settings.SHEETS_BATCH_MAX_ROWS:
+                        await self._send(batch)
+                        batch, rows = [], 0
+                    batch.append((export, request))
+                    rows += count
+                # Marca de fin del job
+                batch.append((export, None))
+            if batch:
+                await self._send(batch)
+        except Exception as e:
+            for export in exports:
+                export.resolve(e)
+
+    async def _send(self, batch: List[Tuple[PendingExport, Optional[Dict[str, Any]]]]) -> None:
+        batch = [(export, request) for export, request in batch if not export.future.done()]
+        requests = [request for _, request in batch if request is not None]
+        exports = list(dict.fromkeys(export for export, _ in batch))
+        try:
+            if requests:
+                await self._batch_update(requests)
+        except SheetsRetryableError as e:
+            # Cuota o servicio caído: dividir el lote solo multiplicaría las llamadas
+            for export in exports:
+                export.resolve(e)
+            return
+        except Exception as e:
+            # Otro proceso pudo crear hojas con el mismo id o título: recargar metadatos
+            self._sheet_ids = None
+            if len(exports) == 1:
+                exports[0].resolve(e)
+                return
+            # batchUpdate es atómico: reenviar por job para que el error no afecte al resto
+            for export in exports:
+                await self._send([item for item in batch if item[0] is export])
+            return
+        for export, request in batch:
+            if request is None:
+                export.resolve()
 
     async def save_job_results(self, job: ScrapingJob) -> tuple[bool, str]:
         """
         Guarda los resultados del job en Google Sheets de manera asíncrona
-        
+
         Args:
             job: Instancia de ScrapingJob con los resultados
         Returns:
             tuple[bool, str]: (éxito, url de la hoja)
         """
         try:
-            loop = asyncio.get_running_loop()
-            
-            # Obtener spreadsheet en thread separado
-            spreadsheet = await loop.run_in_executor(
-                self._executor, 
-                self._get_spreadsheet
-            )
-            
-            timestamp = int(time.time())
-            worksheet_title = f"xepelin_{job.model}_{job.category}_{timestamp}"
+            self._get_session()
+            await self._load_metadata()
 
-            # Crear worksheet en thread separado
-            try:
-                worksheet = await loop.run_in_executor(
-                    self._executor,
-                    lambda: spreadsheet.add_worksheet(
-                        title=worksheet_title,
-                        rows=len(job.results) + 1,
-                        cols=6
-                    )
-                )
-            except gspread.exceptions.APIError as e:
-                logger.error(f"Error al crear la hoja: {str(e)}")
-                return False, ""
-
-            # Preparar todos los datos en una lista
-            all_rows = [
-                ['Titular', 'Categoría', 'Autor', 'Cargo', 'Tiempo de Lectura', 'URL']
-            ]
+            timestamp = int(time.time())
+            sheet_id, worksheet_title = self._new_sheet(f"xepelin_{job.model}_{job.category}_{timestamp}")
 
-            if job.results:
-                for article in job.results:
-                    row = [
-                        article['Titular'],
-                        article['Categoría'],
-                        article['Autor'],
-                        article['Cargo'],
-                        article['Tiempo de Lectura'],
-                        article['URL']
-                    ]
-                    all_rows.append(row)
-
-            # Hacer el batch update en thread separado
-            await loop.run_in_executor(
-                self._executor,
-                lambda: self._batch_update(worksheet, all_rows)
-            )
+            # Sumar el job al lote de la ventana actual
+            export = PendingExport(job, sheet_id, worksheet_title, asyncio.get_running_loop().create_future())
+            self._pending.append(export)
+            self._pending_rows += len(job.results) + 1
+            if self._pending_rows >= settings.SHEETS_BATCH_MAX_ROWS:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(settings.SHEETS_BATCH_WINDOW, self._flush)
 
-            # Dar permisos de lectura a cualquiera con el link
-            try:
-                await loop.run_in_executor(
-                    self._executor,
-                    lambda: spreadsheet.share(
-                        None,  # None significa que es para cualquiera con el link
-                        perm_type='anyone',
-                        role='reader',
-                        with_link=True
-                    )
-                )
-            except Exception as e:
-                logger.warning(f"No se pudieron actualizar los permisos: {str(e)}")
-                # Continuamos aunque falle el cambio de permisos
+            # El lote sigue aunque se cancele la espera de este job
+            await asyncio.gather(asyncio.shield(export.future), self._ensure_shared())
 
             # Construir URL de la hoja
-            sheet_url = f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}/edit#gid={worksheet.id}"
-            
+            sheet_url = f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}/edit#gid={sheet_id}"
+
             logger.info(f"Resultados del job guardados en la hoja: {worksheet_title}")
             return True, sheet_url
 
@@ -140,9 +410,5 @@ class GoogleSheetsService:
             logger.error(f"Error al guardar en Google Sheets: {str(e)}")
             return False, ""
 
-    def __del__(self):
-        """Cleanup del executor al destruir la instancia"""
-        self._executor.shutdown(wait=False)
-
 # Crear instancia singleton del servicio
-sheets_service = GoogleSheetsService() 
\ No newline at end of file
+sheets_service = GoogleSheetsService()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Añadir el directorio raíz al path (igual que los módulos de scrappers/)
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root_dir))
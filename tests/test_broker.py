@@ -0,0 +1,154 @@
+import asyncio
+import time
+import pytest
+from core.config import settings
+from models.jobs import ScrapingJob
+from models.requests import ScraperModel
+from services.broker import RedisBroker, SQLiteBroker
+from services.queue_service import QueueService
+
+
+class FakeRedis:
+    """Sustituto local de redis-py con los comandos que usa RedisBroker"""
+
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.values = {}
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def brpop(self, keys, timeout=0):
+        for key in keys:
+            if self.lists.get(key):
+                return key, self.lists[key].pop()
+        return None
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hdel(self, key, *fields):
+        return sum(1 for field in fields if self.hashes.get(key, {}).pop(field, None) is not None)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.values.pop(key, None) is not None)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def broker(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+    return RedisBroker(FakeRedis())
+
+
+def payload(job_id, model="ultra"):
+    return {"job_id": job_id, "model": model, "category": "pymes", "checkpoint": None}
+
+
+def test_claim_complete_and_acknowledge(broker):
+    broker.enqueue(payload("a"))
+    broker.enqueue(payload("b", model="base"))
+
+    assert broker.claim(["base"], "w1", timeout=0)["job_id"] == "b"
+    claimed = broker.claim(["ultra"], "w1", timeout=0)
+    assert claimed["job_id"] == "a"
+    assert broker.claimed_at("a") is not None
+    assert broker.claim(["ultra", "base"], "w1", timeout=0) is None
+
+    broker.complete("a", {"status": "completed", "results": [{"URL": "u"}]})
+    assert broker.get_result("a")["results"] == [{"URL": "u"}]
+
+    broker.acknowledge("a")
+    assert broker.get_result("a") is None
+
+
+def test_cancelled_job_is_not_claimed(broker):
+    broker.enqueue(payload("a"))
+    broker.cancel("a")
+
+    assert broker.is_cancelled("a")
+    assert broker.claim(["ultra"], "w1", timeout=0) is None
+
+
+def test_expired_claim_returns_to_queue(broker):
+    broker.claim_timeout = 0
+    broker.enqueue(payload("a"))
+    assert broker.claim(["ultra"], "w1", timeout=0)["job_id"] == "a"
+
+    time.sleep(0.01)
+    assert broker.claim(["ultra"], "w2", timeout=0)["job_id"] == "a"
+
+
+def test_sqlite_purges_unread_results(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), result_ttl=0)
+    broker.enqueue(payload("a"))
+    broker.claim(["ultra"], "w1", timeout=0)
+    broker.complete("a", {"status": "completed", "results": []})
+
+    time.sleep(0.01)
+    assert broker.purge_expired() == 1
+    assert broker.stats() == {"backend": "sqlite"}
+
+
+def run_on_broker(broker, job_id, worker=None):
+    """Ejecuta `_run_on_broker` con un worker simulado en paralelo"""
+    async def scenario():
+        service = QueueService()
+        service.broker = broker
+        job = ScrapingJob(job_id, "pymes", ScraperModel.ULTRA)
+        tasks = [asyncio.create_task(service._run_on_broker(job))]
+        if worker:
+            tasks.append(asyncio.create_task(worker()))
+        outcome, *_ = await asyncio.gather(*tasks)
+        return outcome
+    return asyncio.run(scenario())
+
+
+def test_queue_wait_does_not_count_towards_claim_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BROKER_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "BROKER_CLAIM_TIMEOUT", 0.3)
+    monkeypatch.setattr(settings, "BROKER_QUEUE_TIMEOUT", 5)
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+
+    async def worker():
+        # Más tiempo en cola que el plazo de ejecución
+        await asyncio.sleep(0.5)
+        claimed = broker.claim(["ultra"], "w1", timeout=0)
+        broker.complete(claimed["job_id"], {"status": "completed", "results": [{"URL": "u"}]})
+
+    outcome = run_on_broker(broker, "a", worker)
+
+    assert outcome.status == "completed"
+    # La API descarta el resultado después de leerlo
+    assert broker.stats() == {"backend": "sqlite"}
+
+
+def test_giving_up_cancels_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BROKER_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "BROKER_QUEUE_TIMEOUT", 0.1)
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), poll_interval=0.01)
+
+    outcome = run_on_broker(broker, "a")
+
+    assert outcome.status == "error"
+    assert broker.is_cancelled("a")
+    assert broker.claim(["ultra"], "w1", timeout=0) is None
@@ -0,0 +1,175 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from types import SimpleNamespace
+import scrappers.scrapper as scrapper_module
+from core.config import settings
+from scrappers.listing_cache import LoadedListing
+from scrappers.listing_discovery import build_listing_discovery
+from scrappers.scrapper import BaseScraper
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{base}/pages-sitemap.xml</loc></sitemap>
+  <sitemap><loc>{base}/blog-sitemap.xml</loc></sitemap>
+</sitemapindex>"""
+
+BLOG_SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{base}/blog/pymes/antiguo</loc><lastmod>2024-01-10</lastmod></url>
+  <url><loc>{base}/blog/pymes/reciente</loc><lastmod>2024-03-02</lastmod></url>
+  <url><loc>{base}/blog/pymes</loc></url>
+  <url><loc>{base}/blog/pymes/guias/anidado</loc></url>
+  <url><loc>{base}/blog/corporativos/otro</loc><lastmod>2024-05-01</lastmod></url>
+</urlset>"""
+
+RSS_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+  <item><title>Uno</title><link>{base}/blog/pymes/uno</link></item>
+  <item><title>Dos</title><link>/blog/pymes/dos</link></item>
+  <item><title>Otro</title><link>{base}/blog/corporativos/otro</link></item>
+</channel></rss>"""
+
+ATOM_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry><title>Tres</title><link href="{base}/blog/pymes/tres"/></entry>
+</feed>"""
+
+
+class FixtureServer:
+    """Sitio estático local: ruta -> documento XML (el resto responde 404)"""
+
+    def __init__(self):
+        self.documents = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                document = server.documents.get(self.path)
+                if document is None:
+                    self.send_error(404)
+                    return
+                body = document.format(base=server.base_url).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def discovery(self, monkeypatch, sitemaps, feeds):
+        monkeypatch.setattr(settings, "BLOG_BASE_URL", self.base_url)
+        monkeypatch.setattr(settings, "LISTING_SITEMAP_PATHS", sitemaps)
+        monkeypatch.setattr(settings, "LISTING_FEED_PATHS", feeds)
+        monkeypatch.setattr(settings, "LISTING_DISCOVERY_ENABLED", True)
+        return build_listing_discovery()
+
+
+@pytest.fixture
+def site():
+    server = FixtureServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def test_sitemap_index_prefers_blog_sitemaps(site, monkeypatch):
+    site.documents = {"/sitemap.xml": SITEMAP_INDEX, "/blog-sitemap.xml": BLOG_SITEMAP}
+    discovery = site.discovery(monkeypatch, ["/sitemap.xml"], [])
+
+    urls = discovery.discover_sync(f"{site.base_url}/blog/pymes")
+
+    # Solo artículos directos de la categoría, primero los más recientes
+    assert urls == [f"{site.base_url}/blog/pymes/reciente", f"{site.base_url}/blog/pymes/antiguo"]
+    assert "/pages-sitemap.xml" not in site.requests
+
+
+def test_feed_is_used_when_sitemap_fails(site, monkeypatch):
+    site.documents = {"/blog/pymes/feed.xml": RSS_FEED, "/atom.xml": ATOM_FEED}
+    discovery = site.discovery(monkeypatch, ["/sitemap.xml"], ["{category_url}/feed.xml", "/atom.xml"])
+
+    urls = discovery.discover_sync(f"{site.base_url}/blog/pymes")
+
+    assert urls == [f"{site.base_url}/blog/pymes/uno", f"{site.base_url}/blog/pymes/dos"]
+    assert site.requests == ["/sitemap.xml", "/blog/pymes/feed.xml"]
+
+
+def test_atom_feed_links(site, monkeypatch):
+    site.documents = {"/atom.xml": ATOM_FEED}
+    discovery = site.discovery(monkeypatch, [], ["/atom.xml"])
+
+    assert discovery.discover_sync(f"{site.base_url}/blog/pymes") == [f"{site.base_url}/blog/pymes/tres"]
+
+
+def test_browser_is_used_when_discovery_finds_nothing(site, monkeypatch):
+    # El sitemap no tiene artículos de la categoría y el feed no existe
+    site.documents = {"/sitemap.xml": BLOG_SITEMAP}
+    monkeypatch.setattr(scrapper_module, "listing_discovery", site.discovery(monkeypatch, ["/sitemap.xml"], ["/feed.xml"]))
+    category_url = f"{site.base_url}/blog/emprendedores"
+    browser_urls = [f"{category_url}/desde-navegador"]
+    scraper = BaseScraper()
+    calls = []
+
+    def get_all_articles(url, known_urls=None):
+        calls.append(url)
+        scraper.pagination_stats[url] = {"stop_reason": "end"}
+        return browser_urls
+
+    monkeypatch.setattr(scraper, "get_all_articles", get_all_articles)
+
+    assert scraper.load_article_urls(category_url) == LoadedListing(browser_urls, True)
+    assert calls == [category_url]
+    assert site.requests == ["/sitemap.xml", "/feed.xml"]
+
+
+def test_browser_is_skipped_when_discovery_succeeds(site, monkeypatch):
+    site.documents = {"/sitemap.xml": BLOG_SITEMAP}
+    monkeypatch.setattr(scrapper_module, "listing_discovery", site.discovery(monkeypatch, ["/sitemap.xml"], []))
+    scraper = BaseScraper()
+    monkeypatch.setattr(scraper, "get_all_articles", lambda *args: pytest.fail("no debe abrir el navegador"))
+
+    listing = scraper.load_article_urls(f"{site.base_url}/blog/pymes")
+
+    assert listing.complete
+    assert listing.urls[0] == f"{site.base_url}/blog/pymes/reciente"
+
+
+def test_known_tail_is_served_from_the_article_store(monkeypatch):
+    category_url = "https://example.com/blog/pymes"
+    previous = [f"{category_url}/{name}" for name in ("a", "b", "c", "d", "antiguo")]
+    head = [f"{category_url}/nuevo"] + previous[:3]
+    monkeypatch.setattr(scrapper_module, "listing_discovery", SimpleNamespace(discover_sync=lambda url: []))
+    scraper = BaseScraper()
+
+    def get_all_articles(url, known_urls=None):
+        scraper.pagination_stats[url] = {"stop_reason": "known"}
+        return head
+
+    monkeypatch.setattr(scraper, "get_all_articles", get_all_articles)
+    listing = scraper.load_article_urls(category_url, previous)
+
+    assert listing.urls == head + previous[3:]
+    assert listing.complete
+    assert listing.stored_urls == frozenset(previous[3:])
+
+    requested = []
+    stored = {"article": {"URL": previous[-1]}, "content_hash": "x", "etag": None, "last_modified": None}
+    monkeypatch.setattr(scrapper_module.article_store, "get", lambda url: stored)
+    monkeypatch.setattr(scrapper_module.article_cache, "get", lambda url: None)
+    monkeypatch.setattr(scrapper_module.article_cache, "set", lambda url, data: None)
+    monkeypatch.setattr(scrapper_module.requests, "get", lambda url, **kwargs: requested.append(url))
+    scraper.start_time = time.time()
+    scraper.stored_urls |= listing.stored_urls
+
+    assert scraper.get_article_details(previous[-1]) == {"URL": previous[-1]}
+    assert requested == []
@@ -0,0 +1,38 @@
+import asyncio
+from aiohttp import web
+from pydantic import HttpUrl, TypeAdapter
+from core.notifications import WebhookDispatcher
+
+
+async def start_receiver(received):
+    async def hook(request):
+        received.append(await request.json())
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/hook", hook)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/hook"
+
+
+def test_webhook_given_as_http_url_is_delivered(tmp_path):
+    async def scenario():
+        received = []
+        runner, url = await start_receiver(received)
+        dispatcher = WebhookDispatcher(batch_window=0, dead_letter_path=str(tmp_path / "dead.jsonl"))
+        try:
+            webhook = TypeAdapter(HttpUrl).validate_python(url)
+            dispatcher.enqueue(webhook, {"email": "a@b.cl", "link": "sheet"}, "j1")
+            await dispatcher.stop(timeout=5)
+        finally:
+            await runner.cleanup()
+        return received, dispatcher
+
+    received, dispatcher = asyncio.run(scenario())
+    assert received == [{"email": "a@b.cl", "link": "sheet"}]
+    assert dispatcher.stats_counters["delivered"] == 1
+    assert not (tmp_path / "dead.jsonl").exists()
@@ -0,0 +1,329 @@
+import asyncio
+import time
+import pytest
+from pydantic import HttpUrl, TypeAdapter
+import services.queue_service as queue_module
+from core.config import settings
+from models.jobs import ScrapingJob
+from models.requests import ScraperModel
+from services.job_state import InMemoryJobState, SQLiteJobState
+from services.queue_service import QueueService
+from services.result_store import ResultStore
+
+
+class FailingState(SQLiteJobState):
+    """Backend persistente que no puede publicar"""
+
+    def publish(self, record):
+        raise OSError("disco lleno")
+
+
+def finished_job(job_id: str) -> ScrapingJob:
+    webhook = TypeAdapter(HttpUrl).validate_python("https://example.com/hook")
+    job = ScrapingJob(job_id=job_id, category="ofertas", model=ScraperModel.BASE, webhook=webhook)
+    job.status = "completed"
+    return job
+
+
+def test_finished_job_with_webhook_is_published(tmp_path):
+    async def scenario():
+        service = QueueService()
+        service.state = SQLiteJobState(str(tmp_path / "jobs.db"))
+        job = finished_job("j1")
+        service.queue.append(job)
+        service._finish(job)
+        await service._flush_publications()
+        return service, await service.get_job_response("j1")
+
+    service, response = asyncio.run(scenario())
+    record = service.state.get("j1")
+    assert record["status"] == "completed"
+    assert record["webhook"] == "https://example.com/hook"
+    # Publicado en el backend persistente, el job deja la memoria
+    assert service.get_job_status("j1") is None
+    assert response["status"] == "completed"
+
+
+def test_job_that_cannot_be_published_stays_in_memory(tmp_path):
+    async def scenario():
+        service = QueueService()
+        service.state = FailingState(str(tmp_path / "jobs.db"))
+        job = finished_job("j2")
+        service.queue.append(job)
+        service._finish(job)
+        await service._flush_publications()
+        return service, await service.get_job_response("j2")
+
+    service, response = asyncio.run(scenario())
+    assert service.get_job_status("j2").status == "completed"
+    assert response["status"] == "completed"
+
+
+class FakeScraper:
+    """Scraper que termina cuando el test lo libera"""
+
+    def __init__(self, release: asyncio.Event):
+        self.release = release
+        self.partial_results = []
+        self.checkpoint = None
+
+    def cancel(self):
+        pass
+
+    async def scrape_async(self, category):
+        await self.release.wait()
+        return [{"Titular": f"{category} {i}", "URL": f"https://blog.example.com/{category}/{i}"} for i in range(2)]
+
+
+class FakeFactory:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = []
+
+    def get_scraper(self, model):
+        self.started.append(model)
+        return FakeScraper(self.release)
+
+
+@pytest.fixture
+def scheduler(monkeypatch, tmp_path):
+    """Scheduler sin exportación ni historial, con resultados en un directorio temporal"""
+    monkeypatch.setattr(queue_module, "result_store", ResultStore(str(tmp_path / "results")))
+    monkeypatch.setattr(queue_module.job_history, "record", lambda *args: None)
+
+    def build() -> QueueService:
+        service = QueueService()
+        service.state = InMemoryJobState()
+        service.scraper_factory = FakeFactory()
+        service.exporter.submit = lambda job: None
+        service._accepting = True
+        for model in ScraperModel:
+            service._job_available[model] = asyncio.Condition()
+        return service
+
+    return build
+
+
+def new_job(job_id: str, category: str = "pymes") -> ScrapingJob:
+    return ScrapingJob(job_id=job_id, category=category, model=ScraperModel.ULTRA)
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_cancelling_a_running_leader_keeps_its_followers(scheduler):
+    async def scenario():
+        service = scheduler()
+        worker = asyncio.create_task(service._worker(ScraperModel.ULTRA))
+        leader, follower = new_job("A"), new_job("B")
+        await service.add_job(leader)
+        await settle()
+        await service.add_job(follower)
+        assert follower.coalesced_with == "A"
+
+        await service.cancel_job("A")
+        service.scraper_factory.release.set()
+        await asyncio.wait_for(follower.finished.wait(), 5)
+        worker.cancel()
+        return service, leader, follower
+
+    service, leader, follower = asyncio.run(scenario())
+    assert leader.status == "cancelled"
+    assert follower.status == "completed"
+    assert follower.coalesced_with is None
+    assert len(follower.results) == 2
+    assert len(service.scraper_factory.started) == 1
+
+
+def test_cancelling_a_pending_leader_promotes_its_follower(scheduler):
+    async def scenario():
+        service = scheduler()
+        leader, follower, late = new_job("A"), new_job("B"), new_job("C")
+        await service.add_job(leader)
+        await service.add_job(follower)
+        await service.cancel_job("A")
+        # Los jobs nuevos se coalescen con el follower promovido
+        await service.add_job(late)
+        assert follower.status == "pending" and late.coalesced_with == "B"
+
+        service.scraper_factory.release.set()
+        worker = asyncio.create_task(service._worker(ScraperModel.ULTRA))
+        await asyncio.wait_for(late.finished.wait(), 5)
+        worker.cancel()
+        return leader, follower, late
+
+    leader, follower, late = asyncio.run(scenario())
+    assert leader.status == "cancelled"
+    assert follower.status == "completed" and late.status == "completed"
+    assert len(late.results) == 2
+
+
+def test_cancelling_a_split_job_keeps_children_other_jobs_follow(scheduler):
+    async def scenario():
+        service = scheduler()
+        parent = new_job("P", "todas las categorias")
+        await service.add_job(parent)
+        child = next(child for child in parent.children if child.category == "pymes")
+        other = new_job("X")
+        await service.add_job(other)
+        assert other.coalesced_with == child.job_id
+
+        await service.cancel_job("P")
+        service.scraper_factory.release.set()
+        worker = asyncio.create_task(service._worker(ScraperModel.ULTRA))
+        await asyncio.wait_for(other.finished.wait(), 5)
+        await asyncio.wait_for(parent.finished.wait(), 5)
+        worker.cancel()
+        return parent, other
+
+    parent, other = asyncio.run(scenario())
+    assert parent.status == "cancelled"
+    assert all(child.status == "cancelled" for child in parent.children)
+    assert other.status == "completed"
+    assert len(other.results) == 2
+
+
+def test_cancel_arriving_after_the_scrape_finished_is_kept(scheduler):
+    async def scenario():
+        service = scheduler()
+        job = new_job("A")
+
+        async def scrape(target):
+            # El DELETE llega con el scraping terminado, antes de que el worker retome
+            asyncio.get_running_loop().call_soon(service._cancel, job)
+            return queue_module.ScrapingOutcome("completed", [{"Titular": "t", "URL": "u"}], None)
+
+        service._scrape = scrape
+        worker = asyncio.create_task(service._worker(ScraperModel.ULTRA))
+        await service.add_job(job)
+        await asyncio.wait_for(job.finished.wait(), 5)
+        worker.cancel()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "cancelled"
+    assert job.error == "Cancelado por el cliente"
+
+
+def test_job_completes_when_results_cannot_be_written(scheduler, monkeypatch, tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    monkeypatch.setattr(queue_module, "result_store", ResultStore(str(blocker / "results"), memory_budget=10))
+
+    async def scenario():
+        service = scheduler()
+        job = new_job("A")
+        worker = asyncio.create_task(service._worker(ScraperModel.ULTRA))
+        service.scraper_factory.release.set()
+        await service.add_job(job)
+        await asyncio.wait_for(job.finished.wait(), 5)
+        worker.cancel()
+        return await service.get_job_response("A")
+
+    response = asyncio.run(scenario())
+    assert response["status"] == "completed"
+    assert len(response["articles"]) == 2
+
+
+class SlowState(InMemoryJobState):
+    """Backend compartido lento (p. ej. Redis remoto o SQLite con el lock tomado)"""
+
+    durable = True
+
+    def publish(self, record):
+        time.sleep(0.2)
+        super().publish(record)
+
+    def get(self, job_id):
+        time.sleep(0.2)
+        return super().get(job_id)
+
+    def list_records(self):
+        time.sleep(0.2)
+        return super().list_records()
+
+
+def test_state_backend_does_not_block_the_event_loop(scheduler):
+    async def scenario():
+        service = scheduler()
+        service.state = SlowState()
+        gaps = []
+
+        async def heartbeat():
+            last = time.monotonic()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+
+        beat = asyncio.create_task(heartbeat())
+        await service.add_job(new_job("A"))
+        status = await service.get_queue_status()
+        missing = await service.get_job_response("otro")
+        await service._flush_publications()
+        beat.cancel()
+        return gaps, status, missing, service.state.get("A")
+
+    gaps, status, missing, record = asyncio.run(scenario())
+    assert max(gaps) < 0.15
+    assert status["pending_jobs"] == 1
+    assert missing is None
+    assert record["status"] == "pending"
+
+
+def test_start_closes_jobs_orphaned_by_a_stopped_process(scheduler, tmp_path):
+    state = SQLiteJobState(str(tmp_path / "jobs.db"))
+    now = time.time()
+    state.heartbeat("caido")
+    state.heartbeat("vivo")
+    state._connect().execute("UPDATE owners SET seen = ? WHERE owner = 'caido'", (now - 3600,))
+
+    def record(job_id, status, owner=None, **extra):
+        job = new_job(job_id)
+        job.status = status
+        state.publish({**job.to_record(), **({"owner": owner} if owner else {}), **extra})
+
+    record("pendiente", "pending", "caido")
+    record("en-curso", "processing", "caido", articles_count=3)
+    record("anterior", "processing")
+    record("ajeno", "processing", "vivo")
+    record("terminado", "completed", "caido")
+
+    async def scenario():
+        service = scheduler()
+        service.state = state
+        await service.start()
+        await service.stop(timeout=0)
+        return service
+
+    service = asyncio.run(scenario())
+    statuses = {record["job_id"]: record["status"] for record in state.list_records()}
+    assert statuses == {
+        "pendiente": "error",
+        "en-curso": "partial",
+        "anterior": "error",
+        "ajeno": "processing",
+        "terminado": "completed"
+    }
+    assert state.get("pendiente")["error"]
+    # El dueño caído se olvida y el proceso detenido quita su propio latido
+    assert set(state.owners()) == {"vivo"}
+
+
+def test_job_response_returns_one_page_by_default(scheduler):
+    async def scenario():
+        service = scheduler()
+        job = finished_job("P")
+        articles = [{"Titular": str(i), "URL": f"https://blog.example.com/{i}"} for i in range(settings.RESULTS_EXPORT_CHUNK + 1)]
+        job.results = queue_module.result_store.write("P", articles)
+        service.queue.append(job)
+        service._finish(job)
+        await service._flush_publications()
+        return await service.get_job_response("P")
+
+    response = asyncio.run(scenario())
+    assert len(response["articles"]) == settings.RESULTS_EXPORT_CHUNK
+    assert response["next_offset"] == settings.RESULTS_EXPORT_CHUNK
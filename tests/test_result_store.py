@@ -0,0 +1,50 @@
+from services.result_store import ResultStore
+
+
+def articles(count, prefix="a"):
+    return [{"Titular": f"{prefix}{i}", "URL": f"https://blog.example.com/{prefix}/{i}"} for i in range(count)]
+
+
+def test_job_within_budget_stays_in_memory(tmp_path):
+    store = ResultStore(str(tmp_path / "results"), memory_budget=10_000)
+
+    results = store.write("small", articles(5))
+
+    assert not (tmp_path / "results").exists()
+    assert results.page(3) == articles(5)[3:]
+    assert store.open("small").page(0, 2) == articles(5)[:2]
+
+
+def test_job_over_budget_is_paged_from_segments(tmp_path):
+    store = ResultStore(str(tmp_path / "results"), memory_budget=200, segment_size=4)
+
+    results = store.write("large", articles(10))
+
+    assert len(results.segments) == 3
+    assert store.open("large").page(3, 5) == articles(10)[3:8]
+    assert store.stats()["cached_jobs"] == 0
+
+
+def test_least_used_job_is_spilled_when_the_budget_is_exceeded(tmp_path):
+    store = ResultStore(str(tmp_path / "results"), memory_budget=700)
+    first = store.write("first", articles(8, "f"))
+    store.write("second", articles(8, "s"))
+
+    assert (tmp_path / "results" / "first").exists()
+    assert not (tmp_path / "results" / "second").exists()
+    # Los handles abiertos antes de bajar el job a disco lo siguen leyendo
+    assert list(first) == articles(8, "f")
+    assert store.open("second").page() == articles(8, "s")
+
+
+def test_unwritable_directory_keeps_results_in_memory(tmp_path):
+    blocker = tmp_path / "results"
+    blocker.write_text("no es un directorio")
+    store = ResultStore(str(blocker / "jobs"), memory_budget=200)
+
+    results = store.write("large", articles(10))
+    store.write_checkpoint("large", {"listings": {}})
+
+    assert list(results) == articles(10)
+    assert store.open("large").page(8) == articles(10)[8:]
+    assert store.read_checkpoint("large") == {"listings": {}}
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from scrappers.scrapper_ultra_optimized import UltraOptimizedScraper
+
+
+def test_cancelled_consumer_propagates_the_cancellation():
+    async def scenario():
+        scraper = UltraOptimizedScraper()
+        # Sin marcador de fin: los fetchers quedan esperando URLs
+        consumer = asyncio.create_task(scraper.consume_article_queue(asyncio.Queue()))
+        await asyncio.sleep(0.05)
+        consumer.cancel()
+        await consumer
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
+
+
+def test_article_store_calls_do_not_block_the_event_loop(monkeypatch):
+    import time
+    from types import SimpleNamespace
+    import scrappers.scrapper_ultra_optimized as ultra_module
+
+    class SlowStore:
+        def get(self, url):
+            time.sleep(0.2)
+            return {"article": {"url": url}}
+
+        def touch(self, url, etag, last_modified):
+            time.sleep(0.2)
+
+    async def revalidate(session, url, stored, timeout):
+        return True, stored["article"], None, SimpleNamespace(etag=None, last_modified=None)
+
+    monkeypatch.setattr(ultra_module, "article_store", SlowStore())
+    monkeypatch.setattr(ultra_module.article_cache, "get", lambda url: None)
+    monkeypatch.setattr(ultra_module.article_cache, "set", lambda url, data: None)
+    monkeypatch.setattr(ultra_module.article_data_fetcher, "revalidate", revalidate)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        data = await UltraOptimizedScraper().get_article_details(None, "https://example.com/a", asyncio.Semaphore(1))
+        ticking.cancel()
+        return data, ticks
+
+    data, ticks = asyncio.run(scenario())
+    assert data == {"url": "https://example.com/a"}
+    # Con el loop bloqueado el ticker no avanzaría durante los 0.4 s de SQLite
+    assert ticks >= 10
@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import json
+import time
+import pytest
+import rsa
+from aiohttp import web
+from core.config import settings
+from models.jobs import ScrapingJob
+from models.requests import ScraperModel
+from services.result_store import ResultStore
+from services.sheets_service import GoogleSheetsService
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    _, key = rsa.newkeys(1024)
+    return key.save_pkcs1().decode()
+
+
+class FakeSheets:
+    """Servidor local con los endpoints de token, Sheets y Drive que usa el cliente"""
+
+    def __init__(self):
+        self.calls = []
+        self.assertions = []
+        self.batches = []
+        self.sheets = {1: "Hoja 1"}
+        self.rows = {}
+        self.runner = None
+
+    async def token(self, request):
+        form = await request.post()
+        self.calls.append("token")
+        self.assertions.append(form["assertion"])
+        return web.json_response({"access_token": "fake-token", "expires_in": 3600})
+
+    async def metadata(self, request):
+        self.calls.append("metadata")
+        return web.json_response({
+            "sheets": [{"properties": {"sheetId": sheet_id, "title": title}} for sheet_id, title in self.sheets.items()]
+        })
+
+    async def batch_update(self, request):
+        assert request.headers["Authorization"] == "Bearer fake-token"
+        self.calls.append("batchUpdate")
+        requests = (await request.json())["requests"]
+        self.batches.append(requests)
+        for item in requests:
+            if "addSheet" in item:
+                properties = item["addSheet"]["properties"]
+                self.sheets[properties["sheetId"]] = properties["title"]
+                self.rows[properties["sheetId"]] = []
+            if "appendCells" in item:
+                cells = item["appendCells"]
+                self.rows[cells["sheetId"]] += [
+                    [value["userEnteredValue"]["stringValue"] for value in row["values"]] for row in cells["rows"]
+                ]
+        return web.json_response({})
+
+    async def share(self, request):
+        self.calls.append("share")
+        await asyncio.sleep(0.05)
+        return web.json_response({})
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post("/token", self.token)
+        app.router.add_get("/v4/spreadsheets/{spreadsheet_id}", self.metadata)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}:batchUpdate", self.batch_update)
+        app.router.add_post("/drive/files/{spreadsheet_id}/permissions", self.share)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+
+
+@pytest.fixture
+def run_export(monkeypatch, private_key, tmp_path):
+    """Ejecuta `scenario(service, make_job)` contra el servidor falso y lo retorna"""
+    monkeypatch.setenv("GOOGLE_SPREADSHEET_ID", "spreadsheet")
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_JSON", json.dumps({
+        "client_email": "scraper@example.iam.gserviceaccount.com",
+        "private_key": private_key
+    }))
+    monkeypatch.setattr(settings, "SHEETS_QUOTA_PER_MINUTE", 0)
+    monkeypatch.setattr(settings, "SHEETS_BATCH_WINDOW", 0)
+    store = ResultStore(str(tmp_path / "results"))
+    job_ids = itertools.count()
+
+    def make_job(count: int) -> ScrapingJob:
+        job = ScrapingJob(f"job-{next(job_ids)}", "Pymes", ScraperModel.BASE)
+        job.results = store.write(job.job_id, [
+            {
+                "Titular": f"Artículo {i}",
+                "Categoría": "Pymes",
+                "Autor": None,
+                "Cargo": "Editor",
+                "Tiempo de Lectura": "3 min",
+                "URL": f"https://blog.example.com/{i}"
+            }
+            for i in range(count)
+        ])
+        return job
+
+    def run(scenario) -> FakeSheets:
+        async def main():
+            server = FakeSheets()
+            base_url = await server.start()
+            monkeypatch.setattr(settings, "GOOGLE_TOKEN_URL", f"{base_url}/token")
+            monkeypatch.setattr(settings, "GOOGLE_SHEETS_API_URL", f"{base_url}/v4")
+            monkeypatch.setattr(settings, "GOOGLE_DRIVE_API_URL", f"{base_url}/drive")
+            service = GoogleSheetsService()
+            try:
+                await scenario(service, make_job)
+            finally:
+                await service.close()
+                await server.runner.cleanup()
+            return server
+
+        return asyncio.run(main())
+
+    return run
+
+
+def test_token_and_metadata_are_loaded_once(run_export):
+    async def scenario(service, make_job):
+        for _ in range(3):
+            ok, url = await service.save_job_results(make_job(2))
+            assert ok and url.startswith("https://docs.google.com/spreadsheets/d/spreadsheet/edit#gid=")
+
+    server = run_export(scenario)
+    assert server.calls.count("token") == 1
+    assert server.calls.count("metadata") == 1
+    assert server.assertions[0].count(".") == 2
+
+
+def test_each_job_is_written_with_one_batch_update(run_export):
+    urls = []
+
+    async def scenario(service, make_job):
+        for count in (3, 5):
+            ok, url = await service.save_job_results(make_job(count))
+            assert ok
+            urls.append(url)
+
+    server = run_export(scenario)
+    assert server.calls.count("batchUpdate") == 2
+    for batch in server.batches:
+        assert [next(iter(item)) for item in batch] == ["addSheet", "appendCells"]
+    rows = [server.rows[int(url.split("gid=")[1])] for url in urls]
+    assert [len(sheet) for sheet in rows] == [4, 6]
+    assert rows[0][0][0] == "Titular"
+    assert rows[1][-1] == ["Artículo 4", "Pymes", "", "Editor", "3 min", "https://blog.example.com/4"]
+
+
+def test_large_job_is_split_in_chunks(run_export, monkeypatch):
+    monkeypatch.setattr(settings, "RESULTS_EXPORT_CHUNK", 100)
+    monkeypatch.setattr(settings, "SHEETS_BATCH_MAX_ROWS", 120)
+    urls = []
+
+    async def scenario(service, make_job):
+        ok, url = await service.save_job_results(make_job(250))
+        assert ok
+        urls.append(url)
+
+    server = run_export(scenario)
+    assert server.calls.count("batchUpdate") == 3
+    appended = [
+        [len(item["appendCells"]["rows"]) for item in batch if "appendCells" in item]
+        for batch in server.batches
+    ]
+    assert appended == [[101], [100], [50]]
+    rows = server.rows[int(urls[0].split("gid=")[1])]
+    assert len(rows) == 251
+    assert [row[0] for row in rows[1:]] == [f"Artículo {i}" for i in range(250)]
+
+
+def test_concurrent_exports_share_the_spreadsheet_once(run_export):
+    async def scenario(service, make_job):
+        results = await asyncio.gather(*[service.save_job_results(make_job(1)) for _ in range(3)])
+        assert all(ok for ok, _ in results)
+
+    server = run_export(scenario)
+    assert server.calls.count("share") == 1
+    assert server.calls.count("metadata") == 1
+
+
+class SlowResults:
+    """Resultados cuyos bloques tardan en leerse, como segmentos gzip en disco"""
+
+    def __init__(self, results):
+        self.results = results
+
+    def __len__(self):
+        return len(self.results)
+
+    def chunks(self, size):
+        for chunk in self.results.chunks(size):
+            time.sleep(0.1)
+            yield chunk
+
+
+def test_result_chunks_are_read_off_the_event_loop(run_export, monkeypatch):
+    monkeypatch.setattr(settings, "RESULTS_EXPORT_CHUNK", 2)
+    ticks = []
+
+    async def scenario(service, make_job):
+        async def ticker():
+            while True:
+                await asyncio.sleep(0.01)
+                ticks.append(1)
+
+        job = make_job(6)
+        job.results = SlowResults(job.results)
+        ticking = asyncio.create_task(ticker())
+        ok, _ = await service.save_job_results(job)
+        ticking.cancel()
+        assert ok
+
+    server = run_export(scenario)
+    assert len(server.rows[max(server.rows)]) == 7
+    # Con el loop bloqueado el ticker no avanzaría durante los 0.3 s de lectura
+    assert len(ticks) >= 15
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que solo se necesitan al scrapear o exportar, nunca para arrancar la API
+HEAVY_MODULES = ("selenium", "webdriver_manager", "google", "gspread", "aiohttp", "bs4", "pandas", "redis")
+# Presupuesto de arranque: la app sobre FastAPI y el total en frío (holgado para CI lentos)
+APP_IMPORT_BUDGET = 0.75
+TOTAL_IMPORT_BUDGET = 4.0
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import fastapi
+framework = time.perf_counter()
+import main
+end = time.perf_counter()
+print(json.dumps({{
+    "framework": framework - start,
+    "app": end - framework,
+    "total": end - start,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def test_import_main_is_cheap():
+    # Sin credenciales de Google: la API tiene que arrancar igual
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_CREDENTIALS_JSON"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True, timeout=60
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+
+    assert timings["loaded"] == []
+    assert timings["app"] < APP_IMPORT_BUDGET, timings
+    assert timings["total"] < TOTAL_IMPORT_BUDGET, timings
@@ -0,0 +1,129 @@
+"""
+Worker de scraping fuera del proceso de la API.
+
+Reclama jobs desde el broker configurado (BROKER_URL), ejecuta el scraper y
+escribe el resultado de vuelta. La API debe correr con EXECUTION_MODE=broker.
+
+Uso:
+    python worker.py --models ultra optimized --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import time
+from dotenv import load_dotenv
+from core.logging import logger
+from models.requests import ScraperModel
+from scrappers.browser_pool import browser_pool
+from services.broker import JobBroker, build_broker
+from services.job_runner import run_scraping
+from services.scraper_factory import ScraperFactory
+
+load_dotenv()
+
+# Segundos que un reclamo espera jobs antes de revisar si el worker debe detenerse
+CLAIM_WAIT = 5
+# Segundos entre revisiones de cancelación del job en curso
+CANCEL_CHECK_INTERVAL = 2
+
+
+async def watch_cancellation(broker: JobBroker, job_id: str, task: asyncio.Task) -> None:
+    """Cancela el scraping en curso cuando la API marca el job como cancelado en el broker"""
+    while not task.done():
+        await asyncio.sleep(CANCEL_CHECK_INTERVAL)
+        if await asyncio.to_thread(broker.is_cancelled, job_id):
+            task.cancel()
+            return
+
+
+async def process_claimed_job(broker: JobBroker, scraper_factory: ScraperFactory, payload: dict, worker_id: str) -> None:
+    """Ejecuta un job reclamado y guarda el resultado en el broker"""
+    job_id = payload["job_id"]
+    start = time.time()
+    logger.info(f"Worker {worker_id} procesando job {job_id} ({payload['model']}, {payload['category']})")
+
+    scraping = asyncio.create_task(run_scraping(
+        scraper_factory,
+        ScraperModel(payload["model"]),
+        payload["category"],
+        job_id,
+        payload.get("checkpoint")
+    ))
+    watcher = asyncio.create_task(watch_cancellation(broker, job_id, scraping))
+    try:
+        outcome = await scraping
+    except asyncio.CancelledError:
+        if not watcher.done():
+            # La cancelación viene del propio worker, no del job
+            raise
+        logger.info(f"Worker {worker_id} canceló job {job_id}")
+        return
+    finally:
+        watcher.cancel()
+    await asyncio.to_thread(broker.complete, job_id, {
+        "status": outcome.status,
+        "results": outcome.results,
+        "error": outcome.error,
+        "checkpoint": outcome.checkpoint,
+        "start_time": start,
+        "end_time": time.time(),
+        "worker": worker_id
+    })
+    logger.info(f"Worker {worker_id} terminó job {job_id}: {outcome.status}, {len(outcome.results)} artículos")
+
+
+async def worker_loop(broker: JobBroker, models: list, worker_id: str, stop: asyncio.Event) -> None:
+    """Reclama y procesa jobs uno a la vez hasta recibir la señal de detención"""
+    scraper_factory = ScraperFactory()
+    while not stop.is_set():
+        try:
+            payload = await asyncio.to_thread(broker.claim, models, worker_id, CLAIM_WAIT)
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: error reclamando jobs: {e}")
+            await asyncio.sleep(CLAIM_WAIT)
+            continue
+        if payload:
+            await process_claimed_job(broker, scraper_factory, payload, worker_id)
+
+
+async def run_worker(models: list, concurrency: int) -> None:
+    broker = build_broker()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Termina el job en curso antes de salir
+        loop.add_signal_handler(sig, stop.set)
+
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info(f"Worker {base_id} atendiendo modelos {models} con concurrencia {concurrency}")
+    await asyncio.gather(*(
+        worker_loop(broker, models, f"{base_id}-{index}", stop)
+        for index in range(concurrency)
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Worker de scraping conectado al broker de jobs')
+    parser.add_argument(
+        '--models',
+        nargs='+',
+        choices=[model.value for model in ScraperModel],
+        default=[model.value for model in ScraperModel],
+        help='Modelos de scraper que atiende este worker'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Jobs procesados en paralelo por este proceso'
+    )
+    args = parser.parse_args()
+
+    browser_pool.start()
+    try:
+        asyncio.run(run_worker(args.models, args.concurrency))
+    finally:
+        browser_pool.shutdown()
+        logger.info("Worker detenido")